@@ -1,31 +1,128 @@
+import gzip
+import json
 import os
 
-from flask import Flask, render_template, request, jsonify, send_file
-from modules.error_manager import ErrorManager
-from modules.excel_handler import ExcelHandler
-from modules.symbols_manager import SymbolsManager
-from modules.yahoo_client import YahooFinanceClient
-from modules.indicators import MACDCalculator
-from modules.classificator import MACDSignalClassifier
-from modules.show_results import AnalysisResultsManager
-import json
+import click
+from flask import Blueprint, Flask, Response, current_app, render_template, request, jsonify, send_file, url_for
+from flask.cli import AppGroup
+from modules.services import AppServices
+from modules.pipeline import analyze_symbols
+from modules.market_calendar import latest_daily_bar
+from modules.timeframes import TIMEFRAME_LABELS, normalize_timeframes
+from modules.export_formats import EXPORT_FORMATS, EXPORT_LABELS, available_export_formats
+from modules.live_events import job_event_stream
+from modules.signals_api import API_VERSION, compute_signals, parse_request, request_etag
+
+# Las rutas se registran en la app creada por create_app
+bp = Blueprint("macd", __name__)
+
+def create_app(config: dict | None = None) -> Flask:
+    """
+    Crea la aplicación Flask. Los gestores pesados (pandas, yfinance,
+    openpyxl) se crean recién en la primera solicitud que los necesita.
+    Con MACD_WARMUP activo, se precalientan en un hilo en segundo plano.
+    """
+    # Indicar a Flask dónde están las plantillas
+    app = Flask(__name__, template_folder="src")
+    app.config.update(
+        MACD_CACHE_DIR=os.environ.get("MACD_CACHE_DIR", "cache"),
+        MACD_DATA_PROVIDER=os.environ.get("MACD_DATA_PROVIDER", "yahoo"),
+        MACD_WARMUP=os.environ.get("MACD_WARMUP", "0") == "1",
+        # Límite de símbolos por análisis y descarga por lotes
+        MACD_MAX_SYMBOLS=int(os.environ.get("MACD_MAX_SYMBOLS", "20")),
+        MACD_CHUNK_SIZE=int(os.environ.get("MACD_CHUNK_SIZE", "100")),
+        MACD_MAX_WORKERS=int(os.environ.get("MACD_MAX_WORKERS", "4")),
+        # Lotes descargados que pueden esperar en cola mientras se calcula el MACD
+        MACD_STREAM_BUFFER=int(os.environ.get("MACD_STREAM_BUFFER", "2")),
+        # Trabajos en segundo plano: hilos y tamaño de lista a partir del cual se usan
+        MACD_JOB_WORKERS=int(os.environ.get("MACD_JOB_WORKERS", "2")),
+        MACD_JOB_THRESHOLD=int(os.environ.get("MACD_JOB_THRESHOLD", "100")),
+        # API JSON: símbolos por consulta y tamaño desde el que se comprime con gzip
+        MACD_API_MAX_SYMBOLS=int(os.environ.get("MACD_API_MAX_SYMBOLS", "1000")),
+        MACD_API_GZIP_MIN_BYTES=int(os.environ.get("MACD_API_GZIP_MIN_BYTES", "1024")),
+        # Segundos sin novedades tras los que el flujo de resultados en vivo envía un latido
+        MACD_SSE_HEARTBEAT=float(os.environ.get("MACD_SSE_HEARTBEAT", "15")),
+        # Máximo de estados incrementales de EMAs en memoria (símbolo x intervalo x parámetros)
+        MACD_EMA_STATE_MAX=int(os.environ.get("MACD_EMA_STATE_MAX", "20000")),
+        # Segundos que se conservan los resultados para filtrar y exportar
+        MACD_RESULTS_TTL=int(os.environ.get("MACD_RESULTS_TTL", "3600")),
+        # Listado de símbolos existentes (vacío = solo se valida el formato)
+        MACD_SYMBOLS_FILE=os.environ.get("MACD_SYMBOLS_FILE", ""),
+        # Precálculo de listas guardadas: hilo dentro del proceso y cada cuántos segundos revisa
+        MACD_PRECOMPUTE=os.environ.get("MACD_PRECOMPUTE", "0") == "1",
+        MACD_PRECOMPUTE_INTERVAL=int(os.environ.get("MACD_PRECOMPUTE_INTERVAL", "300")),
+        # Velas en formato compacto (una matriz por campo): campos a conservar y tipo
+        MACD_COMPACT_PRICES=os.environ.get("MACD_COMPACT_PRICES", "0") == "1",
+        MACD_PRICE_FIELDS=os.environ.get("MACD_PRICE_FIELDS", "Close"),
+        MACD_PRICE_DTYPE=os.environ.get("MACD_PRICE_DTYPE", "float32"),
+        # Velas compartidas entre workers: las publica el precálculo y se leen mapeadas
+        # en memoria (directorio vacío = MACD_CACHE_DIR/compartido; puede ser /dev/shm)
+        MACD_SHARED_PRICES=os.environ.get("MACD_SHARED_PRICES", "0") == "1",
+        MACD_SHARED_PRICES_DIR=os.environ.get("MACD_SHARED_PRICES_DIR", ""),
+        # Días de historial publicados (alcanza para el diario y el semanal)
+        MACD_SHARED_PRICES_DAYS=int(os.environ.get("MACD_SHARED_PRICES_DAYS", "400")),
+    )
+    if config:
+        app.config.update(config)
+
+    app.extensions["macd"] = AppServices(app.config)
+    app.register_blueprint(bp)
+    app.cli.add_command(precompute_cli)
 
-# Indicar a Flask dónde están las plantillas
-app = Flask(__name__, template_folder="src")
+    if app.config["MACD_WARMUP"]:
+        app.extensions["macd"].start_background_warm_up()
+    if app.config["MACD_PRECOMPUTE"]:
+        app.extensions["macd"].scheduler.start()
+    return app
 
-# Instancias de gestores
-error_manager = ErrorManager()
-excel_handler = ExcelHandler(error_manager)
-symbols_manager = SymbolsManager(error_manager)
-yahoo_client = YahooFinanceClient(error_manager)
-macd_calculator = MACDCalculator()
-classifier = MACDSignalClassifier()
-results_manager = AnalysisResultsManager()
+def get_services() -> AppServices:
+    """ Servicios de la aplicación en curso """
+    return current_app.extensions["macd"]
+
+def signal_columns(results: dict) -> list[tuple[str, str]]:
+    """ Columnas de señal por marco temporal presentes en los resultados: [(clave, título)] """
+    first = next(iter(results.values()), {})
+    return [
+        (key, f"Señal {TIMEFRAME_LABELS.get(key.removeprefix('señal_'), key)}")
+        for key in first if key.startswith("señal_")
+    ]
+
+def timeframe_columns(timeframes: list[str]) -> list[tuple[str, str]]:
+    """ Columnas de señal que tendrán los resultados de estos marcos (el primero es la señal principal) """
+    return signal_columns({"": {f"señal_{timeframe}": None for timeframe in timeframes[1:]}})
+
+@bp.app_context_processor
+def export_options():
+    """ Formatos de exportación que ofrece la página (Parquet solo con su biblioteca instalada) """
+    return {"export_formats": {fmt: EXPORT_LABELS[fmt] for fmt in available_export_formats()}}
+
+def render_results(results: dict, messages: list[str], **context):
+    """ Guarda los resultados en el servidor y muestra la tabla con su id """
+    services = get_services()
+    result_id = services.result_store.put(results) if results else None
+    with services.metrics.timer("renderizado"):
+        return render_template("macd_results.html", results=results, messages=messages, result_id=result_id,
+                               signal_columns=signal_columns(results), **context)
+
+# ------------------------------
+# Métricas por solicitud: duración por etapa en el encabezado Server-Timing
+# ------------------------------
+@bp.before_app_request
+def start_request_timing():
+    get_services().metrics.begin_request()
+
+@bp.after_app_request
+def add_server_timing(response):
+    timings = get_services().metrics.end_request(request.endpoint or "desconocido", response.status_code)
+    if timings:
+        response.headers["Server-Timing"] = get_services().metrics.server_timing(timings)
+    return response
 
 # ------------------------------
 # Función unificada para extraer y validar símbolos
 # ------------------------------
 def extract_and_validate_symbols(form, files):
+    services = get_services()
     manual_input = form.get("manual_symbols", "").strip()
     excel_file = files.get("excel_file")
     column_name = form.get("column_name", "").strip()
@@ -38,15 +135,16 @@ def extract_and_validate_symbols(form, files):
         symbols = [s.strip().upper() for s in manual_input.split(",") if s.strip()]
         truncate = False
     elif excel_file and excel_file.filename != '' and column_name:
-        symbols, msg_excel = excel_handler.load_symbols(excel_file, column_name)
+        symbols, msg_excel = services.excel_handler().load_symbols(excel_file, column_name)
         truncate = True
         if msg_excel:
             messages.append(msg_excel)
     else:
         messages.append("Debe ingresar manualmente los símbolos o subir un archivo Excel válido.")
 
-    # Validación final con SymbolsManager
+    # Validación final con SymbolsManager (uno nuevo por solicitud)
     if symbols:
+        symbols_manager = services.symbols_manager()
         symbols_manager.validate_symbols_from_list(symbols, truncate=truncate)
         messages.extend(symbols_manager.get_messages())
         symbols = symbols_manager.get_valid_symbols()
@@ -56,19 +154,15 @@ def extract_and_validate_symbols(form, files):
 # ------------------------------
 # Ruta de la página inicial
 # ------------------------------
-@app.route("/", methods=["GET"])
+@bp.route("/", methods=["GET"])
 def index():
-    global error_manager, excel_handler, symbols_manager
-    # Reasignar gestores que guardan datos temporales
-    error_manager = ErrorManager()
-    excel_handler = ExcelHandler(error_manager)
-    symbols_manager = SymbolsManager(error_manager)
-    return render_template("index.html")
+    return render_template("index.html", job_threshold=current_app.config["MACD_JOB_THRESHOLD"],
+                           timeframes=TIMEFRAME_LABELS)
 
 # ------------------------------
 # Validar símbolos (para el modal)
 # ------------------------------
-@app.route("/validate_symbols", methods=["POST"])
+@bp.route("/validate_symbols", methods=["POST"])
 def validate_symbols():
     symbols, messages = extract_and_validate_symbols(request.form, request.files)
     return jsonify({
@@ -76,10 +170,23 @@ def validate_symbols():
         "symbols": symbols
     })
 
+# ------------------------------
+# Autocompletado de símbolos (desde el listado local)
+# ------------------------------
+@bp.route("/symbols/suggest", methods=["GET"])
+def suggest_symbols():
+    universe = get_services().symbol_universe()
+    prefix = request.args.get("q", "")
+    limit = min(request.args.get("limit", 10, type=int), 50)
+    matches = universe.prefix(prefix, limit=limit) if universe is not None else []
+    return jsonify({
+        "sugerencias": [{"simbolo": symbol, "nombre": name} for symbol, name in matches]
+    })
+
 # ------------------------------
 # Procesar descarga y cálculo de MACD
 # ------------------------------
-@app.route("/result", methods=["POST"])
+@bp.route("/result", methods=["POST"])
 def result():
     # Leer los símbolos que vienen del modal (form oculto)
     final_symbols_json = request.form.get("final_symbols_json")
@@ -87,76 +194,264 @@ def result():
         return "No se recibieron símbolos para procesar.", 400
 
     final_symbols = json.loads(final_symbols_json)
+    force_refresh = request.form.get("force_refresh") == "1"
+    # Marcos temporales elegidos (diario por defecto)
+    timeframes = request.form.getlist("timeframes")
     messages = []
 
     if not final_symbols:
         messages.append("No hay símbolos válidos para procesar.")
-        return render_template("macd_results.html", results={}, messages=messages)
+        return render_results({}, messages)
 
-    # 1️⃣ Llamada a la API
-    success, msg = yahoo_client.fetch_data(final_symbols)
-    if not success:
+    # Lista guardada ya precalculada para la última sesión: se sirve directo
+    services = get_services()
+    if not force_refresh:
+        results = services.snapshot_store.fresh_results(
+            final_symbols, normalize_timeframes(timeframes), latest_daily_bar()
+        )
+        services.metrics.cache_lookup("precalculo", int(results is not None), int(results is None))
+        if results is not None:
+            return render_results(results, messages)
+
+    # 1️⃣-4️⃣ Descarga, MACD, clasificación y resultados (con caché por sesión)
+    results, msg = analyze_symbols(services, final_symbols, force_refresh=force_refresh, timeframes=timeframes)
+    if msg:
         messages.append(msg)
-        return render_template("macd_results.html", results={}, messages=messages)
+        return render_results({}, messages)
 
-    # 2️⃣ Calcular MACD
-    macd_calculator.calculate_macd(yahoo_client.get_data(), yahoo_client.get_status())
-    macd_data = macd_calculator.get_macd_data()
-    macd_status = macd_calculator.get_symbols_status()
+    # 5️⃣ Renderizar resultados finales
+    return render_results(results, messages)
 
-    # 3️⃣ Clasificar señales
-    classifier.classify_all(macd_data, macd_status)
-    classified_signals = classifier.get_signals()
+# ------------------------------
+# Análisis en segundo plano (listas grandes)
+# ------------------------------
+@bp.route("/jobs", methods=["POST"])
+def submit_job():
+    final_symbols_json = request.form.get("final_symbols_json")
+    if not final_symbols_json:
+        return jsonify({"error": "No se recibieron símbolos para procesar."}), 400
 
-    # 4️⃣ Combinar resultados
-    results_manager.build_results(macd_status, classified_signals)
-    results = results_manager.get_all_results()
+    final_symbols = json.loads(final_symbols_json)
+    if not final_symbols:
+        return jsonify({"error": "No hay símbolos válidos para procesar."}), 400
+    # Mismo límite de símbolos por análisis que la validación de /result
+    services = get_services()
+    limit = current_app.config["MACD_MAX_SYMBOLS"]
+    if len(final_symbols) > limit:
+        message = services.error_manager.get_message(
+            "VALIDATION_EXCESS_MANUAL", limite=limit, exceso=", ".join(final_symbols[limit:]))
+        return jsonify({"error": message}), 400
+    force_refresh = request.form.get("force_refresh") == "1"
+    timeframes = normalize_timeframes(request.form.getlist("timeframes"))
 
-    # 5️⃣ Renderizar resultados finales
-    return render_template("macd_results.html", results=results, messages=messages)
+    def run(job):
+        return analyze_symbols(
+            services, final_symbols, force_refresh=force_refresh, timeframes=timeframes,
+            progress=job.update_stage, partial=job.add_partial
+        )
+
+    job = services.job_manager.submit(final_symbols, run, timeframes=timeframes)
+    return jsonify({
+        "job_id": job.id,
+        "status_url": url_for("macd.job_status", job_id=job.id),
+        "result_url": url_for("macd.job_result", job_id=job.id),
+        "live_url": url_for("macd.job_live", job_id=job.id),
+        "events_url": url_for("macd.job_events", job_id=job.id)
+    }), 202
+
+@bp.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = get_services().job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Trabajo inexistente o vencido."}), 404
+    include_partial = request.args.get("parciales", "1") == "1"
+    return jsonify(job.to_dict(include_partial=include_partial))
+
+@bp.route("/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    job = get_services().job_manager.get(job_id)
+    if job is None:
+        return "Trabajo inexistente o vencido.", 404
+    if job.status in ("en_cola", "en_proceso"):
+        return "El análisis todavía está en curso.", 202
+    return render_results(job.results, job.messages)
+
+@bp.route("/jobs/<job_id>/live", methods=["GET"])
+def job_live(job_id):
+    """ Tabla de resultados vacía que se completa con los eventos del trabajo """
+    job = get_services().job_manager.get(job_id)
+    if job is None:
+        return "Trabajo inexistente o vencido.", 404
+    return render_template("macd_results.html", results={}, messages=[], result_id=None,
+                           signal_columns=timeframe_columns(job.timeframes),
+                           events_url=url_for("macd.job_events", job_id=job.id))
+
+@bp.route("/jobs/<job_id>/events", methods=["GET"])
+def job_events(job_id):
+    """ Cada símbolo clasificado como un evento SSE, apenas termina su lote """
+    services = get_services()
+    job = services.job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Trabajo inexistente o vencido."}), 404
+    # Al reconectar, EventSource envía el id del último evento recibido
+    cursor = request.headers.get("Last-Event-ID", request.args.get("desde", "0"))
+    cursor = int(cursor) if cursor.isdigit() else 0
+
+    def on_finish(job):
+        # Los resultados completos quedan guardados para filtrar y exportar (una vez por trabajo)
+        return {"result_id": job.store_results(services.result_store)}
+
+    stream = job_event_stream(job, cursor, current_app.config["MACD_SSE_HEARTBEAT"], on_finish)
+    return Response(stream, mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# ------------------------------
+# API JSON de señales por lotes
+# ------------------------------
+def compress_response(response, min_size: int):
+    """ Comprime con gzip las respuestas grandes si el cliente lo acepta """
+    response.vary.add("Accept-Encoding")
+    if response.status_code != 200 or not request.accept_encodings["gzip"]:
+        return response
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+    response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers["Content-Encoding"] = "gzip"
+    return response
+
+@bp.route("/api/v1/signals", methods=["GET", "POST"])
+def api_signals():
+    """
+    Estado, señal y (opcional) últimos valores MACD de un lote de símbolos.
+    POST con JSON {"symbols": [...], "fast", "slow", "signal", "interval", "include_values"}
+    o GET con los mismos campos en la URL (symbols separados por comas).
+    """
+    services = get_services()
+    data = request.get_json(silent=True) if request.method == "POST" else request.args.to_dict()
+    params, error = parse_request(data)
+    if error:
+        return jsonify({"error": services.error_manager.get_message("API_PARAMETERS", detalle=error)}), 400
+
+    # La respuesta solo cambia con una nueva sesión: si el cliente ya la tiene, 304 sin calcular
+    session = latest_daily_bar()
+    etag = request_etag(params, session)
+    if request.if_none_match.contains_weak(etag) and not params["force_refresh"]:
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        response.vary.add("Accept-Encoding")
+        return response
+
+    symbols_manager = services.symbols_manager(max_symbols=current_app.config["MACD_API_MAX_SYMBOLS"])
+    symbols_manager.validate_symbols_from_list(params["symbols"], truncate=False)
+    messages = symbols_manager.get_messages()
+    params["symbols"] = symbols_manager.get_valid_symbols()
+    if not params["symbols"]:
+        return jsonify({"error": " ".join(messages), "mensajes": messages}), 400
+
+    results, msg = compute_signals(services, params)
+    if msg:
+        return jsonify({"error": msg}), 502
+
+    response = jsonify({
+        "version": API_VERSION,
+        "sesion": session.isoformat(),
+        "parametros": {key: params[key] for key in ("fast", "slow", "signal", "interval")},
+        "resultados": results,
+        "mensajes": messages
+    })
+    response.set_etag(etag, weak=True)
+    response.cache_control.no_cache = True
+    return compress_response(response, current_app.config["MACD_API_GZIP_MIN_BYTES"])
+
+# ------------------------------
+# Estadísticas de las cachés
+# ------------------------------
+@bp.route("/cache_stats", methods=["GET"])
+def cache_stats():
+    return jsonify(get_services().cache_stats())
+
+# ------------------------------
+# Métricas en formato Prometheus
+# ------------------------------
+@bp.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(get_services().metrics.render(), mimetype="text/plain; version=0.0.4")
+
+# ------------------------------
+# Estado del precálculo de listas guardadas
+# ------------------------------
+@bp.route("/precompute/status", methods=["GET"])
+def precompute_status():
+    services = get_services()
+    pending = set(services.scheduler.pending())
+    return jsonify({
+        "sesion": latest_daily_bar().isoformat(),
+        "listas": {
+            name: {"simbolos": len(watchlist["symbols"]), "marcos": watchlist["timeframes"], "al_dia": name not in pending}
+            for name, watchlist in services.snapshot_store.watchlists().items()
+        },
+        "ejecuciones": services.snapshot_store.history(limit=request.args.get("limit", 20, type=int))
+    })
 
 # ------------------------------
 # Filtrado y exportación
 # ------------------------------
-@app.route("/filter_results", methods=["POST"])
+def stored_results(form):
+    """ Resultados guardados para el result_id del formulario (None si no existe o venció) """
+    result_id = form.get("result_id", "")
+    return result_id, get_services().result_store.get(result_id) if result_id else None
+
+@bp.route("/filter_results", methods=["POST"])
 def filter_results():
-    all_results_json = request.form.get("all_results")
-    all_results = json.loads(all_results_json)
-    selected_filter = request.form.get("signal_filter", "TODO")
+    result_id, stored = stored_results(request.form)
+    if stored is None:
+        return "Resultados inexistentes o vencidos. Vuelva a ejecutar el análisis.", 404
 
-    if selected_filter != "TODO":
-        filtered_results = {
-            symbol: data
-            for symbol, data in all_results.items()
-            if data["señal"] == selected_filter
-        }
-    else:
-        filtered_results = all_results
+    selected_filter = request.form.get("signal_filter", "TODO")
+    estado_filter = request.form.get("estado_filter", "TODO")
+    filtered_results = stored.filter(signal=selected_filter, status=estado_filter)
 
-    return render_template("macd_results.html", results=filtered_results, messages=[])
+    return render_template("macd_results.html", results=filtered_results, messages=[],
+                           result_id=result_id, selected_filter=selected_filter,
+                           signal_columns=signal_columns(stored.results))
 
-@app.route("/export_excel", methods=["POST"])
+@bp.route("/export_excel", methods=["POST"])
 def export_excel():
-    results_json = request.form.get("results_json")
-    if not results_json:
+    _, stored = stored_results(request.form)
+    if stored is None:
+        return "Resultados inexistentes o vencidos. Vuelva a ejecutar el análisis.", 404
+
+    results_dict = stored.filter(
+        signal=request.form.get("signal_filter", "TODO"),
+        status=request.form.get("estado_filter", "TODO")
+    )
+    if not results_dict:
         return "No hay resultados para exportar.", 400
 
-    try:
-        results_dict = json.loads(results_json)
-    except json.JSONDecodeError:
-        return "Error al procesar los resultados.", 400
+    # Formato elegido en la página: xlsx (por defecto), csv o parquet
+    file_format = request.form.get("formato", "xlsx")
+    if file_format not in EXPORT_FORMATS:
+        return f"Formato de exportación no soportado: {file_format}", 400
+    if file_format not in available_export_formats():
+        return f"Formato de exportación no disponible en el servidor: {file_format}", 400
 
-    excel_handler = ExcelHandler(error_manager)
-    success, file_name_or_msg = excel_handler.export_results(results_dict, filename=None)
+    excel_handler = get_services().excel_handler()
+    success, buffer_or_msg = excel_handler.export_results(results_dict, file_format=file_format)
     if not success:
-        return file_name_or_msg, 500
+        return buffer_or_msg, 500
 
-    return send_file(file_name_or_msg, as_attachment=True)
+    # Se envía desde memoria: no queda ningún archivo en el directorio de trabajo
+    return send_file(
+        buffer_or_msg, as_attachment=True,
+        download_name=excel_handler.export_filename(file_format),
+        mimetype=EXPORT_FORMATS[file_format]
+    )
 
 # ------------------------------
 # Ruta para test con datos artificiales
 # ------------------------------
-@app.route("/test_results", methods=["GET"])
+@bp.route("/test_results", methods=["GET"])
 def test_results():
     messages = ["Estos son resultados de prueba para ver la tabla, filtros y exportación."]
     results = {
@@ -167,7 +462,94 @@ def test_results():
         "NFLX": {"estado": "OK", "señal": "NULO"},
         "AMZN": {"estado": "DATOS_INSUFICIENTES", "señal": "NULO"},
     }
-    return render_template("macd_results.html", results=results, messages=messages)
+    return render_results(results, messages)
+
+# ------------------------------
+# Comandos de línea: flask --app main precompute ...
+# ------------------------------
+precompute_cli = AppGroup("precompute", help="Listas guardadas y su precálculo después del cierre.")
+
+@precompute_cli.command("add")
+@click.argument("name")
+@click.argument("symbols", nargs=-1, required=True)
+@click.option("--timeframe", "timeframes", multiple=True, help="Marco temporal (1d, 1wk, 1mo); se puede repetir.")
+def precompute_add(name, symbols, timeframes):
+    """ Registra (o reemplaza) una lista de símbolos """
+    services = get_services()
+    symbols = [s.strip().upper() for s in symbols if s.strip()]
+    # Misma validación que los símbolos de /result (sin límite de cantidad): un símbolo
+    # inválido haría fallar la lista en cada ejecución y quedaría siempre pendiente
+    symbols_manager = services.symbols_manager(max_symbols=max(len(symbols), 1))
+    symbols_manager.validate_symbols_from_list(symbols)
+    report = symbols_manager.get_validation_report()
+    if report["invalidos"] or report["desconocidos"] or not symbols_manager.get_valid_symbols():
+        raise click.ClickException(" ".join(symbols_manager.get_messages()))
+    symbols = symbols_manager.get_valid_symbols()
+    services.snapshot_store.register(name, symbols, list(timeframes))
+    click.echo(f"Lista '{name}' registrada con {len(symbols)} símbolos.")
+
+@precompute_cli.command("remove")
+@click.argument("name")
+def precompute_remove(name):
+    """ Elimina una lista registrada """
+    if not get_services().snapshot_store.unregister(name):
+        raise click.ClickException(f"La lista '{name}' no existe.")
+    click.echo(f"Lista '{name}' eliminada.")
+
+@precompute_cli.command("list")
+def precompute_list():
+    """ Muestra las listas registradas y si están al día """
+    services = get_services()
+    pending = set(services.scheduler.pending())
+    for name, watchlist in services.snapshot_store.watchlists().items():
+        estado = "pendiente" if name in pending else "al día"
+        click.echo(f"{name}: {len(watchlist['symbols'])} símbolos, {'+'.join(watchlist['timeframes'])}, {estado}")
+
+@precompute_cli.command("run")
+@click.option("--force", is_flag=True, help="Recalcula aunque los resultados estén al día.")
+@click.argument("names", nargs=-1)
+def precompute_run(force, names):
+    """ Recalcula ahora las listas pendientes """
+    runs = get_services().scheduler.run_once(force=force, names=list(names) or None)
+    if not runs:
+        click.echo("No hay listas pendientes (o hay otro precálculo en curso).")
+    for run in runs:
+        detalle = run["error"] or ", ".join(f"{stage} {seconds}s" for stage, seconds in run["stages"].items())
+        click.echo(f"{run['watchlist']}: {run['status']} en {run['seconds']}s ({detalle})")
+
+@precompute_cli.command("serve")
+def precompute_serve():
+    """ Queda en primer plano revisando cada MACD_PRECOMPUTE_INTERVAL segundos """
+    click.echo("Precálculo en ejecución (Ctrl+C para terminar).")
+    get_services().scheduler.serve()
+
+@precompute_cli.command("publish")
+@click.argument("symbols", nargs=-1)
+def precompute_publish(symbols):
+    """ Publica ahora las velas en el almacén compartido (por defecto, las de todas las listas) """
+    services = get_services()
+    if services.shared_prices() is None:
+        raise click.ClickException("El almacén compartido está apagado (MACD_SHARED_PRICES=1 para activarlo).")
+    symbols = [s.strip().upper() for s in symbols if s.strip()] or list(dict.fromkeys(
+        symbol for watchlist in services.snapshot_store.watchlists().values() for symbol in watchlist["symbols"]
+    ))
+    if not symbols:
+        raise click.ClickException("No hay símbolos para publicar.")
+    try:
+        version = services.publish_shared_prices(symbols)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Versión {version} publicada con {len(symbols)} símbolos.")
+
+@precompute_cli.command("history")
+@click.option("--limit", default=20, show_default=True)
+def precompute_history(limit):
+    """ Últimas ejecuciones con su duración """
+    for run in get_services().snapshot_store.history(limit=limit):
+        click.echo(f"{run['session']} {run['watchlist']}: {run['status']} en {run['seconds']}s {run['stages']}")
+
+# Instancia usada por gunicorn (main:app) y por el servidor de desarrollo
+app = create_app()
 
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,138 @@
+# -----------------------------
+# Backtest de las señales MACD sobre todo el historial
+# -----------------------------
+import numpy as np
+import pandas as pd
+
+from modules.classificator import crossover_masks
+from modules.indicators import _stack_series
+
+
+def crossover_matrix(macd: np.ndarray, signal: np.ndarray, histogram: np.ndarray) -> np.ndarray:
+    """
+    Señal de cada vela de una matriz fechas x símbolos con las mismas reglas
+    del clasificador (cruce confirmado por el histograma), comparando cada
+    fila con la anterior. Retorna int8: 1 COMPRA, -1 VENTA, 0 sin señal.
+    """
+    events = np.zeros(macd.shape, dtype=np.int8)
+    compra, venta = crossover_masks(macd[:-1], macd[1:], signal[:-1], signal[1:], histogram[1:])
+    events[1:][compra] = 1
+    events[1:][venta] = -1
+    return events
+
+
+class BacktestResult:
+    """
+    trades: una fila por operación (símbolo, entrada, salida, precios,
+    retorno y si quedó abierta al final del historial).
+    summary: una fila por símbolo (operaciones, retorno total, tasa de
+    acierto y máximo drawdown de la curva de capital).
+    """
+
+    def __init__(self, trades: pd.DataFrame, summary: pd.DataFrame):
+        self.trades = trades
+        self.summary = summary
+
+    def get_trades(self, symbol: str) -> pd.DataFrame:
+        return self.trades[self.trades["simbolo"] == symbol]
+
+
+class MACDBacktester:
+    """
+    Estrategia solo compradora: entra al cierre de la vela con COMPRA y sale
+    al cierre de la siguiente VENTA (las COMPRA repetidas mientras hay
+    posición se ignoran). Una posición sin VENTA se valúa a la última vela y
+    se marca como abierta. Todo el historial de todos los símbolos se
+    procesa con operaciones sobre matrices, sin recorrer las velas.
+    """
+
+    def run(self, price_data: dict, macd_data: dict) -> BacktestResult:
+        """
+        price_data: { "AAPL": DataFrame con Close } (las velas usadas en el MACD)
+        macd_data: { "AAPL": DataFrame con MACD, Signal, Histogram } con el
+        historial completo (calculate_macd o calculate_macd_batch; no los
+        resultados recortados de calculate_macd_incremental)
+        """
+        symbols = [s for s in macd_data if s in price_data and len(macd_data[s]) >= 2]
+        if not symbols:
+            return BacktestResult(self._trades_frame([], [], [], [], [], [], []), self._summary_frame([], [], [], [], []))
+
+        indexes = [macd_data[s].index for s in symbols]
+        close = _stack_series([price_data[s]["Close"].reindex(macd_data[s].index).to_numpy(dtype=np.float64) for s in symbols])
+        macd = _stack_series([macd_data[s]["MACD"].to_numpy(dtype=np.float64) for s in symbols])
+        signal = _stack_series([macd_data[s]["Signal"].to_numpy(dtype=np.float64) for s in symbols])
+        histogram = _stack_series([macd_data[s]["Histogram"].to_numpy(dtype=np.float64) for s in symbols])
+        n_rows, n_cols = close.shape
+        rows = np.arange(n_rows)
+
+        # 1️⃣ Cruces de todo el historial
+        events = crossover_matrix(macd, signal, histogram)
+
+        # 2️⃣ Posición tras cada vela: la del último evento (COMPRA = dentro)
+        last_event = np.maximum.accumulate(np.where(events != 0, rows[:, None], 0), axis=0)
+        in_position = events[last_event, np.arange(n_cols)] == 1
+        previous = np.vstack([np.zeros((1, n_cols), dtype=bool), in_position[:-1]])
+        entries = in_position & ~previous
+        exits = ~in_position & previous
+
+        # 3️⃣ Operaciones: la k-ésima entrada de cada símbolo cierra con su k-ésima salida
+        entry_col, entry_row = np.nonzero(entries.T)
+        exit_col, exit_row = np.nonzero(exits.T)
+        # Posiciones abiertas: salida ficticia en la última vela
+        open_cols = np.nonzero(in_position[-1])[0]
+        exit_col = np.concatenate([exit_col, open_cols])
+        exit_row = np.concatenate([exit_row, np.full(len(open_cols), n_rows - 1)])
+        order = np.lexsort((exit_row, exit_col))
+        exit_col, exit_row = exit_col[order], exit_row[order]
+        is_open = (exit_row == n_rows - 1) & in_position[-1][exit_col]
+
+        entry_price = close[entry_row, entry_col]
+        exit_price = close[exit_row, exit_col]
+        trade_returns = exit_price / entry_price - 1.0
+
+        # Fechas de cada operación según el índice propio del símbolo
+        offsets = n_rows - np.array([len(index) for index in indexes])
+        entry_dates = [indexes[c][r - offsets[c]] for c, r in zip(entry_col, entry_row)]
+        exit_dates = [indexes[c][r - offsets[c]] for c, r in zip(exit_col, exit_row)]
+        trades = self._trades_frame(
+            [symbols[c] for c in entry_col], entry_dates, exit_dates,
+            entry_price, exit_price, trade_returns, is_open
+        )
+
+        # 4️⃣ Resumen por símbolo
+        n_trades = np.bincount(entry_col, minlength=n_cols)
+        wins = np.bincount(entry_col, weights=(trade_returns > 0).astype(np.float64), minlength=n_cols)
+        log_growth = np.bincount(entry_col, weights=np.log1p(np.nan_to_num(trade_returns)), minlength=n_cols)
+        total_return = np.expm1(log_growth)
+        hit_rate = np.divide(wins, n_trades, out=np.full(n_cols, np.nan), where=n_trades > 0)
+
+        # Curva de capital vela a vela (solo rinde mientras hay posición)
+        daily = np.zeros((n_rows, n_cols))
+        daily[1:] = np.where(previous[1:], np.nan_to_num(close[1:] / close[:-1] - 1.0), 0.0)
+        equity = np.cumprod(1.0 + daily, axis=0)
+        max_drawdown = (equity / np.maximum.accumulate(equity, axis=0) - 1.0).min(axis=0)
+
+        summary = self._summary_frame(symbols, n_trades, total_return, hit_rate, max_drawdown)
+        return BacktestResult(trades, summary)
+
+    @staticmethod
+    def _trades_frame(symbols, entry_dates, exit_dates, entry_price, exit_price, returns, is_open) -> pd.DataFrame:
+        return pd.DataFrame({
+            "simbolo": symbols,
+            "entrada": entry_dates,
+            "salida": exit_dates,
+            "precio_entrada": entry_price,
+            "precio_salida": exit_price,
+            "retorno": returns,
+            "abierta": is_open,
+        })
+
+    @staticmethod
+    def _summary_frame(symbols, n_trades, total_return, hit_rate, max_drawdown) -> pd.DataFrame:
+        summary = pd.DataFrame({
+            "operaciones": np.asarray(n_trades, dtype=np.int64),
+            "retorno_total": total_return,
+            "tasa_acierto": hit_rate,
+            "max_drawdown": max_drawdown,
+        }, index=pd.Index(symbols, name="simbolo"))
+        return summary
@@ -0,0 +1,218 @@
+# -----------------------------
+# Benchmark del pipeline sobre datos sintéticos (sin red)
+# -----------------------------
+# Uso:
+#   python -m modules.benchmark --output bench.json
+#   python -m modules.benchmark --symbols 10 100 --bars 60 250 --baseline bench.json
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from modules.classificator import MACDSignalClassifier
+from modules.error_manager import ErrorManager
+from modules.excel_handler import ExcelHandler
+from modules.indicators import MACDCalculator
+from modules.providers import SyntheticProvider
+from modules.show_results import AnalysisResultsManager
+from modules.symbols_manager import SymbolsManager
+
+# Etapas medidas, en el orden en que se encadenan
+BENCHMARK_STAGES = ["validacion", "macd", "clasificacion", "resultados", "exportacion"]
+DEFAULT_SYMBOLS = [10, 100, 1000, 10000]
+DEFAULT_BARS = [60, 250, 1000, 5000]
+# Las combinaciones con más de max_cells velas (símbolos x velas) se omiten
+DEFAULT_MAX_CELLS = 20_000_000
+END_DATE = "2025-06-02"
+
+
+def synthetic_symbols(n: int) -> list[str]:
+    """ n símbolos de solo letras (pasan la validación): AAAA, AAAB, ... """
+    symbols = []
+    for i in range(n):
+        name = ""
+        for _ in range(4):
+            i, rest = divmod(i, 26)
+            name = chr(65 + rest) + name
+        symbols.append(name)
+    return symbols
+
+
+def synthetic_prices(symbols: list[str], bars: int) -> dict:
+    """ Velas diarias deterministas: exactamente bars velas por símbolo hasta END_DATE """
+    dates = pd.bdate_range(end=END_DATE, periods=bars)
+    end = (dates[-1] + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+    return SyntheticProvider().download(symbols, dates[0].strftime("%Y-%m-%d"), end, "1d")
+
+
+def run_stages(symbols: list[str], price_data: dict, export_format: str = "xlsx") -> dict:
+    """ Ejecuta las etapas encadenadas y retorna {etapa: función sin argumentos} ya preparadas """
+    error_manager = ErrorManager()
+    state = {}
+
+    def validacion():
+        manager = SymbolsManager(error_manager, max_symbols=len(symbols))
+        manager.validate_symbols_from_list(symbols)
+        state["status"] = {symbol: "OK" for symbol in manager.get_valid_symbols()}
+
+    def macd():
+        state["macd"], state["status"] = MACDCalculator().calculate_macd_batch(price_data, state["status"])
+
+    def clasificacion():
+        state["signals"] = MACDSignalClassifier().classify_all(state["macd"], state["status"])
+
+    def resultados():
+        state["results"] = AnalysisResultsManager().build_results(state["status"], state["signals"])
+
+    def exportacion():
+        ok, buffer = ExcelHandler(error_manager).export_results(state["results"], file_format=export_format)
+        if not ok:
+            raise RuntimeError(buffer)
+
+    return {
+        "validacion": validacion,
+        "macd": macd,
+        "clasificacion": clasificacion,
+        "resultados": resultados,
+        "exportacion": exportacion,
+    }
+
+
+def benchmark_case(n_symbols: int, bars: int, repeat: int = 1, memory: bool = True,
+                   export_format: str = "xlsx") -> list[dict]:
+    """
+    Mide cada etapa para un universo de n_symbols con bars velas.
+    El tiempo es el mínimo de repeat ejecuciones; la memoria pico
+    (tracemalloc) se mide en una pasada aparte para no inflar los tiempos.
+    """
+    symbols = synthetic_symbols(n_symbols)
+    price_data = synthetic_prices(symbols, bars)
+
+    times = {stage: float("inf") for stage in BENCHMARK_STAGES}
+    for _ in range(repeat):
+        stages = run_stages(symbols, price_data, export_format)
+        for stage in BENCHMARK_STAGES:
+            start = time.perf_counter()
+            stages[stage]()
+            times[stage] = min(times[stage], time.perf_counter() - start)
+
+    peaks = {}
+    if memory:
+        stages = run_stages(symbols, price_data, export_format)
+        for stage in BENCHMARK_STAGES:
+            tracemalloc.start()
+            stages[stage]()
+            peaks[stage] = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+
+    return [
+        {
+            "symbols": n_symbols,
+            "bars": bars,
+            "stage": stage,
+            "seconds": round(times[stage], 6),
+            "peak_mb": round(peaks[stage], 3) if stage in peaks else None,
+        }
+        for stage in BENCHMARK_STAGES
+    ]
+
+
+def run_benchmark(symbol_sizes=None, bar_lengths=None, repeat: int = 1, memory: bool = True,
+                  max_cells: int = DEFAULT_MAX_CELLS, export_format: str = "xlsx", log=None) -> dict:
+    """
+    Recorre la grilla símbolos x velas y retorna el reporte:
+    {"meta": {...}, "results": [...], "skipped": [[símbolos, velas], ...]}
+    """
+    symbol_sizes = symbol_sizes or DEFAULT_SYMBOLS
+    bar_lengths = bar_lengths or DEFAULT_BARS
+    results, skipped = [], []
+    for n_symbols in symbol_sizes:
+        for bars in bar_lengths:
+            if n_symbols * bars > max_cells:
+                skipped.append([n_symbols, bars])
+                continue
+            case = benchmark_case(n_symbols, bars, repeat=repeat, memory=memory, export_format=export_format)
+            results.extend(case)
+            if log:
+                total = sum(row["seconds"] for row in case)
+                log(f"{n_symbols:>6} símbolos x {bars:>5} velas: {total:.3f} s")
+
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "export_format": export_format,
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def compare_with_baseline(report: dict, baseline: dict, tolerance: float = 0.25,
+                          min_seconds: float = 0.05) -> list[dict]:
+    """
+    Casos (símbolos, velas, etapa) más lentos que la línea base en más de
+    tolerance (proporción). Las diferencias menores a min_seconds se ignoran
+    por ser ruido de medición.
+    """
+    reference = {(row["symbols"], row["bars"], row["stage"]): row for row in baseline["results"]}
+    regressions = []
+    for row in report["results"]:
+        base = reference.get((row["symbols"], row["bars"], row["stage"]))
+        if base is None:
+            continue
+        ratio = row["seconds"] / base["seconds"] if base["seconds"] > 0 else float("inf")
+        if ratio > 1 + tolerance and row["seconds"] - base["seconds"] > min_seconds:
+            regressions.append({**row, "baseline_seconds": base["seconds"], "ratio": round(ratio, 3)})
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark por etapas del pipeline MACD con datos sintéticos.")
+    parser.add_argument("--symbols", type=int, nargs="+", default=DEFAULT_SYMBOLS)
+    parser.add_argument("--bars", type=int, nargs="+", default=DEFAULT_BARS)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--max-cells", type=int, default=DEFAULT_MAX_CELLS)
+    parser.add_argument("--format", default="xlsx", choices=["xlsx", "csv", "parquet"])
+    parser.add_argument("--no-memory", action="store_true", help="No medir memoria pico")
+    parser.add_argument("--output", help="Archivo JSON donde guardar el reporte")
+    parser.add_argument("--baseline", help="Reporte JSON previo contra el cual comparar")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        args.symbols, args.bars, repeat=args.repeat, memory=not args.no_memory,
+        max_cells=args.max_cells, export_format=args.format, log=print
+    )
+    for n_symbols, bars in report["skipped"]:
+        print(f"{n_symbols:>6} símbolos x {bars:>5} velas: omitido (supera --max-cells)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Reporte guardado en {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(report, baseline, tolerance=args.tolerance)
+        for row in regressions:
+            print(f"REGRESIÓN {row['symbols']} x {row['bars']} {row['stage']}: "
+                  f"{row['baseline_seconds']:.3f}s → {row['seconds']:.3f}s (x{row['ratio']})")
+        if regressions:
+            return 1
+        print("Sin regresiones respecto de la línea base.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,20 @@
+import numpy as np
+
+# Columnas que el clasificador lee de cada DataFrame MACD
+MACD_COLUMNS = ["MACD", "Signal", "Histogram"]
+
+
+def crossover_masks(macd_prev, macd_t, signal_prev, signal_t, hist_t):
+    """
+    Reglas de cruce MACD/Signal confirmadas por el histograma, aplicadas
+    elemento a elemento sobre arrays.
+    Retorna (máscara COMPRA, máscara VENTA).
+    """
+    compra = (macd_t > signal_t) & (macd_prev <= signal_prev) & (hist_t > 0)
+    venta = (macd_t < signal_t) & (macd_prev >= signal_prev) & (hist_t < 0)
+    return compra, venta
+
+
 class MACDSignalClassifier:
     def __init__(self):
         # Almacena la señal clasificada por símbolo
@@ -43,18 +60,61 @@ class MACDSignalClassifier:
         else:
             self.signals[symbol] = "NULO"
 
+    def classify_arrays(self, symbols: list[str], last_rows: np.ndarray, statuses: list[str] | None = None):
+        """
+        Clasifica todo el universo de una sola vez con máscaras.
+        symbols: lista de N símbolos
+        last_rows: array (N, 2, 3) con las filas t-1 y t de MACD, Signal, Histogram
+        statuses: estado de cada símbolo (si no es 'OK' la señal es NULO)
+        """
+        last_rows = np.asarray(last_rows, dtype=np.float64)
+        prev_rows = last_rows[:, 0, :]
+        curr_rows = last_rows[:, 1, :]
 
+        compra, venta = crossover_masks(
+            prev_rows[:, 0], curr_rows[:, 0],
+            prev_rows[:, 1], curr_rows[:, 1],
+            curr_rows[:, 2]
+        )
+
+        labels = np.full(len(symbols), "NULO", dtype=object)
+        labels[compra] = "COMPRA"
+        labels[venta] = "VENTA"
+        if statuses is not None:
+            labels[np.asarray(statuses, dtype=object) != "OK"] = "NULO"
+
+        self.signals.update(zip(symbols, labels.tolist()))
 
     def classify_all(self, macd_data: dict, symbols_status: dict):
         """
         Recorre todos los símbolos y aplica la clasificación.
         macd_data: { "AAPL": DataFrame con columnas MACD, Signal, Histogram }
         symbols_status: { "AAPL": "OK", "GOOG": "DATOS_INSUFICIENTES", ... }
+        Solo extrae las dos últimas filas de cada DataFrame; las reglas se
+        aplican a todos los símbolos a la vez en classify_arrays.
+        Retorna las señales clasificadas.
         """
         self.signals = {}
+        symbols = []
+        last_rows = []
         for symbol, df in macd_data.items():
-            status = symbols_status.get(symbol, "NULO")
-            self.classify_signal_for_symbol(symbol, df, status)
+            # Los casos no clasificables quedan en NULO (y reservan el orden)
+            self.signals[symbol] = "NULO"
+            if symbols_status.get(symbol, "NULO") != "OK":
+                continue
+            if len(df) < 2 or not set(MACD_COLUMNS).issubset(df.columns):
+                continue
+
+            # Se recortan las filas antes de convertir: no se copia todo el historial
+            tail = df.iloc[-2:]
+            if list(tail.columns) != MACD_COLUMNS:
+                tail = tail[MACD_COLUMNS]
+            symbols.append(symbol)
+            last_rows.append(tail.to_numpy())
+
+        if symbols:
+            self.classify_arrays(symbols, np.stack(last_rows))
+        return self.signals
 
     def get_signals(self):
         """Devuelve las señales clasificadas."""
@@ -0,0 +1,80 @@
+# -----------------------------
+# Planificador de descargas por lotes
+# -----------------------------
+import itertools
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class DownloadScheduler:
+    """
+    Divide listas grandes de símbolos en lotes y los descarga con
+    concurrencia acotada. Cada lote se reintenta por separado; si agota los
+    reintentos, solo sus símbolos quedan marcados como fallidos.
+    """
+
+    def __init__(self, chunk_size: int = 100, max_workers: int = 4, retries: int = 2, backoff: float = 1.0):
+        self.chunk_size = max(1, chunk_size)
+        self.max_workers = max(1, max_workers)
+        self.retries = retries
+        self.backoff = backoff
+
+    def split(self, symbols: list[str]) -> list[list[str]]:
+        """ Divide la lista en lotes de chunk_size símbolos """
+        return [symbols[i:i + self.chunk_size] for i in range(0, len(symbols), self.chunk_size)]
+
+    def _run_chunk(self, fetch_chunk, chunk: list[str]) -> tuple[dict, Exception | None]:
+        """ Descarga un lote con reintentos y espera exponencial """
+        error = None
+        for attempt in range(self.retries + 1):
+            try:
+                return fetch_chunk(chunk), None
+            except Exception as e:
+                error = e
+                if attempt < self.retries:
+                    time.sleep(self.backoff * (2 ** attempt))
+        return {}, error
+
+    def iter_download(self, symbols: list[str], fetch_chunk):
+        """
+        Descarga los lotes y los entrega a medida que terminan.
+        fetch_chunk(lote) -> { "AAPL": DataFrame } hace la descarga real.
+        Genera (lote, velas del lote, error o None).
+        A lo sumo 2 * max_workers lotes están en curso o esperando a ser
+        consumidos: si quien consume se demora, las descargas se frenan.
+        """
+        chunks = self.split(symbols)
+        # Un solo lote: se descarga en este hilo (con más lotes, incluso con
+        # un solo worker, el siguiente se descarga mientras se consume el actual)
+        if len(chunks) == 1:
+            for chunk in chunks:
+                yield (chunk, *self._run_chunk(fetch_chunk, chunk))
+            return
+
+        window = 2 * self.max_workers
+        pending = iter(chunks)
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as pool:
+            futures = {}
+            for chunk in itertools.islice(pending, window):
+                futures[pool.submit(self._run_chunk, fetch_chunk, chunk)] = chunk
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = futures.pop(future)
+                    yield (chunk, *future.result())
+                    next_chunk = next(pending, None)
+                    if next_chunk is not None:
+                        futures[pool.submit(self._run_chunk, fetch_chunk, next_chunk)] = next_chunk
+
+    def download(self, symbols: list[str], fetch_chunk) -> tuple[dict, dict]:
+        """
+        Descarga todos los lotes y une los resultados.
+        Retorna ({ "AAPL": DataFrame }, { símbolo de un lote fallido: excepción }).
+        """
+        frames, failed = {}, {}
+        for chunk, chunk_frames, error in self.iter_download(symbols, fetch_chunk):
+            if error is not None:
+                failed.update({symbol: error for symbol in chunk})
+            else:
+                frames.update(chunk_frames)
+        return frames, failed
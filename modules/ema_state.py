@@ -0,0 +1,50 @@
+# -----------------------------
+# Estado incremental de las EMAs compartido entre calculadoras
+# -----------------------------
+# Sin pandas: AppServices lo crea al arrancar.
+import threading
+from collections import OrderedDict
+
+
+class EMAStateCache:
+    """
+    Estado incremental de las EMAs compartido por las calculadoras del
+    proceso, con expulsión LRU: la clave incluye los parámetros que elige
+    el usuario, así que sin límite crecería con cada combinación pedida.
+    Un símbolo expulsado simplemente se recalcula completo.
+    """
+
+    def __init__(self, max_entries: int = 20000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            self._entries.move_to_end(key)
+            return entry
+
+    def __setitem__(self, key, entry: dict):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._entries.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def items(self) -> list:
+        with self._lock:
+            return list(self._entries.items())
+
+    def __len__(self) -> int:
+        return len(self._entries)
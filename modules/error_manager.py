@@ -5,19 +5,22 @@ class ErrorManager:
             "EXCEL_LOAD": "Error al cargar el archivo Excel. Verifique la ruta o formato.",
             "EXCEL_COLUMN": "La columna '{column}' no existe en el archivo Excel.",
             "EXCEL_COLUMN_NULL": "La columna '{column}' del archivo seleccionado no contiene datos.",
-            "EXCEL_TRUNCATE": "El archivo Excel contenía más de 20 símbolos. Se truncaron los primeros 20.",
-            "VALIDATION_EXCESS_MANUAL": "Se superó el límite de 20 símbolos válidos. Por favor, elimine los símbolos en exceso para continuar: {exceso}.",
+            "EXCEL_TRUNCATE": "El archivo Excel contenía más de {limite} símbolos. Se truncaron los primeros {limite}.",
+            "VALIDATION_EXCESS_MANUAL": "Se superó el límite de {limite} símbolos válidos. Por favor, elimine los símbolos en exceso para continuar: {exceso}.",
             "VALIDATION_DUPLICATES": "Se eliminaron símbolos duplicados de la lista: {duplicates}.",
             "VALIDATION_SYMBOLS": "Algunos símbolos contienen caracteres inválidos: {invalidos}. Solo se permiten letras (A-Z).",
-            "VALIDATION_TOO_MANY": "La lista contiene más de 20 símbolos. Se truncará a los primeros 20.",
+            "VALIDATION_UNKNOWN": "Los siguientes símbolos no figuran en el listado de mercado y se descartaron: {desconocidos}.",
+            "VALIDATION_TOO_MANY": "La lista contiene más de {limite} símbolos. Se truncará a los primeros {limite}.",
             "VALIDATION_EMPTY": "No hay símbolos válidos después de las validaciones.",
             "UNKNOWN": "Ocurrió un error desconocido. Contacte al soporte técnico.",
             "EXPORT_EMPTY": "No hay resultados para exportar.",
             "EXPORT_PERMISSION": "No se puede escribir el archivo '{filename}'. Verifique que no esté abierto o que tenga permisos.",
             "EXPORT_UNKNOWN": "Ocurrió un error al exportar el archivo Excel: {error}",
+            "EXPORT_FORMAT": "El formato de exportación '{formato}' no está disponible.",
             "NO_INTERNET": "No se detectó conexión a Internet. Verifique su conexión y vuelva a intentarlo.",
             "API_LIMIT": "Se alcanzó el límite de consultas a la API.",
-            "API_ERROR": "Error general de la API: {0}"
+            "API_ERROR": "Error general de la API: {error}",
+            "API_PARAMETERS": "Parámetros inválidos: {detalle}"
         }
 
 
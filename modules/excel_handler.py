@@ -1,20 +1,53 @@
 # -----------------------------
 # Módulo de Excel
 # -----------------------------
+import csv
+import io
+import os
 import pandas as pd
+from openpyxl import Workbook, load_workbook
 from modules.error_manager import ErrorManager
+from modules.export_formats import EXPORT_FORMATS
 from datetime import datetime
 
 class ExcelHandler:
-    def __init__(self, error_manager: ErrorManager):
+    def __init__(self, error_manager: ErrorManager, max_symbols: int = 20):
         self.error_manager = error_manager
+        # Cantidad máxima de símbolos a leer del archivo
+        self.max_symbols = max_symbols
 
-    def load_symbols(self, excel_file, column_name: str, truncate: bool = True) -> tuple[list[str], str | None]:
+    def load_symbols(self, excel_file, column_name: str, truncate: bool = True,
+                     file_format: str | None = None) -> tuple[list[str], str | None]:
+        """
+        Lee los símbolos de una columna del archivo subido (xlsx, csv o tsv).
+        Recorre las filas en streaming: busca la columna en la fila de
+        encabezados, lee solo esa columna y se detiene al pasar el límite.
+        file_format: "xlsx", "csv" o "tsv"; si no se indica, se deduce de la
+        extensión del archivo (xlsx por defecto).
+        """
         message = None
+        file_format = file_format or self._detect_format(excel_file)
         try:
-            #df = pd.read_excel(excel_file)
-            df = pd.read_excel(excel_file, engine="openpyxl")
+            if file_format in ("csv", "tsv"):
+                values = self._iter_csv_column(excel_file, column_name, file_format)
+            else:
+                values = self._iter_xlsx_column(excel_file, column_name)
 
+            # Con truncado alcanza con leer un valor más que el límite
+            limit = self.max_symbols + 1 if truncate else None
+            symbols = []
+            for value in values:
+                if value is None:
+                    continue
+                # Limpiamos espacios y convertimos a mayúsculas
+                symbols.append(str(value).strip().upper())
+                if limit is not None and len(symbols) >= limit:
+                    break
+            values.close()
+
+        except KeyError:
+            message = self.error_manager.get_message("EXCEL_COLUMN", column=column_name)
+            return [], message
         except FileNotFoundError:
             message = self.error_manager.get_message("EXCEL_LOAD")
             return [], message
@@ -22,17 +55,10 @@ class ExcelHandler:
             message = self.error_manager.get_message("EXCEL_LOAD")
             return [], message
 
-        if column_name not in df.columns:
-            message = self.error_manager.get_message("EXCEL_COLUMN", column=column_name)
-            return [], message
-
-        # Limpiamos valores vacíos, espacios y convertimos a mayúsculas
-        symbols = [str(s).strip().upper() for s in df[column_name].dropna()]
-
-        # Truncado si hay más de 20 símbolos
-        if truncate and len(symbols) > 20:
-            symbols = symbols[:20]
-            message = self.error_manager.get_message("EXCEL_TRUNCATE")
+        # Truncado si hay más símbolos que el límite configurado
+        if truncate and len(symbols) > self.max_symbols:
+            symbols = symbols[:self.max_symbols]
+            message = self.error_manager.get_message("EXCEL_TRUNCATE", limite=self.max_symbols)
 
         if not symbols:
             message = self.error_manager.get_message("EXCEL_COLUMN_NULL", column=column_name)
@@ -40,35 +66,131 @@ class ExcelHandler:
 
         return symbols, message
 
-    def export_results(self, results: dict, filename: str | None = None) -> tuple[bool, str | None]:
+    @staticmethod
+    def _detect_format(excel_file) -> str:
+        # FileStorage de Flask trae filename; los archivos abiertos, name
+        name = getattr(excel_file, "filename", None) or getattr(excel_file, "name", None) or ""
+        extension = os.path.splitext(str(name))[1].lower().lstrip(".")
+        if extension in ("csv", "tsv"):
+            return extension
+        if extension == "txt":
+            return "tsv"
+        return "xlsx"
+
+    @staticmethod
+    def _iter_xlsx_column(excel_file, column_name: str):
+        """
+        Valores de la columna column_name de la primera hoja, leídos en modo
+        read-only (sin cargar la hoja completa). KeyError si no existe.
         """
-        Exporta los resultados a un archivo Excel usando ErrorManager para los mensajes.
+        # Nota: si el libro no trae <dimension> (p. ej. los generados en modo
+        # write-only), openpyxl recorre la hoja una vez al abrirla
+        workbook = load_workbook(excel_file, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, ())
+            position = next((i for i, cell in enumerate(header) if cell is not None and str(cell) == column_name), None)
+            if position is None:
+                raise KeyError(column_name)
+
+            # Solo la columna pedida, fila por fila
+            column = position + 1
+            for (value,) in sheet.iter_rows(min_row=2, min_col=column, max_col=column, values_only=True):
+                yield value
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _iter_csv_column(csv_file, column_name: str, file_format: str):
+        """
+        Valores de la columna column_name de un CSV/TSV, línea por línea.
+        En CSV el separador (coma, punto y coma o tabulación) se deduce del
+        encabezado. KeyError si la columna no existe.
+        """
+        stream = getattr(csv_file, "stream", csv_file)
+        text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="") if isinstance(stream.read(0), bytes) else stream
+        try:
+            header_line = text.readline()
+            if file_format == "tsv":
+                delimiter = "\t"
+            else:
+                delimiter = max(",;\t", key=header_line.count)
+            header = next(csv.reader([header_line], delimiter=delimiter), [])
+            if column_name not in header:
+                raise KeyError(column_name)
+            position = header.index(column_name)
+
+            for row in csv.reader(text, delimiter=delimiter):
+                # Celdas vacías o filas más cortas equivalen a valores faltantes
+                value = row[position] if position < len(row) else ""
+                yield value if value != "" else None
+        finally:
+            if text is not stream:
+                text.detach()
+
+    def export_results(self, results: dict, file_format: str = "xlsx") -> tuple[bool, io.BytesIO | str]:
+        """
+        Exporta los resultados a un buffer en memoria (no escribe archivos en disco).
         results: { "AAPL": {"estado": "OK", "señal": "COMPRA"}, ... }
-        filename: nombre del archivo de salida
-        Retorna: (True, None) si tuvo éxito, (False, mensaje de error) si falló.
+        file_format: "xlsx" (modo write-only de openpyxl), "csv" o "parquet"
+        Retorna: (True, buffer posicionado al inicio) si tuvo éxito,
+        (False, mensaje de error) si falló.
         """
         if not results:
             message = self.error_manager.get_message("EXPORT_EMPTY")
             return False, message
+        if file_format not in EXPORT_FORMATS:
+            message = self.error_manager.get_message("EXPORT_FORMAT", formato=file_format)
+            return False, message
 
+        # Columnas en el orden de la primera fila, con el símbolo primero
+        columns = list(next(iter(results.values())))
+        buffer = io.BytesIO()
         try:
-            # Convertir el diccionario en DataFrame
-            df = pd.DataFrame.from_dict(results, orient="index")
-            df.index.name = "Símbolo"
+            if file_format == "xlsx":
+                self._write_xlsx(buffer, results, columns)
+            elif file_format == "csv":
+                self._write_csv(buffer, results, columns)
+            else:
+                df = pd.DataFrame.from_dict(results, orient="index", columns=columns)
+                df.index.name = "Símbolo"
+                df.to_parquet(buffer)
 
-            # Generar nombre de archivo dinámico si no se pasó
-            if not filename:
-                fecha_str = datetime.now().strftime("%Y%m%d")
-                filename = f"resultados_macd_{fecha_str}.xlsx"
-
-            # Guardar en Excel
-            df.to_excel(filename)
-            return True, filename
-
-        except PermissionError:
-            message = self.error_manager.get_message("EXPORT_PERMISSION", filename=filename)
+        except ImportError:
+            # Parquet requiere pyarrow o fastparquet
+            message = self.error_manager.get_message("EXPORT_FORMAT", formato=file_format)
             return False, message
 
         except Exception as e:
             message = self.error_manager.get_message("EXPORT_UNKNOWN", error=str(e))
             return False, message
+
+        buffer.seek(0)
+        return True, buffer
+
+    @staticmethod
+    def _write_xlsx(buffer, results: dict, columns: list[str]):
+        # El modo write-only escribe las filas a medida que llegan, sin armar
+        # las celdas de toda la hoja en memoria
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Resultados")
+        sheet.append(["Símbolo", *columns])
+        for symbol, data in results.items():
+            sheet.append([symbol, *(data.get(col) for col in columns)])
+        workbook.save(buffer)
+
+    @staticmethod
+    def _write_csv(buffer, results: dict, columns: list[str]):
+        # utf-8-sig para que Excel reconozca los acentos al abrir el CSV
+        text = io.TextIOWrapper(buffer, encoding="utf-8-sig", newline="", write_through=True)
+        writer = csv.writer(text)
+        writer.writerow(["Símbolo", *columns])
+        writer.writerows([symbol, *(data.get(col) for col in columns)] for symbol, data in results.items())
+        text.detach()
+
+    @staticmethod
+    def export_filename(file_format: str = "xlsx") -> str:
+        """ Nombre sugerido para la descarga: resultados_macd_YYYYMMDD.<formato> """
+        fecha_str = datetime.now().strftime("%Y%m%d")
+        return f"resultados_macd_{fecha_str}.{file_format}"
@@ -0,0 +1,35 @@
+# -----------------------------
+# Formatos de exportación de resultados
+# -----------------------------
+# Módulo liviano (sin pandas ni openpyxl) para que las rutas puedan
+# validar el formato sin cargar el ExcelHandler.
+
+# {formato: tipo MIME}
+EXPORT_FORMATS = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Nombre de cada formato en la página de resultados
+EXPORT_LABELS = {"xlsx": "Excel (.xlsx)", "csv": "CSV", "parquet": "Parquet"}
+
+# Formatos que necesitan una biblioteca opcional: {formato: módulos alternativos}
+OPTIONAL_ENGINES = {
+    "parquet": ("pyarrow", "fastparquet"),
+}
+
+
+def available_export_formats() -> dict:
+    """
+    Formatos que se pueden exportar en este entorno (mismo orden que
+    EXPORT_FORMATS): Parquet solo si pyarrow o fastparquet están instalados.
+    Se busca el módulo sin importarlo.
+    """
+    from importlib.util import find_spec
+
+    return {
+        file_format: mimetype for file_format, mimetype in EXPORT_FORMATS.items()
+        if file_format not in OPTIONAL_ENGINES
+        or any(find_spec(module) is not None for module in OPTIONAL_ENGINES[file_format])
+    }
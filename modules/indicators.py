@@ -1,19 +1,114 @@
+import numpy as np
 import pandas as pd
 
+from modules.price_matrix import PriceMatrix
+
+
+def _ema_matrix(values: np.ndarray, span: int, initial: np.ndarray | None = None,
+                last_rows: int | None = None) -> np.ndarray:
+    """
+    EMA (adjust=False) de todas las columnas de una matriz fechas x símbolos
+    en una sola pasada vectorizada. Reproduce la recurrencia de
+    pandas.Series.ewm(span=span, adjust=False).mean(), incluyendo los NaN
+    iniciales (relleno) y los huecos intermedios.
+    initial: último valor de la EMA por columna para continuar una serie ya
+    calculada (NaN en las columnas que empiezan desde cero).
+    last_rows: si se indica, solo se devuelven las últimas filas (ahorra
+    memoria cuando únicamente interesa el final de la serie).
+    """
+    alpha = 1.0 / (1.0 + (span - 1) / 2.0)
+    old_wt_factor = 1.0 - alpha
+
+    n_rows, n_cols = values.shape
+    first_kept = 0 if last_rows is None else max(n_rows - last_rows, 0)
+    output = np.empty((n_rows - first_kept, n_cols), dtype=np.float64)
+    if initial is None:
+        weighted = np.full(n_cols, np.nan)
+    else:
+        weighted = np.array(initial, dtype=np.float64)
+    old_wt = np.ones(n_cols)
+
+    for i in range(n_rows):
+        cur = values[i]
+        is_observation = ~np.isnan(cur)
+        started = ~np.isnan(weighted)
+
+        # Columnas ya iniciadas: decae el peso acumulado (también en huecos)
+        old_wt[started] *= old_wt_factor
+        update = started & is_observation & (weighted != cur)
+        weighted[update] = (old_wt[update] * weighted[update] + alpha * cur[update]) / (old_wt[update] + alpha)
+        old_wt[started & is_observation] = 1.0
+
+        # Columnas cuya primera observación llega en esta fila
+        first = ~started & is_observation
+        weighted[first] = cur[first]
+
+        if i >= first_kept:
+            output[i - first_kept] = weighted
+
+    return output
+
+
+def _stack_series(series_list: list, align_end: bool = True) -> np.ndarray:
+    """
+    Apila series de distinta longitud en una matriz fechas x símbolos
+    rellenando con NaN. Con align_end=True todas terminan en la última fila
+    (relleno inicial, no altera la EMA); con align_end=False todas empiezan
+    en la primera fila (necesario al continuar una EMA ya iniciada).
+    """
+    n_rows = max(len(values) for values in series_list)
+    matrix = np.full((n_rows, len(series_list)), np.nan)
+    for col, values in enumerate(series_list):
+        if align_end:
+            matrix[n_rows - len(values):, col] = values
+        else:
+            matrix[:len(values), col] = values
+    return matrix
+
+
 class MACDCalculator:
-    def __init__(self):
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9, ema_state: dict | None = None,
+                 interval: str = "1d"):
+        #Valores para el MACD
+        self.fast = fast
+        self.slow = slow
+        self.signal = signal
+        # Intervalo de las velas recibidas: solo el diario guarda estado incremental
+        # (la última vela semanal o mensual puede estar en curso)
+        self.interval = interval
         # Almacena los resultados MACD por símbolo
         self.macd_data = {}       # { "AAPL": DataFrame con MACD, Signal, Histogram }
         # Estado de cada símbolo tras el cálculo
         self.symbols_status = {}  # { "AAPL": "OK" / "DATOS_INSUFICIENTES" / "Error" }
+        # Estado final de las EMAs por símbolo para actualizaciones incrementales
+        # { ("AAPL", "1d", 12, 26, 9): {"last_timestamp", "last_close", "ema_fast", "ema_slow", "signal", "tail"} }
+        # La clave incluye intervalo y parámetros: calculadoras distintas que
+        # comparten el diccionario no mezclan sus estados. Cada entrada se
+        # reemplaza completa (nunca se modifica), así que es seguro entre hilos.
+        self.ema_state = {} if ema_state is None else ema_state
+
+    def _state_key(self, symbol: str) -> tuple:
+        return (symbol, self.interval, self.fast, self.slow, self.signal)
+
+    def get_state(self, symbol: str) -> dict | None:
+        """ Estado incremental guardado del símbolo para este intervalo y estos parámetros """
+        return self.ema_state.get(self._state_key(symbol))
+
+    def _closed_cutoff(self, index):
+        """
+        Primera fecha de las velas que todavía pueden cambiar: la de hoy en el
+        diario; en semanal y mensual, cualquiera (None = no se guarda estado).
+        """
+        if self.interval != "1d":
+            return None
+        return pd.Timestamp.now(tz=getattr(index, "tz", None)).normalize()
 
     def calculate_macd(self, price_data: dict, symbols_status: dict):
         self.macd_data = {}
-        self.symbols_status = {} 
-        #Valores para el MACD
-        fast = 12
-        slow = 26
-        signal = 9
+        self.symbols_status = {}
+        fast = self.fast
+        slow = self.slow
+        signal = self.signal
 
         for symbol, status in symbols_status.items():
             # Solo procesar símbolos con estado OK
@@ -54,6 +149,272 @@ class MACDCalculator:
                 # En caso de error inesperado
                 self.symbols_status[symbol] = f"Error: {str(e)}"
 
+        return self.macd_data, self.symbols_status
+
+    def calculate_macd_batch(self, price_data: dict, symbols_status: dict):
+        """
+        Variante por lotes de calculate_macd: alinea todas las series Close en
+        una matriz fechas x símbolos y calcula EMA rápida, EMA lenta, señal e
+        histograma de todos los símbolos en una sola pasada vectorizada.
+        Mantiene el mismo contrato de get_macd_data() / get_symbols_status().
+        price_data también puede ser un PriceMatrix: la matriz de cierres se
+        toma directamente, sin pasar por un DataFrame por símbolo.
+        Retorna (macd_data, symbols_status).
+        """
+        if isinstance(price_data, PriceMatrix):
+            return self._batch_from_matrix(price_data, symbols_status)
+
+        self.macd_data = {}
+        self.symbols_status = {}
+
+        # 1️⃣ Filtrar símbolos y recolectar las series Close válidas
+        batch_symbols = []
+        batch_index = []
+        batch_close = []
+        for symbol, status in symbols_status.items():
+            if status != "OK":
+                self.symbols_status[symbol] = status
+                continue
+
+            df = price_data.get(symbol)
+
+            if df is None or df["Close"].dropna().shape[0] < self.slow + self.signal:
+                self.symbols_status[symbol] = "DATOS_INSUFICIENTES"
+                continue
+
+            try:
+                close = df["Close"].to_numpy(dtype=np.float64)
+            except Exception as e:
+                self.symbols_status[symbol] = f"Error: {str(e)}"
+                continue
+
+            batch_symbols.append(symbol)
+            batch_index.append(df.index)
+            batch_close.append(close)
+            # Reservar la posición para respetar el orden de entrada
+            self.symbols_status[symbol] = "OK"
+
+        if batch_symbols:
+            self._compute_batch(batch_symbols, batch_index, batch_close)
+        return self.macd_data, self.symbols_status
+
+    def _batch_from_matrix(self, matrix: PriceMatrix, symbols_status: dict):
+        """
+        calculate_macd_batch sobre un PriceMatrix. Los huecos (NaN) de cada
+        fila se compactan con un argsort estable que lleva las velas con dato
+        al final sin alterar su orden, lo mismo que _stack_series con
+        align_end=True sobre las series ya limpias.
+        """
+        self.macd_data = {}
+        self.symbols_status = {}
+        close = matrix.field("Close")
+        counts = np.count_nonzero(~np.isnan(close), axis=1)
+
+        batch_symbols, batch_rows = [], []
+        for symbol, status in symbols_status.items():
+            if status != "OK":
+                self.symbols_status[symbol] = status
+                continue
+            if symbol not in matrix:
+                self.symbols_status[symbol] = "DATOS_INSUFICIENTES"
+                continue
+            row = matrix.position(symbol)
+            if counts[row] < self.slow + self.signal:
+                self.symbols_status[symbol] = "DATOS_INSUFICIENTES"
+                continue
+            batch_symbols.append(symbol)
+            batch_rows.append(row)
+            self.symbols_status[symbol] = "OK"
+
+        if not batch_symbols:
+            return self.macd_data, self.symbols_status
+
+        block = close[batch_rows]
+        valid = ~np.isnan(block)
+        n_dates = block.shape[1]
+        if valid.all():
+            order = None
+            close_matrix = block.T.astype(np.float64)
+        else:
+            # False (hueco) antes que True (dato): las velas quedan alineadas por el final
+            order = np.argsort(valid, axis=1, kind="stable")
+            close_matrix = np.take_along_axis(block, order, axis=1).T.astype(np.float64)
+
+        indexes = []
+        for col, row in enumerate(batch_rows):
+            if order is None:
+                indexes.append(matrix.dates)
+            else:
+                indexes.append(matrix.dates[order[col, n_dates - counts[row]:]])
+        self._compute_batch(batch_symbols, indexes, None, close_matrix=close_matrix)
+        return self.macd_data, self.symbols_status
+
+    def _compute_batch(self, symbols: list[str], indexes: list, closes: list | None, state: list | None = None,
+                       close_matrix: np.ndarray | None = None):
+        """
+        Núcleo vectorizado compartido por el cálculo por lotes y el incremental.
+        Sin state, cada serie se calcula desde su primera vela (matriz alineada
+        por la última vela). Con state, las series son solo las velas nuevas y
+        las EMAs continúan desde los valores guardados (matriz alineada por la
+        primera vela). Guarda los DataFrames resultantes y actualiza ema_state.
+        close_matrix: matriz fechas x símbolos ya armada (en lugar de closes).
+        """
+        align_end = state is None
+        if close_matrix is None:
+            close_matrix = _stack_series(closes, align_end=align_end)
+        n_rows = close_matrix.shape[0]
+
+        if state is None:
+            initial_fast = initial_slow = initial_signal = None
+        else:
+            initial_fast = np.array([entry["ema_fast"] for entry in state])
+            initial_slow = np.array([entry["ema_slow"] for entry in state])
+            initial_signal = np.array([entry["signal"] for entry in state])
+
+        # Cálculo vectorizado para todos los símbolos
+        ema_fast = _ema_matrix(close_matrix, self.fast, initial_fast)
+        ema_slow = _ema_matrix(close_matrix, self.slow, initial_slow)
+        macd_matrix = ema_fast - ema_slow
+        signal_matrix = _ema_matrix(macd_matrix, self.signal, initial_signal)
+        histogram_matrix = macd_matrix - signal_matrix
+
+        # Volver a un DataFrame por símbolo con su propio índice
+        for col, symbol in enumerate(symbols):
+            index = indexes[col]
+            if align_end:
+                rows = slice(n_rows - len(index), n_rows)
+            else:
+                rows = slice(0, len(index))
+
+            result_df = pd.DataFrame({
+                "MACD": macd_matrix[rows, col],
+                "Signal": signal_matrix[rows, col],
+                "Histogram": histogram_matrix[rows, col]
+            }, index=index)
+
+            # Al continuar, se anteponen las dos últimas filas guardadas para
+            # que el clasificador siempre disponga de t y t-1
+            if state is not None:
+                result_df = pd.concat([state[col]["tail"], result_df])
+
+            self.macd_data[symbol] = result_df
+            # El estado solo avanza hasta velas cerradas: con una vela en curso
+            # la próxima actualización recalcula el símbolo completo
+            cutoff = self._closed_cutoff(index)
+            if cutoff is None or index[-1] >= cutoff:
+                self.ema_state.pop(self._state_key(symbol), None)
+                continue
+            last = rows.stop - 1
+            self.ema_state[self._state_key(symbol)] = {
+                "last_timestamp": index[-1],
+                "last_close": float(close_matrix[last, col]),
+                "ema_fast": float(ema_fast[last, col]),
+                "ema_slow": float(ema_slow[last, col]),
+                "signal": float(signal_matrix[last, col]),
+                "tail": result_df.iloc[-2:]
+            }
+
+    def calculate_macd_incremental(self, price_data: dict, symbols_status: dict):
+        """
+        Igual que calculate_macd_batch, pero reutiliza el estado final de las
+        EMAs guardado en el cálculo anterior: si la última vela procesada sigue
+        presente en los datos, solo se avanzan las velas posteriores (O(velas
+        nuevas)). Los símbolos sin estado, o cuyo historial ya no empalma con
+        el guardado (falta la última vela o cambió su cierre), se recalculan
+        completos. El estado es por símbolo,
+        intervalo y parámetros, y solo se guarda en velas diarias cerradas.
+        En los símbolos avanzados, el DataFrame devuelto contiene solo las dos
+        últimas filas previas más las velas nuevas.
+        Retorna (macd_data, symbols_status).
+        """
+        self.macd_data = {}
+        self.symbols_status = {}
+
+        full_symbols, full_index, full_close = [], [], []
+        inc_symbols, inc_index, inc_close, inc_state = [], [], [], []
+        for symbol, status in symbols_status.items():
+            if status != "OK":
+                self.symbols_status[symbol] = status
+                continue
+
+            df = price_data.get(symbol)
+
+            if df is None or df["Close"].dropna().shape[0] < self.slow + self.signal:
+                self.symbols_status[symbol] = "DATOS_INSUFICIENTES"
+                continue
+
+            try:
+                close = df["Close"]
+                state = self.get_state(symbol)
+                # Si la vela ya procesada cambió (split, dividendo, corrección del
+                # proveedor), el historial fue reajustado: el estado no sirve
+                if state is not None and state["last_timestamp"] in df.index and not np.isclose(
+                        close.loc[state["last_timestamp"]], state["last_close"], rtol=1e-9, atol=0.0):
+                    self.ema_state.pop(self._state_key(symbol), None)
+                    state = None
+                if state is not None and state["last_timestamp"] in df.index:
+                    new_close = close[df.index > state["last_timestamp"]]
+                    if not new_close.isna().any():
+                        if new_close.empty:
+                            # Sin velas nuevas: se reutiliza el último resultado
+                            self.macd_data[symbol] = state["tail"]
+                        else:
+                            inc_symbols.append(symbol)
+                            inc_index.append(new_close.index)
+                            inc_close.append(new_close.to_numpy(dtype=np.float64))
+                            inc_state.append(state)
+                        self.symbols_status[symbol] = "OK"
+                        continue
+
+                full_symbols.append(symbol)
+                full_index.append(df.index)
+                full_close.append(close.to_numpy(dtype=np.float64))
+                self.symbols_status[symbol] = "OK"
+            except Exception as e:
+                self.symbols_status[symbol] = f"Error: {str(e)}"
+
+        if full_symbols:
+            self._compute_batch(full_symbols, full_index, full_close)
+        if inc_symbols:
+            self._compute_batch(inc_symbols, inc_index, inc_close, state=inc_state)
+
+        # Mantener el orden de entrada de los símbolos en macd_data
+        self.macd_data = {s: self.macd_data[s] for s in self.symbols_status if s in self.macd_data}
+        return self.macd_data, self.symbols_status
+
+    def verify_incremental(self, price_data: dict, symbols_status: dict, tolerance: float = 1e-8) -> tuple[bool, dict]:
+        """
+        Compara los últimos resultados incrementales con un recálculo completo
+        sobre price_data (en las fechas que ambos comparten).
+        Retorna (True si todas las diferencias <= tolerance, {símbolo: máxima
+        diferencia absoluta}). Si el historial actual empieza después del que
+        originó el estado, la diferencia refleja la semilla de la EMA, que
+        decae geométricamente con cada vela.
+        """
+        reference = MACDCalculator(self.fast, self.slow, self.signal, interval=self.interval)
+        reference.calculate_macd_batch(price_data, symbols_status)
+        reference_data = reference.get_macd_data()
+
+        differences = {}
+        for symbol, df in self.macd_data.items():
+            full_df = reference_data.get(symbol)
+            if full_df is None:
+                continue
+            common = df.index.intersection(full_df.index)
+            diff = (df.loc[common] - full_df.loc[common]).abs().to_numpy()
+            differences[symbol] = float(np.nanmax(diff)) if diff.size else 0.0
+
+        ok = all(diff <= tolerance for diff in differences.values())
+        return ok, differences
+
+    def reset_state(self, symbols: list[str] | None = None):
+        """ Descarta el estado incremental (de todos o de algunos símbolos, en este intervalo y parámetros) """
+        if symbols is None:
+            self.ema_state.clear()
+        else:
+            for symbol in symbols:
+                self.ema_state.pop(self._state_key(symbol), None)
+
     def get_macd_data(self):
         """ Devuelve los DataFrames con MACD por símbolo """
         return self.macd_data
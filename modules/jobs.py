@@ -0,0 +1,158 @@
+# -----------------------------
+# Trabajos en segundo plano para análisis largos
+# -----------------------------
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.pipeline import STAGES
+
+
+class AnalysisJob:
+    """ Estado de un análisis en segundo plano (se actualiza desde el hilo que lo ejecuta) """
+
+    def __init__(self, symbols: list[str], timeframes: list[str] | None = None):
+        self.id = uuid.uuid4().hex
+        self.symbols = symbols
+        self.timeframes = timeframes or ["1d"]
+        self.status = "en_cola"  # en_cola → en_proceso → terminado / error
+        self.stages = {stage: {"procesados": 0, "total": 0} for stage in STAGES}
+        self.partial_results = {}
+        self.rows = []  # [(símbolo, fila)] en el orden en que se clasificaron
+        self.results = {}
+        self.result_id = None  # Id de los resultados en el ResultStore (se guardan una sola vez)
+        self.messages = []
+        self.created_at = time.time()
+        self.finished_at = None
+        self.version = 0  # Aumenta con cada cambio: quien espera sabe si hay novedades
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._store_lock = threading.Lock()
+
+    def _notify(self):
+        self.version += 1
+        self._changed.notify_all()
+
+    def start(self):
+        """ Marca el trabajo en proceso (bajo el mismo lock que el progreso, avisando a quien espera) """
+        with self._lock:
+            self.status = "en_proceso"
+            self._notify()
+
+    def update_stage(self, stage: str, done: int, total: int):
+        with self._lock:
+            self.stages[stage] = {"procesados": done, "total": total}
+            self._notify()
+
+    def add_partial(self, results: dict):
+        with self._lock:
+            self.partial_results.update(results)
+            self.rows.extend(results.items())
+            self._notify()
+
+    def finish(self, results: dict, message: str | None = None):
+        """ Cierra el trabajo con sus resultados o con un mensaje de error """
+        with self._lock:
+            if message:
+                self.messages.append(message)
+                self.status = "error"
+            else:
+                self.results = results
+                self.status = "terminado"
+            self.finished_at = time.time()
+            self._notify()
+
+    def store_results(self, result_store) -> str | None:
+        """
+        Guarda los resultados completos en result_store la primera vez y
+        retorna siempre el mismo id (de nuevo solo si el guardado venció).
+        None si el trabajo no tiene resultados.
+        """
+        with self._store_lock:
+            if not self.results:
+                return None
+            if self.result_id is None or result_store.get(self.result_id) is None:
+                self.result_id = result_store.put(self.results)
+            return self.result_id
+
+    def wait(self, version: int, timeout: float) -> int:
+        """
+        Espera hasta timeout segundos a que el trabajo cambie respecto de
+        version (o a que termine). Retorna la versión actual.
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version or self.finished_at is not None, timeout)
+            return self.version
+
+    def rows_since(self, cursor: int) -> list[tuple[str, dict]]:
+        """ Filas clasificadas a partir de la posición cursor """
+        with self._lock:
+            return self.rows[cursor:]
+
+    def to_dict(self, include_partial: bool = True) -> dict:
+        """ Representación JSON para el endpoint de estado """
+        with self._lock:
+            data = {
+                "job_id": self.id,
+                "estado": self.status,
+                "simbolos": len(self.symbols),
+                "etapas": {stage: dict(progress) for stage, progress in self.stages.items()},
+                "mensajes": list(self.messages),
+                "creado": self.created_at,
+                "terminado": self.finished_at
+            }
+            if include_partial:
+                data["resultados_parciales"] = dict(self.results or self.partial_results)
+            return data
+
+
+class JobManager:
+    """
+    Ejecuta análisis en un pool local de hilos para no ocupar el worker web.
+    Conserva los trabajos terminados durante ttl segundos (y a lo sumo max_jobs).
+    """
+
+    def __init__(self, max_workers: int = 2, max_jobs: int = 200, ttl: int = 3600):
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="macd-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, symbols: list[str], run, timeframes: list[str] | None = None) -> AnalysisJob:
+        """
+        Encola un trabajo. run(job) ejecuta el análisis y retorna
+        (resultados, mensaje de error o None).
+        """
+        job = AnalysisJob(symbols, timeframes)
+        with self._lock:
+            self._purge()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, run)
+        return job
+
+    def _run(self, job: AnalysisJob, run):
+        job.start()
+        try:
+            results, msg = run(job)
+            job.finish(results, msg)
+        except Exception as e:
+            job.finish({}, f"Error: {str(e)}")
+
+    def get(self, job_id: str) -> AnalysisJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _purge(self):
+        # Descartar trabajos terminados vencidos y los más antiguos si sobran
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at and now - job.finished_at > self.ttl:
+                del self._jobs[job_id]
+        while len(self._jobs) >= self.max_jobs:
+            oldest_id = next((jid for jid, job in self._jobs.items() if job.finished_at), None)
+            if oldest_id is None:
+                break
+            del self._jobs[oldest_id]
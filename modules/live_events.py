@@ -0,0 +1,56 @@
+# -----------------------------
+# Resultados en vivo con Server-Sent Events
+# -----------------------------
+import json
+
+
+def format_event(event: str, data, event_id: int | None = None) -> str:
+    """ Un mensaje en el formato text/event-stream """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in json.dumps(data, ensure_ascii=False).splitlines())
+    return "\n".join(lines) + "\n\n"
+
+
+def job_event_stream(job, cursor: int = 0, heartbeat: float = 15.0, on_finish=None):
+    """
+    Genera los eventos de un trabajo a medida que avanza:
+      - "fila": un símbolo ya clasificado ({"simbolo": ..., "estado": ..., "señal": ...}).
+        Su id es la cantidad de filas enviadas, para retomar con Last-Event-ID.
+      - "progreso": el avance por etapa, cuando cambia.
+      - "fin": estado final y mensajes (más lo que agregue on_finish(job)).
+    cursor: filas que el cliente ya recibió.
+    Sin novedades durante heartbeat segundos se envía un comentario para
+    que los proxies no corten la conexión.
+    """
+    yield "retry: 2000\n\n"
+    version = -1
+    stages = None
+    while True:
+        previous, version = version, job.wait(version, heartbeat)
+        if version == previous:
+            yield ": ping\n\n"
+            continue
+        for symbol, data in job.rows_since(cursor):
+            cursor += 1
+            yield format_event("fila", {"simbolo": symbol, **data}, cursor)
+
+        info = job.to_dict(include_partial=False)
+        if info["etapas"] != stages:
+            stages = info["etapas"]
+            yield format_event("progreso", {"simbolos": info["simbolos"], "etapas": stages})
+
+        if info["terminado"] is not None:
+            # Lo que no llegó como parcial (p. ej. un trabajo ya terminado al conectarse)
+            sent = {symbol for symbol, _ in job.rows_since(0)[:cursor]}
+            for symbol, data in job.results.items():
+                if symbol not in sent:
+                    cursor += 1
+                    yield format_event("fila", {"simbolo": symbol, **data}, cursor)
+            final = {"estado": info["estado"], "mensajes": info["mensajes"]}
+            if on_finish:
+                final.update(on_finish(job))
+            yield format_event("fin", final)
+            return
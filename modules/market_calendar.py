@@ -0,0 +1,40 @@
+# -----------------------------
+# Calendario bursátil
+# -----------------------------
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+# Horario de la bolsa de Nueva York (no contempla feriados)
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_CLOSE = time(16, 0)
+
+
+def previous_weekday(day: date) -> date:
+    """ Día hábil (lunes a viernes) estrictamente anterior a day """
+    day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def last_completed_session(now: datetime | None = None) -> date:
+    """
+    Fecha de la última sesión cerrada: hoy si ya pasó el cierre de las 16:00
+    (hora de Nueva York) en un día hábil, o el día hábil anterior.
+    """
+    now = now.astimezone(MARKET_TZ) if now else datetime.now(MARKET_TZ)
+    day = now.date()
+    if day.weekday() < 5 and now.time() >= MARKET_CLOSE:
+        return day
+    return previous_weekday(day)
+
+
+def latest_daily_bar(now: datetime | None = None) -> date:
+    """
+    Fecha de la última vela diaria que entra en el análisis: la última sesión
+    cerrada, sin contar el día de hoy (YahooFinanceClient descarta la vela
+    del día actual aunque el mercado ya haya cerrado).
+    """
+    now = now or datetime.now().astimezone()
+    local_today = now.astimezone().date()
+    return min(last_completed_session(now), previous_weekday(local_today))
@@ -0,0 +1,225 @@
+# -----------------------------
+# Métricas de la aplicación (formato de texto de Prometheus)
+# -----------------------------
+import threading
+import time
+from contextlib import contextmanager
+
+# Límites de los histogramas de duración, en segundos
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """ Contador que solo aumenta, con una serie por combinación de etiquetas """
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: tuple = ()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(tuple(labels.get(name, "") for name in self.labels), 0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values]
+
+
+class Histogram:
+    """ Histograma acumulado por límites (buckets), suma y cantidad de observaciones """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # {etiquetas: [conteos por bucket, suma, cantidad]}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(labels.get(name, "") for name in self.labels))
+        return series[2] if series else 0
+
+    def total(self, **labels) -> float:
+        series = self._series.get(tuple(labels.get(name, "") for name in self.labels))
+        return series[1] if series else 0.0
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            series = sorted((key, (list(counts), total, n)) for key, (counts, total, n) in self._series.items())
+        lines = []
+        for key, (counts, total, n) in series:
+            for bound, count in zip(self.buckets, counts):
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {count}")
+            inf = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, inf)} {n}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {n}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Métricas del proceso: duración de cada etapa del análisis, símbolos
+    procesados, estados, señales, aciertos de las cachés y solicitudes HTTP.
+    Cada worker de gunicorn tiene su propio registro (Prometheus suma los
+    workers al consultar cada uno).
+    Además, mientras hay una solicitud en curso en el hilo (begin_request),
+    las etapas medidas se acumulan para el encabezado Server-Timing.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._local = threading.local()
+        # Varios hilos pueden sumar etapas a la misma solicitud (join_request)
+        self._timings_lock = threading.Lock()
+        self.stage_seconds = self.histogram(
+            "macd_stage_seconds", "Duración de cada etapa del análisis.", ("stage",)
+        )
+        self.symbols_processed = self.counter(
+            "macd_symbols_processed_total", "Símbolos que pasaron por el análisis.", ("stage",)
+        )
+        self.symbol_status = self.counter(
+            "macd_symbol_status_total", "Símbolos analizados por estado.", ("estado",)
+        )
+        self.signals = self.counter(
+            "macd_signals_total", "Señales clasificadas por tipo.", ("senal",)
+        )
+        self.cache_requests = self.counter(
+            "macd_cache_requests_total", "Consultas a las cachés por resultado (hit o miss).", ("cache", "result")
+        )
+        self.request_seconds = self.histogram(
+            "macd_http_request_seconds", "Duración de las solicitudes HTTP.", ("endpoint",)
+        )
+        self.requests = self.counter(
+            "macd_http_requests_total", "Solicitudes HTTP por ruta y código.", ("endpoint", "status")
+        )
+
+    def counter(self, name: str, description: str, labels: tuple = ()) -> Counter:
+        metric = Counter(name, description, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, description: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, description, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    # --- Etapas ---
+
+    @contextmanager
+    def timer(self, stage: str):
+        """ Mide el bloque como la etapa stage """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(stage, time.perf_counter() - start)
+
+    def record_stage(self, stage: str, seconds: float):
+        self.stage_seconds.observe(seconds, stage=stage)
+        timings = getattr(self._local, "timings", None)
+        if timings is not None:
+            with self._timings_lock:
+                timings[stage] = timings.get(stage, 0.0) + seconds
+
+    def timed_iter(self, stage: str, iterable):
+        """ Recorre iterable sumando a stage solo el tiempo de espera de cada elemento """
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.record_stage(stage, time.perf_counter() - start)
+                return
+            self.record_stage(stage, time.perf_counter() - start)
+            yield item
+
+    def cache_lookup(self, cache: str, hits: int, misses: int):
+        if hits:
+            self.cache_requests.inc(hits, cache=cache, result="hit")
+        if misses:
+            self.cache_requests.inc(misses, cache=cache, result="miss")
+
+    # --- Solicitud en curso (Server-Timing) ---
+
+    def begin_request(self):
+        self._local.timings = {}
+        self._local.started = time.perf_counter()
+
+    def current_request(self) -> dict | None:
+        """ Tiempos de la solicitud en curso en este hilo (para compartirlos con otro) """
+        return getattr(self._local, "timings", None)
+
+    def join_request(self, timings: dict | None):
+        """ Las etapas medidas en este hilo se suman a la solicitud de otro hilo """
+        self._local.timings = timings
+
+    def end_request(self, endpoint: str, status: int) -> dict:
+        """ Registra la solicitud y retorna {etapa: segundos} medidos en ella (más "total") """
+        timings = getattr(self._local, "timings", None)
+        if timings is None:
+            return {}
+        elapsed = time.perf_counter() - self._local.started
+        self._local.timings = None
+        self.request_seconds.observe(elapsed, endpoint=endpoint)
+        self.requests.inc(endpoint=endpoint, status=str(status))
+        with self._timings_lock:
+            return {**timings, "total": elapsed}
+
+    @staticmethod
+    def server_timing(timings: dict) -> str:
+        """ Valor del encabezado Server-Timing (duraciones en milisegundos) """
+        return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items())
+
+    # --- Exposición ---
+
+    def render(self) -> str:
+        """ Todas las métricas en el formato de texto de Prometheus (versión 0.0.4) """
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,172 @@
+# -----------------------------
+# Barrido de parámetros del MACD (fast, slow, signal)
+# -----------------------------
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from modules.classificator import crossover_masks
+from modules.indicators import _ema_matrix, _stack_series
+
+# Códigos de señal del cubo de resultados
+SIGNAL_CODES = {"VENTA": -1, "NULO": 0, "COMPRA": 1}
+SIGNAL_LABELS = np.array(["VENTA", "NULO", "COMPRA"], dtype=object)  # índice = código + 1
+
+
+def parameter_grid(fast_values, slow_values, signal_values) -> list[tuple[int, int, int]]:
+    """ Todas las combinaciones (fast, slow, signal) con fast < slow """
+    return [
+        (fast, slow, signal)
+        for fast, slow, signal in itertools.product(fast_values, slow_values, signal_values)
+        if fast < slow
+    ]
+
+
+class SweepResult:
+    """
+    Cubo símbolo × combinación de parámetros con la señal de la última vela
+    (int8: -1 VENTA, 0 NULO, 1 COMPRA) y los últimos valores de MACD,
+    Signal e Histogram (float32, NaN si el símbolo no tenía velas suficientes).
+    """
+
+    def __init__(self, symbols: list[str], params: list[tuple[int, int, int]],
+                 signals: np.ndarray, values: np.ndarray):
+        self.symbols = symbols
+        self.params = params
+        self.signals = signals  # (símbolos, combinaciones)
+        self.values = values    # (símbolos, combinaciones, 3)
+        self._symbol_pos = {symbol: i for i, symbol in enumerate(symbols)}
+        self._param_pos = {param: j for j, param in enumerate(params)}
+
+    def get_signal(self, symbol: str, params: tuple[int, int, int]) -> str:
+        code = self.signals[self._symbol_pos[symbol], self._param_pos[tuple(params)]]
+        return SIGNAL_LABELS[code + 1]
+
+    def get_signals(self, symbol: str) -> dict:
+        """ { (fast, slow, signal): "COMPRA" / "VENTA" / "NULO" } de un símbolo """
+        row = self.signals[self._symbol_pos[symbol]]
+        return dict(zip(self.params, SIGNAL_LABELS[row + 1].tolist()))
+
+    def signal_counts(self) -> np.ndarray:
+        """ Cantidad de símbolos en VENTA, NULO y COMPRA por combinación: (combinaciones, 3) """
+        return np.stack([(self.signals == code).sum(axis=0) for code in (-1, 0, 1)], axis=1)
+
+    def to_frame(self) -> pd.DataFrame:
+        """ Señales como tabla: una fila por símbolo, una columna "fast/slow/signal" por combinación """
+        columns = [f"{fast}/{slow}/{signal}" for fast, slow, signal in self.params]
+        return pd.DataFrame(SIGNAL_LABELS[self.signals + 1], index=self.symbols, columns=columns)
+
+
+class MACDParameterSweep:
+    """
+    Calcula la señal MACD de cada símbolo para muchas combinaciones de
+    parámetros sin repetir trabajo: cada span de EMA distinto se calcula una
+    sola vez sobre la matriz de cierres, las líneas MACD salen de restar esas
+    EMAs, y las señales de todas las líneas que usan el mismo span se
+    calculan juntas en una sola matriz.
+    Los símbolos se procesan en bloques para que las matrices intermedias no
+    superen max_cells valores (8 bytes cada uno).
+    """
+
+    def __init__(self, params: list[tuple[int, int, int]], max_cells: int = 16_000_000):
+        for fast, slow, signal in params:
+            if not 0 < fast < slow or signal <= 0:
+                raise ValueError(f"Parámetros MACD inválidos: {(fast, slow, signal)}")
+        self.params = [tuple(param) for param in params]
+        self.max_cells = max_cells
+
+        # Spans de EMA distintos y pares (fast, slow) distintos
+        self.spans = sorted({span for fast, slow, _ in self.params for span in (fast, slow)})
+        self.pairs = sorted({(fast, slow) for fast, slow, _ in self.params})
+        self._pair_pos = {pair: k for k, pair in enumerate(self.pairs)}
+        # Para cada span de señal, los pares que lo usan
+        self.signal_pairs = {}
+        for fast, slow, signal in self.params:
+            pairs = self.signal_pairs.setdefault(signal, [])
+            if (fast, slow) not in pairs:
+                pairs.append((fast, slow))
+
+    def block_size(self, n_rows: int) -> int:
+        """ Símbolos por bloque según el tamaño de las matrices intermedias """
+        cells_per_symbol = n_rows * (len(self.spans) + 2 * len(self.pairs))
+        return max(1, self.max_cells // max(cells_per_symbol, 1))
+
+    def sweep(self, price_data: dict, symbols_status: dict) -> SweepResult:
+        """
+        price_data: { "AAPL": DataFrame con Close, ... }
+        symbols_status: { "AAPL": "OK", ... } (los que no están OK quedan en NULO)
+        Retorna el SweepResult con los símbolos en el orden de symbols_status.
+        """
+        symbols = list(symbols_status)
+        n_params = len(self.params)
+        signals = np.zeros((len(symbols), n_params), dtype=np.int8)
+        values = np.full((len(symbols), n_params, 3), np.nan, dtype=np.float32)
+
+        positions, closes = [], []
+        for i, symbol in enumerate(symbols):
+            df = price_data.get(symbol)
+            if symbols_status[symbol] != "OK" or df is None or df.empty:
+                continue
+            positions.append(i)
+            closes.append(df["Close"].to_numpy(dtype=np.float64))
+        if not closes:
+            return SweepResult(symbols, self.params, signals, values)
+
+        close_matrix = _stack_series(closes, align_end=True)
+        observations = (~np.isnan(close_matrix)).sum(axis=0)
+        positions = np.array(positions)
+
+        step = self.block_size(close_matrix.shape[0])
+        for start in range(0, len(positions), step):
+            block = slice(start, start + step)
+            block_signals, block_values = self._sweep_block(close_matrix[:, block], observations[block])
+            signals[positions[block]] = block_signals
+            values[positions[block]] = block_values
+        return SweepResult(symbols, self.params, signals, values)
+
+    def _sweep_block(self, close: np.ndarray, observations: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        n_rows, n_cols = close.shape
+
+        # 1️⃣ Cada span de EMA una sola vez
+        emas = {span: _ema_matrix(close, span) for span in self.spans}
+
+        # 2️⃣ Todas las líneas MACD lado a lado: columnas [par 0 | par 1 | ...]
+        macd = np.empty((n_rows, len(self.pairs) * n_cols))
+        for k, (fast, slow) in enumerate(self.pairs):
+            macd[:, k * n_cols:(k + 1) * n_cols] = emas[fast] - emas[slow]
+        del emas
+        macd_last = macd[-2:]
+
+        # 3️⃣ Una EMA por span de señal sobre todas las líneas que lo usan (solo t-1 y t)
+        signal_last = {}
+        for signal, pairs in self.signal_pairs.items():
+            if len(pairs) == len(self.pairs):
+                columns = np.arange(macd.shape[1])
+                pairs = self.pairs
+            else:
+                columns = np.concatenate([
+                    np.arange(self._pair_pos[pair] * n_cols, (self._pair_pos[pair] + 1) * n_cols)
+                    for pair in pairs
+                ])
+            last = _ema_matrix(macd[:, columns], signal, last_rows=2)
+            for k, pair in enumerate(pairs):
+                signal_last[(pair, signal)] = last[:, k * n_cols:(k + 1) * n_cols]
+        del macd
+
+        # 4️⃣ Reglas de cruce de todas las combinaciones
+        block_signals = np.zeros((n_cols, len(self.params)), dtype=np.int8)
+        block_values = np.full((n_cols, len(self.params), 3), np.nan, dtype=np.float32)
+        for j, (fast, slow, signal) in enumerate(self.params):
+            k = self._pair_pos[(fast, slow)]
+            macd_prev, macd_t = macd_last[:, k * n_cols:(k + 1) * n_cols]
+            signal_prev, signal_t = signal_last[((fast, slow), signal)]
+            hist_t = macd_t - signal_t
+            compra, venta = crossover_masks(macd_prev, macd_t, signal_prev, signal_t, hist_t)
+
+            # Igual que MACDCalculator: sin slow + signal velas no hay señal
+            enough = observations >= slow + signal
+            block_signals[compra & enough, j] = 1
+            block_signals[venta & enough, j] = -1
+            block_values[enough, j] = np.stack([macd_t, signal_t, hist_t], axis=1)[enough]
+        return block_signals, block_values
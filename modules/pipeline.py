@@ -0,0 +1,151 @@
+# -----------------------------
+# Pipeline de análisis: descarga → MACD → clasificación → resultados
+# -----------------------------
+from collections import Counter
+
+from modules.market_calendar import latest_daily_bar
+from modules.streaming import prefetch
+from modules.timeframes import history_days, normalize_timeframes
+
+# Etapas en el orden en que se ejecutan (para informar progreso)
+STAGES = ["descarga", "macd", "clasificacion", "resultados"]
+
+
+def run_analysis(services, symbols: list[str], interval: str = "1d", force_refresh: bool = False,
+                 progress=None, partial=None, timeframes: list[str] | None = None) -> tuple[dict, str | None]:
+    """
+    Descarga, MACD, clasificación y armado de resultados para los símbolos.
+    Cada etapa recibe sus entradas y devuelve sus salidas; los gestores se
+    crean por llamada, así que análisis concurrentes no comparten datos.
+    Las etapas funcionan en flujo: un hilo productor descarga y limpia los
+    lotes (iter_fetch) y los deja en una cola acotada (MACD_STREAM_BUFFER
+    lotes); este hilo calcula MACD, clasifica y arma los resultados de cada
+    lote apenas llega, mientras siguen las descargas.
+    progress(etapa, procesados, total): opcional, informa el avance.
+    partial(resultados): opcional, recibe los resultados de cada lote en
+    cuanto son definitivos, antes de terminar.
+    timeframes: marcos a analizar (p. ej. ["1d", "1wk", "1mo"]). Con más de
+    uno se descargan solo las velas diarias y los demás marcos se arman por
+    remuestreo; cada resultado suma una columna "señal_<marco>".
+    Retorna (resultados, None) o ({}, mensaje de error).
+    """
+    timeframes = normalize_timeframes(timeframes, default=interval)
+    base_interval = timeframes[0]
+
+    yahoo_client = services.yahoo_client()
+    # El estado incremental de las EMAs es de velas diarias; otros marcos se calculan completos
+    if base_interval == "1d":
+        macd_calculator = services.macd_calculator()
+        calculate_macd = macd_calculator.calculate_macd_incremental
+        # Forzar actualización también descarta las EMAs calculadas con las velas viejas
+        if force_refresh:
+            macd_calculator.reset_state(symbols)
+    else:
+        macd_calculator = services.macd_calculator(shared_state=False, interval=base_interval)
+        calculate_macd = macd_calculator.calculate_macd_batch
+    classifier = services.classifier()
+    results_manager = services.results_manager()
+    metrics = services.metrics
+
+    def report(stage, done, total):
+        if progress:
+            progress(stage, done, total)
+
+    # 1️⃣ Descarga y limpieza en el hilo productor (una sola descarga, con historia para el marco más largo)
+    chunks = yahoo_client.iter_fetch(
+        symbols, min_days=history_days(timeframes, macd_calculator.slow, macd_calculator.signal),
+        interval=base_interval, force_refresh=force_refresh,
+        progress=lambda done, total: report("descarga", done, total)
+    )
+    # Las etapas medidas en el productor también van al Server-Timing de la solicitud
+    request_timings = metrics.current_request()
+    stream = prefetch(chunks, maxsize=services.config["MACD_STREAM_BUFFER"],
+                      initializer=lambda: metrics.join_request(request_timings))
+
+    results, statuses = {}, {}
+    for _, chunk_data, chunk_status in stream:
+        statuses.update(chunk_status)
+        metrics.symbols_processed.inc(len(chunk_status), stage="descarga")
+
+        # 2️⃣ Calcular MACD
+        with metrics.timer("macd"):
+            macd_data, macd_status = calculate_macd(chunk_data, chunk_status)
+        metrics.symbols_processed.inc(len(macd_data), stage="macd")
+        report("macd", len(statuses), len(symbols))
+
+        # 3️⃣ Clasificar señales
+        with metrics.timer("clasificacion"):
+            classified_signals = classifier.classify_all(macd_data, macd_status)
+        metrics.symbols_processed.inc(len(classified_signals), stage="clasificacion")
+        report("clasificacion", len(statuses), len(symbols))
+
+        # 4️⃣ Combinar resultados
+        with metrics.timer("resultados"):
+            chunk_results = dict(results_manager.build_results(macd_status, classified_signals))
+
+        # 5️⃣ Marcos más largos: remuestreo de las mismas velas, MACD y clasificación
+        for timeframe in timeframes[1:]:
+            with metrics.timer("remuestreo"):
+                resampled = services.resample_cache().resample(chunk_data, timeframe)
+            tf_status = {symbol: "OK" if symbol in resampled else status for symbol, status in macd_status.items()}
+            with metrics.timer("macd"):
+                tf_macd, tf_status = services.macd_calculator(shared_state=False, interval=timeframe).calculate_macd_batch(
+                    resampled, tf_status)
+            with metrics.timer("clasificacion"):
+                tf_signals = services.classifier().classify_all(tf_macd, tf_status)
+            for symbol, data in chunk_results.items():
+                data[f"señal_{timeframe}"] = tf_signals.get(symbol, "NULO")
+
+        results.update(chunk_results)
+        if partial and chunk_results:
+            partial(chunk_results)
+
+    if yahoo_client.fetch_error:
+        return {}, yahoo_client.fetch_error
+
+    # Mismo orden que la lista pedida
+    results = {symbol: results[symbol] for symbol in symbols if symbol in results}
+    for status, count in Counter(data["estado"] for data in results.values()).items():
+        metrics.symbol_status.inc(count, estado=status)
+    for signal, count in Counter(data["señal"] for data in results.values()).items():
+        metrics.signals.inc(count, senal=signal)
+    report("resultados", len(results), len(symbols))
+    return results, None
+
+
+def analyze_symbols(services, symbols: list[str], interval: str = "1d", force_refresh: bool = False,
+                    progress=None, partial=None, timeframes: list[str] | None = None) -> tuple[dict, str | None]:
+    """
+    Igual que run_analysis, pero sirve desde la caché de resultados los
+    símbolos ya calculados para la última sesión y solo procesa el resto.
+    partial(resultados): opcional, recibe los resultados disponibles antes
+    de terminar (los de la caché y los de cada lote ya analizado).
+    Retorna (resultados en el orden de symbols, None) o ({}, mensaje de error).
+    """
+    result_cache = services.result_cache
+    session = latest_daily_bar()
+    timeframes = normalize_timeframes(timeframes, default=interval)
+    # Cada combinación de marcos tiene sus propias columnas de señal
+    cache_key = "+".join(timeframes)
+    if force_refresh:
+        cached_results, missing = {}, list(symbols)
+    else:
+        cached_results, missing = result_cache.get_many(symbols, cache_key, session)
+        services.metrics.cache_lookup("resultados", len(cached_results), len(missing))
+    if partial and cached_results:
+        partial(dict(cached_results))
+
+    computed = {}
+    if missing:
+        computed, msg = run_analysis(services, missing, interval, force_refresh, progress, partial, timeframes)
+        if msg:
+            return {}, msg
+        result_cache.put_many(computed, cache_key, session)
+
+    # Respetar el orden de la lista enviada
+    results = {
+        symbol: cached_results[symbol] if symbol in cached_results else computed[symbol]
+        for symbol in symbols
+        if symbol in cached_results or symbol in computed
+    }
+    return results, None
@@ -0,0 +1,283 @@
+# -----------------------------
+# Precálculo de listas guardadas después del cierre
+# -----------------------------
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import date
+
+from modules.market_calendar import latest_daily_bar
+from modules.pipeline import STAGES, run_analysis
+from modules.timeframes import normalize_timeframes
+
+
+def _write_json(path: str, data):
+    """ Escritura atómica: archivo temporal + reemplazo (crea el directorio si falta) """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str, default=None):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+class SnapshotStore:
+    """
+    Almacén en disco de las listas registradas, de sus resultados
+    precalculados (un JSON por lista) y del historial de ejecuciones.
+    Todas las escrituras son atómicas, así que varios workers pueden leer
+    mientras el programador escribe.
+    """
+
+    def __init__(self, directory: str, max_history: int = 1000):
+        self.directory = directory
+        self.max_history = max_history
+        self.snapshots_dir = os.path.join(directory, "snapshots")
+        self.watchlists_path = os.path.join(directory, "watchlists.json")
+        self.history_path = os.path.join(directory, "runs.json")
+        # Los directorios se crean con la primera escritura (importar la app no toca el disco)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def snapshot_key(symbols: list[str], timeframes: list[str]) -> str:
+        """ Clave de una lista: mismos símbolos (en cualquier orden) y mismos marcos """
+        text = ",".join(sorted(set(symbols))) + "#" + "+".join(timeframes)
+        return hashlib.sha1(text.encode()).hexdigest()
+
+    # --- Listas registradas ---
+
+    def watchlists(self) -> dict:
+        """ { nombre: {"symbols": [...], "timeframes": [...]} } """
+        return _read_json(self.watchlists_path, {})
+
+    def register(self, name: str, symbols: list[str], timeframes: list[str] | None = None):
+        with self._lock:
+            watchlists = self.watchlists()
+            watchlists[name] = {"symbols": list(symbols), "timeframes": normalize_timeframes(timeframes)}
+            _write_json(self.watchlists_path, watchlists)
+
+    def unregister(self, name: str) -> bool:
+        with self._lock:
+            watchlists = self.watchlists()
+            if watchlists.pop(name, None) is None:
+                return False
+            _write_json(self.watchlists_path, watchlists)
+            return True
+
+    # --- Resultados precalculados ---
+
+    def _snapshot_path(self, key: str) -> str:
+        return os.path.join(self.snapshots_dir, f"{key}.json")
+
+    def save_snapshot(self, name: str, symbols: list[str], timeframes: list[str], session: date, results: dict):
+        key = self.snapshot_key(symbols, timeframes)
+        _write_json(self._snapshot_path(key), {
+            "watchlist": name,
+            "symbols": list(symbols),
+            "timeframes": timeframes,
+            "session": session.isoformat(),
+            "created": time.time(),
+            "results": results,
+        })
+
+    def load_snapshot(self, symbols: list[str], timeframes: list[str]) -> dict | None:
+        return _read_json(self._snapshot_path(self.snapshot_key(symbols, timeframes)))
+
+    def fresh_results(self, symbols: list[str], timeframes: list[str], session: date) -> dict | None:
+        """
+        Resultados precalculados de la lista para la sesión indicada, en el
+        orden de symbols; None si no hay o si son de una sesión anterior.
+        """
+        snapshot = self.load_snapshot(symbols, timeframes)
+        if snapshot is None or snapshot["session"] < session.isoformat():
+            return None
+        results = snapshot["results"]
+        if not all(symbol in results for symbol in symbols):
+            return None
+        # Un error de descarga puede ser transitorio: esa lista se vuelve a calcular
+        if any(str(results[symbol].get("estado", "")).startswith("Error") for symbol in symbols):
+            return None
+        return {symbol: results[symbol] for symbol in symbols}
+
+    # --- Historial de ejecuciones ---
+
+    def record_run(self, entry: dict):
+        with self._lock:
+            history = _read_json(self.history_path, [])
+            history.append(entry)
+            _write_json(self.history_path, history[-self.max_history:])
+
+    def history(self, limit: int = 50) -> list[dict]:
+        """ Últimas ejecuciones, de la más reciente a la más antigua """
+        return _read_json(self.history_path, [])[-limit:][::-1]
+
+
+class PrecomputeScheduler:
+    """
+    Recalcula las listas registradas cuando hay una sesión cerrada nueva
+    (ver latest_daily_bar) y guarda los resultados en el SnapshotStore.
+    Se usa desde la línea de comandos (flask precompute run / serve) o en un
+    hilo dentro del proceso web (MACD_PRECOMPUTE=1). Un archivo de bloqueo
+    evita que dos procesos recalculen a la vez.
+    """
+
+    def __init__(self, services, store: SnapshotStore, interval: int = 300, lock_timeout: int = 3600):
+        self.services = services
+        self.store = store
+        self.interval = interval
+        self.lock_timeout = lock_timeout
+        self.lock_path = os.path.join(store.directory, "precompute.lock")
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _acquire(self) -> bool:
+        os.makedirs(self.store.directory, exist_ok=True)
+        try:
+            fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            # Un bloqueo muy viejo es de un proceso que terminó sin liberarlo
+            try:
+                if time.time() - os.path.getmtime(self.lock_path) < self.lock_timeout:
+                    return False
+                os.remove(self.lock_path)
+            except OSError:
+                return False
+            return self._acquire()
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        return True
+
+    def _release(self):
+        try:
+            os.remove(self.lock_path)
+        except OSError:
+            pass
+
+    def pending(self, session: date | None = None) -> list[str]:
+        """ Listas sin resultados para la última sesión cerrada """
+        session = session or latest_daily_bar()
+        return [
+            name for name, watchlist in self.store.watchlists().items()
+            if self.store.fresh_results(watchlist["symbols"], watchlist["timeframes"], session) is None
+        ]
+
+    def run_once(self, force: bool = False, names: list[str] | None = None) -> list[dict]:
+        """
+        Recalcula las listas pendientes (o todas con force, o solo names).
+        Retorna las entradas agregadas al historial.
+        """
+        if not self._acquire():
+            return []
+        try:
+            session = latest_daily_bar()
+            watchlists = self.store.watchlists()
+            targets = list(watchlists) if force else self.pending(session)
+            if names is not None:
+                targets = [name for name in targets if name in names]
+            entries = [self._run_watchlist(name, watchlists[name], session) for name in targets]
+            published = self._publish_prices(watchlists, session, refresh=any(e["status"] == "ok" for e in entries))
+            return entries + ([published] if published else [])
+        finally:
+            self._release()
+
+    def _publish_prices(self, watchlists: dict, session: date, refresh: bool) -> dict | None:
+        """
+        Publica en el almacén compartido (MACD_SHARED_PRICES) las velas de
+        todos los símbolos registrados: el precálculo acaba de dejarlas en la
+        caché de velas. Solo si se recalculó algo o si la versión publicada
+        es de una sesión anterior. Retorna la entrada agregada al historial.
+        """
+        shared_prices = self.services.shared_prices()
+        if shared_prices is None or not watchlists:
+            return None
+        published = shared_prices.session()
+        if not refresh and published is not None and published >= session.isoformat():
+            return None
+
+        symbols = list(dict.fromkeys(symbol for watchlist in watchlists.values() for symbol in watchlist["symbols"]))
+        started = time.time()
+        try:
+            self.services.publish_shared_prices(symbols, session)
+            msg = None
+        except Exception as e:
+            msg = f"Error: {str(e)}"
+        seconds = round(time.time() - started, 3)
+        entry = {
+            "watchlist": "velas compartidas",
+            "session": session.isoformat(),
+            "started": started,
+            "seconds": seconds,
+            "stages": {"publicacion": seconds},
+            "symbols": len(symbols),
+            "status": "error" if msg else "ok",
+            "error": msg,
+        }
+        self.store.record_run(entry)
+        return entry
+
+    def _run_watchlist(self, name: str, watchlist: dict, session: date) -> dict:
+        symbols, timeframes = watchlist["symbols"], watchlist["timeframes"]
+        started = time.time()
+        # Momento en que terminó cada etapa (el último aviso de progreso)
+        stage_ends = {}
+
+        def progress(stage, done, total):
+            stage_ends[stage] = time.time()
+
+        try:
+            results, msg = run_analysis(self.services, symbols, progress=progress, timeframes=timeframes)
+        except Exception as e:
+            results, msg = {}, f"Error: {str(e)}"
+        finished = time.time()
+
+        stages, previous = {}, started
+        for stage in STAGES:
+            if stage in stage_ends:
+                stages[stage] = round(stage_ends[stage] - previous, 3)
+                previous = stage_ends[stage]
+
+        # Con símbolos en error no se guarda: la lista sigue pendiente y se reintenta
+        failed = sum(1 for data in results.values() if str(data.get("estado", "")).startswith("Error"))
+        if not msg and failed:
+            msg = f"Error: {failed} símbolos sin datos, se reintentará"
+        if not msg:
+            self.store.save_snapshot(name, symbols, timeframes, session, results)
+        entry = {
+            "watchlist": name,
+            "session": session.isoformat(),
+            "started": started,
+            "seconds": round(finished - started, 3),
+            "stages": stages,
+            "symbols": len(symbols),
+            "status": "error" if msg else "ok",
+            "error": msg,
+        }
+        self.store.record_run(entry)
+        return entry
+
+    def serve(self):
+        """ Bucle: revisa cada interval segundos si hay listas pendientes """
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def start(self) -> threading.Thread:
+        """ Ejecuta serve() en un hilo aparte dentro del proceso """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.serve, name="macd-precompute", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,187 @@
+# -----------------------------
+# Caché local de precios OHLCV (SQLite)
+# -----------------------------
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import pandas as pd
+
+from modules.timeframes import TIMEFRAMES, history_days
+
+# Columnas que devuelve yf.download con auto_adjust=False
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+_DB_COLUMNS = ["open", "high", "low", "close", "adj_close", "volume"]
+# Antigüedad máxima de las velas: la ventana más larga que pide el análisis
+# (marco mensual con los parámetros por defecto), más un mes de margen
+DEFAULT_MAX_AGE_DAYS = history_days(TIMEFRAMES) + 31
+
+
+class PriceCache:
+    """
+    Almacén en disco de velas por (símbolo, intervalo). Las velas pasadas no
+    cambian, así que solo hace falta descargar las posteriores a la última
+    guardada. Límites: antigüedad máxima de las velas, cantidad máxima de
+    series y tamaño máximo del archivo (se expulsan las series menos usadas).
+    """
+
+    def __init__(self, cache_dir: str, max_symbols: int = 5000,
+                 max_bytes: int = 500 * 1024 * 1024, max_age_days: int = DEFAULT_MAX_AGE_DAYS):
+        self.cache_dir = cache_dir
+        self.max_symbols = max_symbols
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, "precios.sqlite3")
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS bars ("
+                " symbol TEXT, interval TEXT, date TEXT,"
+                " open REAL, high REAL, low REAL, close REAL, adj_close REAL, volume REAL,"
+                " PRIMARY KEY (symbol, interval, date)) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS series ("
+                " symbol TEXT, interval TEXT, first_date TEXT, last_date TEXT,"
+                " fetched_on TEXT, last_access REAL,"
+                " PRIMARY KEY (symbol, interval))"
+            )
+
+    @contextmanager
+    def _connect(self):
+        # Una conexión (y transacción) por operación: seguro entre hilos y procesos
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_coverage(self, symbols: list[str], interval: str) -> dict:
+        """
+        Rango guardado por símbolo.
+        Retorna { "AAPL": (primera fecha, última fecha, fecha de la última consulta) }
+        """
+        coverage = {}
+        with self._connect() as conn:
+            for symbol in symbols:
+                row = conn.execute(
+                    "SELECT first_date, last_date, fetched_on FROM series WHERE symbol = ? AND interval = ?",
+                    (symbol, interval)
+                ).fetchone()
+                if row:
+                    coverage[symbol] = (pd.Timestamp(row[0]), pd.Timestamp(row[1]), date.fromisoformat(row[2]))
+        return coverage
+
+    def load(self, symbols: list[str], interval: str, start) -> dict:
+        """ Devuelve { "AAPL": DataFrame OHLCV desde start } de los símbolos guardados """
+        start_str = str(pd.Timestamp(start))
+        frames = {}
+        with self._connect() as conn:
+            for symbol in symbols:
+                rows = conn.execute(
+                    "SELECT date, " + ", ".join(_DB_COLUMNS) + " FROM bars"
+                    " WHERE symbol = ? AND interval = ? AND date >= ? ORDER BY date",
+                    (symbol, interval, start_str)
+                ).fetchall()
+                if not rows:
+                    continue
+                df = pd.DataFrame([row[1:] for row in rows], columns=PRICE_COLUMNS, dtype="float64")
+                df.index = pd.DatetimeIndex(pd.to_datetime([row[0] for row in rows]), name="Date")
+                frames[symbol] = df
+            conn.executemany(
+                "UPDATE series SET last_access = ? WHERE symbol = ? AND interval = ?",
+                [(time.time(), symbol, interval) for symbol in frames]
+            )
+        return frames
+
+    def store(self, frames: dict, interval: str, fetched_on: date | None = None, evict: bool = True):
+        """
+        Inserta (o reemplaza) las velas descargadas y registra la fecha de la
+        consulta. Las velas sin Close no se guardan.
+        evict: aplica los límites al terminar (quien guarda por lotes puede
+        llamar a evict() una sola vez al final).
+        """
+        fetched_on = (fetched_on or date.today()).isoformat()
+        with self._connect() as conn:
+            for symbol, df in frames.items():
+                if "Close" in df.columns:
+                    df = df[df["Close"].notna()].reindex(columns=PRICE_COLUMNS)
+                if "Close" in df.columns and not df.empty:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        [
+                            (symbol, interval, str(ts), *[None if pd.isna(v) else float(v) for v in values])
+                            for ts, values in zip(df.index, df.itertuples(index=False, name=None))
+                        ]
+                    )
+                first, last = conn.execute(
+                    "SELECT MIN(date), MAX(date) FROM bars WHERE symbol = ? AND interval = ?",
+                    (symbol, interval)
+                ).fetchone()
+                if first is None:
+                    continue
+                conn.execute(
+                    "INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?, ?)",
+                    (symbol, interval, first, last, fetched_on, time.time())
+                )
+        if evict:
+            self.evict()
+
+    def invalidate(self, symbols: list[str] | None = None, interval: str | None = None):
+        """ Borra las series indicadas (o toda la caché) para forzar una descarga completa """
+        with self._connect() as conn:
+            if symbols is None:
+                conn.execute("DELETE FROM bars")
+                conn.execute("DELETE FROM series")
+                return
+            for symbol in symbols:
+                if interval is None:
+                    conn.execute("DELETE FROM bars WHERE symbol = ?", (symbol,))
+                    conn.execute("DELETE FROM series WHERE symbol = ?", (symbol,))
+                else:
+                    conn.execute("DELETE FROM bars WHERE symbol = ? AND interval = ?", (symbol, interval))
+                    conn.execute("DELETE FROM series WHERE symbol = ? AND interval = ?", (symbol, interval))
+
+    def _used_bytes(self, conn: sqlite3.Connection) -> int:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (page_count - free_pages) * page_size
+
+    def evict(self):
+        """
+        Aplica los límites: borra velas más antiguas que max_age_days y expulsa
+        las series menos usadas mientras se superen max_symbols o max_bytes.
+        """
+        cutoff = str(pd.Timestamp(date.today() - timedelta(days=self.max_age_days)))
+        with self._connect() as conn:
+            conn.execute("DELETE FROM bars WHERE date < ?", (cutoff,))
+            conn.execute(
+                "UPDATE series SET first_date = (SELECT MIN(date) FROM bars"
+                " WHERE bars.symbol = series.symbol AND bars.interval = series.interval)"
+                " WHERE first_date < ?", (cutoff,)
+            )
+            conn.execute("DELETE FROM series WHERE first_date IS NULL")
+
+            lru = conn.execute("SELECT symbol, interval FROM series ORDER BY last_access").fetchall()
+            excess = len(lru) - self.max_symbols
+            while lru and (excess > 0 or self._used_bytes(conn) > self.max_bytes):
+                # Expulsar en tandas del 10% para no medir el tamaño tras cada borrado
+                batch_size = max(excess, len(lru) // 10, 1)
+                batch, lru = lru[:batch_size], lru[batch_size:]
+                for symbol, interval in batch:
+                    conn.execute("DELETE FROM bars WHERE symbol = ? AND interval = ?", (symbol, interval))
+                    conn.execute("DELETE FROM series WHERE symbol = ? AND interval = ?", (symbol, interval))
+                excess -= len(batch)
+
+    def stats(self) -> dict:
+        """ Cantidad de series, velas y bytes ocupados """
+        with self._connect() as conn:
+            return {
+                "series": conn.execute("SELECT COUNT(*) FROM series").fetchone()[0],
+                "bars": conn.execute("SELECT COUNT(*) FROM bars").fetchone()[0],
+                "bytes": self._used_bytes(conn)
+            }
@@ -0,0 +1,142 @@
+# -----------------------------
+# Almacén compacto de velas: un índice de fechas y una matriz por campo
+# -----------------------------
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+OHLCV_FIELDS = ("Open", "High", "Low", "Close", "Adj Close", "Volume")
+
+
+class PriceMatrix(Mapping):
+    """
+    Velas de muchos símbolos en formato columnar: un único índice de fechas
+    compartido y, por cada campo, una matriz contigua símbolos x fechas del
+    tipo elegido (float32 por defecto, la mitad que float64). Las fechas sin
+    vela de un símbolo quedan en NaN.
+    Se comporta como el diccionario { "AAPL": DataFrame } que devuelve la
+    descarga: price_data["AAPL"] arma un DataFrame liviano cuyas columnas son
+    vistas de las matrices (sin copiar), recortado a las fechas del símbolo.
+    Solo si el símbolo tiene huecos intermedios se copian sus filas con datos.
+    Las matrices pueden ser np.memmap (ver SharedPriceStore): las vistas
+    leen directamente del archivo mapeado, compartido entre procesos.
+    """
+
+    def __init__(self, dates: pd.DatetimeIndex, symbols: list[str], arrays: dict, spans=None):
+        self.dates = dates
+        self.symbols = list(symbols)
+        self.arrays = arrays  # { campo: ndarray (símbolos, fechas) }
+        self._positions = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+        # Tramo con datos de cada símbolo (según el primer campo, Close si está).
+        # spans: (inicio, fin, con huecos) ya calculados, para no recorrer las matrices
+        if spans is None:
+            valid = ~np.isnan(self.arrays[self.primary_field])
+            counts = valid.sum(axis=1)
+            has_data = counts > 0
+            start = np.where(has_data, valid.argmax(axis=1), 0)
+            stop = np.where(has_data, valid.shape[1] - valid[:, ::-1].argmax(axis=1), 0)
+            spans = (start, stop, counts < stop - start)
+        self._start, self._stop, self._gapped = (np.asarray(span) for span in spans)
+
+    @classmethod
+    def from_frames(cls, frames: dict, fields=None, dtype="float32") -> "PriceMatrix":
+        """
+        frames: { "AAPL": DataFrame OHLCV } (como YahooFinanceClient.get_data())
+        fields: campos a conservar (None = todos los campos OHLCV presentes)
+        dtype: tipo de las matrices (float32 o float64)
+        """
+        symbols = list(frames)
+        if fields is None:
+            present = set().union(*(df.columns for df in frames.values())) if frames else set()
+            fields = [field for field in OHLCV_FIELDS if field in present] or ["Close"]
+        fields = list(fields)
+
+        # Índice compartido: la unión ordenada de todas las fechas
+        indexes = [frames[symbol].index for symbol in symbols]
+        if indexes:
+            dates = pd.DatetimeIndex(np.unique(np.concatenate([index.to_numpy() for index in indexes])), name="Date")
+            tz = getattr(indexes[0], "tz", None)
+            if tz is not None:
+                dates = dates.tz_localize("UTC").tz_convert(tz)
+        else:
+            dates = pd.DatetimeIndex([], name="Date")
+
+        arrays = {field: np.full((len(symbols), len(dates)), np.nan, dtype=dtype) for field in fields}
+        for row, (symbol, index) in enumerate(zip(symbols, indexes)):
+            df = frames[symbol]
+            # Ambos índices están ordenados: searchsorted ubica cada fecha sin tablas de hash
+            positions = np.searchsorted(dates.asi8, index.asi8)
+            for field in fields:
+                if field in df.columns:
+                    arrays[field][row, positions] = df[field].to_numpy(dtype=dtype)
+        return cls(dates, symbols, arrays)
+
+    @property
+    def fields(self) -> list[str]:
+        return list(self.arrays)
+
+    @property
+    def primary_field(self) -> str:
+        return "Close" if "Close" in self.arrays else next(iter(self.arrays))
+
+    @property
+    def nbytes(self) -> int:
+        """ Memoria de las matrices y del índice de fechas """
+        return sum(array.nbytes for array in self.arrays.values()) + self.dates.nbytes
+
+    def field(self, name: str) -> np.ndarray:
+        """ Matriz símbolos x fechas de un campo """
+        return self.arrays[name]
+
+    def position(self, symbol: str) -> int:
+        """ Fila del símbolo en las matrices """
+        return self._positions[symbol]
+
+    @property
+    def spans(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ Por símbolo: primera columna con datos, fin del tramo y si tiene huecos """
+        return self._start, self._stop, self._gapped
+
+    def _date_position(self, date, side: str = "left") -> int:
+        date = pd.Timestamp(date)
+        if self.dates.tz is not None and date.tzinfo is None:
+            date = date.tz_localize(self.dates.tz)
+        return int(self.dates.searchsorted(date, side=side))
+
+    def covers(self, symbol: str, start) -> bool:
+        """ Si el símbolo tiene velas desde start (o antes) """
+        row = self._positions.get(symbol)
+        if row is None or self._stop[row] == 0:
+            return False
+        return self._start[row] < self._date_position(start, side="right")
+
+    def since(self, start) -> "PriceMatrix":
+        """ Las mismas matrices a partir de la fecha start, como vistas (sin copiar) """
+        offset = self._date_position(start)
+        arrays = {field: array[:, offset:] for field, array in self.arrays.items()}
+        spans = (np.maximum(self._start - offset, 0), np.maximum(self._stop - offset, 0), self._gapped)
+        return PriceMatrix(self.dates[offset:], self.symbols, arrays, spans)
+
+    def __getitem__(self, symbol: str) -> pd.DataFrame:
+        row = self._positions[symbol]
+        rows = slice(self._start[row], self._stop[row])
+        columns = {field: array[row, rows] for field, array in self.arrays.items()}
+        df = pd.DataFrame(columns, index=self.dates[rows], copy=False)
+        if self._gapped[row]:
+            df = df[df[self.primary_field].notna()]
+        return df
+
+    def __iter__(self):
+        return iter(self.symbols)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol) -> bool:
+        return symbol in self._positions
+
+    def to_frames(self) -> dict:
+        """ Copia independiente como { "AAPL": DataFrame } """
+        return {symbol: self[symbol].copy() for symbol in self.symbols}
@@ -0,0 +1,173 @@
+# -----------------------------
+# Proveedores de datos de mercado
+# -----------------------------
+import os
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from modules.timeframes import RESAMPLE_PERIODS, resample_ohlcv
+
+# Frecuencia de las velas de cada intervalo (proveedores locales)
+INTERVAL_FREQ = {"1d": "B", "1wk": "W-FRI", "1mo": "ME"}
+
+
+class MarketDataProvider:
+    """
+    Interfaz común de los proveedores. download() devuelve las velas OHLCV
+    sin limpiar, un DataFrame por símbolo (columnas Open, High, Low, Close,
+    Adj Close, Volume e índice de fechas). Los símbolos que el proveedor no
+    conoce simplemente no aparecen; YahooFinanceClient asigna los estados.
+    """
+    name = "base"
+    requires_network = False
+
+    def download(self, symbols: list[str], start_str: str, end_str: str, interval: str) -> dict:
+        raise NotImplementedError
+
+    def warm_up(self):
+        """ Inicialización opcional (conexiones, sesiones) """
+        pass
+
+
+class YahooProvider(MarketDataProvider):
+    """ Velas de Yahoo Finance vía yfinance """
+    name = "yahoo"
+    requires_network = True
+
+    def download(self, symbols: list[str], start_str: str, end_str: str, interval: str) -> dict:
+        # Importación perezosa: yfinance es costoso de importar
+        import yfinance as yf
+        data = yf.download(
+            tickers=symbols,
+            start=start_str,
+            end=end_str,
+            interval=interval,
+            progress=False,
+            group_by="ticker",
+            auto_adjust=False,
+            threads=True
+        )
+
+        frames = {}
+        for symbol in symbols:
+            # Detectar si las columnas tienen MultiIndex (varios tickers) o no (único ticker)
+            if isinstance(data.columns, pd.MultiIndex):
+                if symbol not in data.columns.levels[0]:
+                    continue
+                frames[symbol] = data[symbol]
+            else:
+                frames[symbol] = data  # único ticker → DataFrame plano
+        return frames
+
+    def warm_up(self):
+        # Warm-up para inicializar la sesión de yfinance
+        try:
+            import yfinance as yf
+            yf.download("AAPL", period="1d", interval="1d", progress=False)
+        except Exception:
+            pass
+
+
+class SyntheticProvider(MarketDataProvider):
+    """
+    Generador determinista sin red para pruebas y benchmarks. El precio de
+    cada (símbolo, fecha) depende solo de ese par, así que cualquier ventana
+    devuelve siempre las mismas velas. Combina ondas de distinto período
+    (para que haya cruces del MACD) con ruido pseudoaleatorio.
+    unknown_symbols: símbolos que el proveedor trata como inexistentes.
+    """
+    name = "synthetic"
+
+    def __init__(self, seed: int = 0, unknown_symbols: set[str] | None = None):
+        self.seed = seed
+        self.unknown_symbols = set(unknown_symbols or ())
+
+    def _symbol_params(self, symbol: str) -> tuple:
+        rng = np.random.default_rng(zlib.crc32(f"{self.seed}:{symbol}".encode()))
+        base = rng.uniform(10, 500)
+        periods = rng.uniform(15, 120, size=3)
+        phases = rng.uniform(0, 2 * np.pi, size=3)
+        amplitudes = rng.uniform(0.02, 0.15, size=3)
+        noise_key = rng.uniform(1, 1000)
+        return base, periods, phases, amplitudes, noise_key
+
+    def download(self, symbols: list[str], start_str: str, end_str: str, interval: str) -> dict:
+        freq = INTERVAL_FREQ.get(interval, "B")
+        index = pd.date_range(start_str, end_str, freq=freq, inclusive="left", name="Date")
+        if freq == "B":
+            index = index.normalize()
+        days = (index.to_numpy(dtype="datetime64[D]").astype(np.int64)).astype(np.float64)
+
+        frames = {}
+        for symbol in symbols:
+            if symbol in self.unknown_symbols:
+                continue
+            base, periods, phases, amplitudes, noise_key = self._symbol_params(symbol)
+            waves = (amplitudes[:, None] * np.sin(2 * np.pi * days[None, :] / periods[:, None] + phases[:, None])).sum(axis=0)
+            # Ruido determinista por fecha (hash trigonométrico)
+            noise = np.modf(np.abs(np.sin(days * 12.9898 + noise_key) * 43758.5453))[0] - 0.5
+            close = base * np.exp(waves + 0.01 * noise)
+            spread = close * 0.01 * (1 + np.abs(noise))
+            frames[symbol] = pd.DataFrame({
+                "Open": close - spread * noise,
+                "High": close + spread,
+                "Low": close - spread,
+                "Close": close,
+                "Adj Close": close,
+                "Volume": np.round(1e6 * (1.5 + noise))
+            }, index=index)
+        return frames
+
+
+class CsvProvider(MarketDataProvider):
+    """
+    Velas guardadas localmente: un archivo <SÍMBOLO>.csv (o .parquet, si
+    pyarrow está instalado) por símbolo con una columna de fecha como
+    primera columna y las columnas OHLCV. Los archivos son diarios: las
+    velas semanales y mensuales se arman por remuestreo.
+    """
+    name = "csv"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _read(self, symbol: str) -> pd.DataFrame | None:
+        csv_path = os.path.join(self.directory, f"{symbol}.csv")
+        parquet_path = os.path.join(self.directory, f"{symbol}.parquet")
+        if os.path.exists(csv_path):
+            return pd.read_csv(csv_path, index_col=0, parse_dates=True)
+        if os.path.exists(parquet_path):
+            return pd.read_parquet(parquet_path)
+        return None
+
+    def download(self, symbols: list[str], start_str: str, end_str: str, interval: str) -> dict:
+        if interval != "1d" and interval not in RESAMPLE_PERIODS:
+            raise ValueError(f"Intervalo no disponible en archivos locales: {interval}")
+        start, end = pd.Timestamp(start_str), pd.Timestamp(end_str)
+        frames = {}
+        for symbol in symbols:
+            df = self._read(symbol)
+            if df is None:
+                continue
+            if interval != "1d":
+                # Cada vela queda fechada con su último día operado
+                df = resample_ohlcv({symbol: df[df.index < end]}, interval).get(symbol, df.iloc[:0])
+            frames[symbol] = df[(df.index >= start) & (df.index < end)]
+        return frames
+
+
+def create_provider(spec: str | None) -> MarketDataProvider:
+    """
+    Crea un proveedor a partir de su nombre:
+    "yahoo" (por defecto), "synthetic" o "csv:<directorio>".
+    """
+    spec = (spec or "yahoo").strip()
+    if spec == "yahoo":
+        return YahooProvider()
+    if spec == "synthetic":
+        return SyntheticProvider()
+    if spec.startswith("csv:"):
+        return CsvProvider(spec[len("csv:"):])
+    raise ValueError(f"Proveedor de datos desconocido: {spec}")
@@ -0,0 +1,100 @@
+# -----------------------------
+# Caché de resultados del análisis
+# -----------------------------
+import sys
+import threading
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    Caché en memoria de resultados por (símbolo, intervalo, sesión) con
+    expulsión LRU y límite de memoria. Al cerrar una sesión nueva, las
+    entradas de sesiones anteriores dejan de ser válidas y se descartan.
+    """
+
+    def __init__(self, max_entries: int = 50000, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # {(símbolo, intervalo, sesión): resultado}
+        self._bytes = 0
+        self._session = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _entry_size(key: tuple, result: dict) -> int:
+        """ Tamaño aproximado de una entrada (clave + diccionario + textos) """
+        size = sys.getsizeof(key) + sys.getsizeof(result)
+        size += sum(sys.getsizeof(part) for part in key)
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in result.items())
+        return size
+
+    def _advance_session(self, session):
+        # Sesión nueva: todo lo anterior expira de una vez
+        if self._session is None or session > self._session:
+            if self._session is not None:
+                self._entries.clear()
+                self._bytes = 0
+            self._session = session
+
+    def get_many(self, symbols: list[str], interval: str, session) -> tuple[dict, list[str]]:
+        """
+        Busca los símbolos en la caché.
+        Retorna ({símbolo: resultado} encontrados, [símbolos faltantes]).
+        """
+        found, missing = {}, []
+        with self._lock:
+            self._advance_session(session)
+            for symbol in symbols:
+                key = (symbol, interval, session)
+                entry = self._entries.get(key)
+                if entry is None:
+                    missing.append(symbol)
+                    self.misses += 1
+                    continue
+                self._entries.move_to_end(key)
+                found[symbol] = dict(entry[0])
+                self.hits += 1
+        return found, missing
+
+    def put_many(self, results: dict, interval: str, session):
+        """ Guarda {símbolo: resultado}; los estados de error no se guardan (pueden ser transitorios) """
+        with self._lock:
+            self._advance_session(session)
+            if session < self._session:
+                return
+            for symbol, result in results.items():
+                if str(result.get("estado", "")).startswith("Error"):
+                    continue
+                key = (symbol, interval, session)
+                old = self._entries.pop(key, None)
+                if old is not None:
+                    self._bytes -= old[1]
+                size = self._entry_size(key, result)
+                self._entries[key] = (dict(result), size)
+                self._bytes += size
+
+            # Expulsar las entradas menos usadas hasta respetar los límites
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, size) = self._entries.popitem(last=False)
+                self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """ Aciertos, fallos, entradas y bytes estimados """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "session": str(self._session) if self._session else None
+            }
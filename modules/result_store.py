@@ -0,0 +1,128 @@
+# -----------------------------
+# Almacén de resultados del lado del servidor
+# -----------------------------
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class StoredResults:
+    """
+    Resultados de un análisis con índices precalculados por señal y por
+    estado, para filtrar sin recorrer todas las filas.
+    """
+
+    def __init__(self, results: dict, by_signal: dict | None = None, by_status: dict | None = None):
+        self.results = results
+        self.by_signal = by_signal  # {"COMPRA": ["AAPL", ...], ...}
+        self.by_status = by_status  # {"OK": ["AAPL", ...], ...}
+        if by_signal is None or by_status is None:
+            self.by_signal, self.by_status = {}, {}
+            for symbol, data in results.items():
+                self.by_signal.setdefault(data["señal"], []).append(symbol)
+                self.by_status.setdefault(data["estado"], []).append(symbol)
+
+    def filter(self, signal: str = "TODO", status: str = "TODO") -> dict:
+        """ Filtra por señal y/o estado ("TODO" no filtra), manteniendo el orden original """
+        if signal == "TODO" and status == "TODO":
+            return self.results
+        if signal == "TODO":
+            symbols = self.by_status.get(status, [])
+        elif status == "TODO":
+            symbols = self.by_signal.get(signal, [])
+        else:
+            with_status = set(self.by_status.get(status, []))
+            symbols = [s for s in self.by_signal.get(signal, []) if s in with_status]
+        return {symbol: self.results[symbol] for symbol in symbols}
+
+
+class ResultStore:
+    """
+    Guarda los resultados bajo un id durante ttl segundos, para que filtrar
+    o exportar solo envíe el id. Mantiene en memoria los max_entries más
+    recientes; con directory, además los escribe en disco (con sus índices)
+    para que cualquier worker de gunicorn pueda atender el id. Los vencidos
+    se borran como mucho una vez cada purge_interval segundos.
+    """
+
+    def __init__(self, directory: str | None = None, ttl: int = 3600, max_entries: int = 500,
+                 purge_interval: float = 60):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.purge_interval = purge_interval
+        self._next_purge = 0.0
+        self._entries = OrderedDict()  # {id: (vencimiento, StoredResults)}
+        self._lock = threading.Lock()
+
+    def _path(self, result_id: str) -> str:
+        return os.path.join(self.directory, f"{result_id}.json")
+
+    def put(self, results: dict) -> str:
+        result_id = uuid.uuid4().hex
+        stored = StoredResults(results)
+        expires = time.time() + self.ttl
+        if self.directory:
+            # Escritura atómica: archivo temporal + reemplazo (el directorio se crea al primer uso)
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = self._path(result_id) + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "expires": expires,
+                    "results": results,
+                    "by_signal": stored.by_signal,
+                    "by_status": stored.by_status
+                }, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(result_id))
+        with self._lock:
+            self._purge()
+            self._entries[result_id] = (expires, stored)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result_id
+
+    def get(self, result_id: str) -> StoredResults | None:
+        """ Resultados guardados, o None si el id no existe o venció """
+        with self._lock:
+            entry = self._entries.get(result_id)
+        if entry is None:
+            entry = self._load(result_id)
+        if entry is None or entry[0] < time.time():
+            with self._lock:
+                self._entries.pop(result_id, None)
+            return None
+        return entry[1]
+
+    def _load(self, result_id: str):
+        # Resultados creados por otro worker (o expulsados de la memoria)
+        if not self.directory or not result_id.isalnum():
+            return None
+        try:
+            with open(self._path(result_id), encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        entry = (data["expires"], StoredResults(data["results"], data["by_signal"], data["by_status"]))
+        with self._lock:
+            self._entries[result_id] = entry
+        return entry
+
+    def _purge(self):
+        # Recorrer el directorio en cada put es caro: solo cada purge_interval segundos
+        now = time.time()
+        if now < self._next_purge:
+            return
+        self._next_purge = now + self.purge_interval
+        for result_id in [rid for rid, (expires, _) in self._entries.items() if expires < now]:
+            del self._entries[result_id]
+        if self.directory and os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                try:
+                    if os.path.getmtime(path) + self.ttl < now:
+                        os.remove(path)
+                except OSError:
+                    pass
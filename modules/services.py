@@ -0,0 +1,202 @@
+# -----------------------------
+# Servicios de la aplicación (creación perezosa)
+# -----------------------------
+import os
+import threading
+from modules.error_manager import ErrorManager
+from modules.result_cache import ResultCache
+from modules.jobs import JobManager
+from modules.result_store import ResultStore
+from modules.precompute import PrecomputeScheduler, SnapshotStore
+from modules.metrics import MetricsRegistry
+from modules.ema_state import EMAStateCache
+
+
+class AppServices:
+    """
+    Contenedor de los gestores que usa la aplicación. Los que dependen de
+    pandas, yfinance u openpyxl se importan y crean recién en el primer uso,
+    para que el arranque de cada worker no pague esas importaciones ni la
+    conexión inicial con Yahoo.
+    Solo se comparten objetos seguros entre hilos (proveedor, cachés y el
+    estado de las EMAs); los gestores de cada etapa guardan el último
+    resultado en sus atributos, así que se crea uno nuevo por análisis.
+    """
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.error_manager = ErrorManager()
+        # Duración por etapa, estados, señales y aciertos de caché (ruta /metrics)
+        self.metrics = MetricsRegistry()
+        # Resultados por (símbolo, intervalo, última sesión) para listas repetidas
+        self.result_cache = ResultCache()
+        # Análisis largos en segundo plano
+        self.job_manager = JobManager(max_workers=config["MACD_JOB_WORKERS"])
+        # Resultados mostrados, guardados por id para filtrar y exportar
+        self.result_store = ResultStore(
+            os.path.join(config["MACD_CACHE_DIR"], "resultados"),
+            ttl=config["MACD_RESULTS_TTL"]
+        )
+        # Listas guardadas y sus resultados precalculados después del cierre
+        self.snapshot_store = SnapshotStore(os.path.join(config["MACD_CACHE_DIR"], "precalculo"))
+        self.scheduler = PrecomputeScheduler(self, self.snapshot_store, interval=config["MACD_PRECOMPUTE_INTERVAL"])
+        self._lock = threading.Lock()
+        self._provider = None
+        self._price_cache = None
+        self._symbol_universe = None
+        self._resample_cache = None
+        self._shared_prices = None
+        # Estado incremental de las EMAs compartido por todas las calculadoras (LRU)
+        self.ema_state = EMAStateCache(max_entries=config["MACD_EMA_STATE_MAX"])
+
+    def provider(self):
+        """ Proveedor de velas (MACD_DATA_PROVIDER: yahoo, synthetic o csv:<dir>) """
+        with self._lock:
+            if self._provider is None:
+                from modules.providers import create_provider
+                self._provider = create_provider(self.config["MACD_DATA_PROVIDER"])
+            return self._provider
+
+    def price_cache(self):
+        """ Caché local de velas, un subdirectorio por proveedor dentro de MACD_CACHE_DIR """
+        provider = self.provider()
+        with self._lock:
+            if self._price_cache is None:
+                from modules.price_cache import PriceCache
+                self._price_cache = PriceCache(os.path.join(self.config["MACD_CACHE_DIR"], provider.name))
+            return self._price_cache
+
+    def shared_prices(self):
+        """
+        Almacén de velas compartido entre los procesos (workers de gunicorn):
+        lo publica el precálculo y los demás lo leen mapeado en memoria.
+        None si MACD_SHARED_PRICES está apagado.
+        """
+        if not self.config["MACD_SHARED_PRICES"]:
+            return None
+        provider = self.provider()
+        with self._lock:
+            if self._shared_prices is None:
+                from modules.shared_prices import SharedPriceStore
+                directory = self.config["MACD_SHARED_PRICES_DIR"] or os.path.join(self.config["MACD_CACHE_DIR"], "compartido")
+                self._shared_prices = SharedPriceStore(os.path.join(directory, provider.name))
+            return self._shared_prices
+
+    def publish_shared_prices(self, symbols: list[str], session=None) -> str | None:
+        """
+        Descarga (o toma de la caché) las velas diarias de los símbolos y las
+        publica como nueva versión del almacén compartido.
+        Retorna la versión publicada, o None si el almacén está apagado.
+        """
+        store = self.shared_prices()
+        if store is None:
+            return None
+        from modules.market_calendar import latest_daily_bar
+        from modules.price_matrix import PriceMatrix
+        client = self.yahoo_client()
+        client.shared_prices = None  # Se publica desde la caché de velas, no desde la versión anterior
+        client.compact = False
+        success, msg = client.fetch_data(symbols, min_days=self.config["MACD_SHARED_PRICES_DAYS"])
+        if not success:
+            raise RuntimeError(msg)
+        with self.metrics.timer("publicacion"):
+            # Siempre float64: el MACD de un símbolo servido desde el almacén tiene que
+            # ser el mismo que el calculado desde la caché o la descarga
+            matrix = PriceMatrix.from_frames(client.get_data(), fields=client.price_fields, dtype="float64")
+            return store.publish(matrix, session or latest_daily_bar())
+
+    def yahoo_client(self):
+        """ Un cliente nuevo (guarda las velas de una sola descarga) """
+        provider = self.provider()
+        cache = self.price_cache()
+        shared_prices = self.shared_prices()
+        from modules.yahoo_client import YahooFinanceClient
+        return YahooFinanceClient(
+            self.error_manager, cache=cache, provider=provider,
+            chunk_size=self.config["MACD_CHUNK_SIZE"],
+            max_workers=self.config["MACD_MAX_WORKERS"],
+            metrics=self.metrics,
+            compact=self.config["MACD_COMPACT_PRICES"],
+            price_fields=[f.strip() for f in self.config["MACD_PRICE_FIELDS"].split(",") if f.strip()] or None,
+            price_dtype=self.config["MACD_PRICE_DTYPE"],
+            shared_prices=shared_prices
+        )
+
+    def macd_calculator(self, shared_state: bool = True, fast: int = 12, slow: int = 26, signal: int = 9,
+                        interval: str = "1d"):
+        """
+        Una calculadora nueva. Con shared_state comparte el estado incremental
+        de las EMAs (velas de la descarga); sin él calcula desde cero (velas
+        remuestreadas, cuyo último período cambia mientras está en curso, o
+        parámetros distintos de los del análisis).
+        """
+        from modules.indicators import MACDCalculator
+        return MACDCalculator(fast, slow, signal, ema_state=self.ema_state if shared_state else None,
+                              interval=interval)
+
+    def resample_cache(self):
+        """ Caché de velas remuestreadas (semanales/mensuales), compartida entre análisis """
+        with self._lock:
+            if self._resample_cache is None:
+                from modules.timeframes import ResampleCache
+                self._resample_cache = ResampleCache()
+            return self._resample_cache
+
+    def classifier(self):
+        from modules.classificator import MACDSignalClassifier
+        return MACDSignalClassifier()
+
+    def results_manager(self):
+        from modules.show_results import AnalysisResultsManager
+        return AnalysisResultsManager()
+
+    def excel_handler(self):
+        from modules.excel_handler import ExcelHandler
+        return ExcelHandler(self.error_manager, max_symbols=self.config["MACD_MAX_SYMBOLS"])
+
+    def symbol_universe(self):
+        """
+        Índice de símbolos existentes (MACD_SYMBOLS_FILE), o None si no se
+        configuró un listado. Se recarga si el archivo cambió.
+        """
+        path = self.config["MACD_SYMBOLS_FILE"]
+        if not path:
+            return None
+        with self._lock:
+            if self._symbol_universe is None:
+                from modules.symbol_universe import SymbolUniverse
+                self._symbol_universe = SymbolUniverse(path)
+                return self._symbol_universe
+        self._symbol_universe.refresh()
+        return self._symbol_universe
+
+    def symbols_manager(self, max_symbols: int | None = None):
+        """ Un SymbolsManager nuevo (guarda el resultado de una sola validación) """
+        from modules.symbols_manager import SymbolsManager
+        return SymbolsManager(
+            self.error_manager, max_symbols=max_symbols or self.config["MACD_MAX_SYMBOLS"],
+            universe=self.symbol_universe()
+        )
+
+    def warm_up(self):
+        """ Importa los módulos pesados e inicializa la sesión de yfinance """
+        self.macd_calculator()
+        self.classifier()
+        self.provider().warm_up()
+
+    def start_background_warm_up(self) -> threading.Thread:
+        """ Ejecuta warm_up en un hilo aparte para no demorar el arranque """
+        thread = threading.Thread(target=self.warm_up, name="macd-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def cache_stats(self) -> dict:
+        """ Estadísticas de las cachés (la de precios solo si ya fue creada) """
+        stats = {"resultados": self.result_cache.stats()}
+        if self._price_cache is not None:
+            stats["precios"] = self._price_cache.stats()
+        if self._resample_cache is not None:
+            stats["remuestreo"] = self._resample_cache.stats()
+        if self._shared_prices is not None:
+            stats["compartida"] = self._shared_prices.stats()
+        return stats
@@ -0,0 +1,136 @@
+# -----------------------------
+# Almacén de velas compartido entre procesos (archivos mapeados en memoria)
+# -----------------------------
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from modules.precompute import _read_json, _write_json
+from modules.price_matrix import PriceMatrix
+
+
+class SharedPriceStore:
+    """
+    Velas de una sesión publicadas por un solo proceso (el precálculo) y
+    leídas por todos los workers sin copiarlas: cada versión es un
+    directorio con un .npy por campo (matriz símbolos x fechas), las fechas,
+    los tramos con datos de cada símbolo y un index.json con la fila de cada
+    símbolo. Los workers abren los .npy con np.load(mmap_mode="r"): las
+    páginas quedan en la caché del sistema operativo, una sola vez para
+    todos los procesos, y cada símbolo es una vista de solo lectura.
+    Publicar escribe la versión completa en un directorio temporal, lo
+    renombra y recién entonces reemplaza el puntero <intervalo>.json
+    (os.replace, atómico): quien lee ve la versión anterior o la nueva,
+    nunca una a medio escribir. Se conservan las últimas keep versiones;
+    borrar una que un proceso todavía tiene mapeada es seguro en POSIX.
+    """
+
+    def __init__(self, directory: str, keep: int = 2):
+        self.directory = directory
+        self.keep = max(2, keep)
+        self._opened = {}  # { intervalo: (stat del puntero, puntero, PriceMatrix) }
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _pointer_path(self, interval: str) -> str:
+        return os.path.join(self.directory, f"{interval}.json")
+
+    def publish(self, matrix: PriceMatrix, session: date, interval: str = "1d") -> str:
+        """ Publica las velas de la sesión como nueva versión. Retorna su nombre """
+        version = f"{interval}-{session.isoformat()}-{uuid.uuid4().hex[:8]}"
+        tmp_dir = os.path.join(self.directory, f".{version}.tmp")
+        os.makedirs(tmp_dir)
+
+        fields = {}
+        for i, (field, array) in enumerate(matrix.arrays.items()):
+            fields[field] = f"campo_{i}.npy"
+            np.save(os.path.join(tmp_dir, fields[field]), np.ascontiguousarray(array))
+        dates = matrix.dates
+        utc = dates.tz_convert("UTC").tz_localize(None) if dates.tz is not None else dates
+        np.save(os.path.join(tmp_dir, "fechas.npy"), utc.to_numpy())
+        np.save(os.path.join(tmp_dir, "tramos.npy"), np.stack([np.asarray(span, dtype=np.int64) for span in matrix.spans]))
+        _write_json(os.path.join(tmp_dir, "index.json"), {
+            "version": version,
+            "interval": interval,
+            "session": session.isoformat(),
+            "created": time.time(),
+            "tz": str(dates.tz) if dates.tz is not None else None,
+            "fields": fields,
+            "symbols": {symbol: row for row, symbol in enumerate(matrix.symbols)},
+        })
+
+        os.replace(tmp_dir, os.path.join(self.directory, version))
+        _write_json(self._pointer_path(interval), {"version": version, "session": session.isoformat()})
+        self._cleanup(interval, version)
+        return version
+
+    def _cleanup(self, interval: str, current: str):
+        """ Borra las versiones más viejas del intervalo (y temporales abandonados) """
+        versions = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(f".{interval}-") and time.time() - os.path.getmtime(path) > 3600:
+                shutil.rmtree(path, ignore_errors=True)
+            elif name.startswith(f"{interval}-") and os.path.isdir(path) and name != current:
+                versions.append((os.path.getmtime(path), path))
+        for _, path in sorted(versions)[:max(0, len(versions) - (self.keep - 1))]:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def _open(self, version: str) -> PriceMatrix:
+        """ Abre una versión: matrices mapeadas en memoria, sin leerlas """
+        path = os.path.join(self.directory, version)
+        with open(os.path.join(path, "index.json"), encoding="utf-8") as f:
+            index = json.load(f)
+        dates = pd.DatetimeIndex(np.load(os.path.join(path, "fechas.npy")), name="Date")
+        if index["tz"]:
+            dates = dates.tz_localize("UTC").tz_convert(index["tz"])
+        arrays = {field: np.load(os.path.join(path, name), mmap_mode="r") for field, name in index["fields"].items()}
+        start, stop, gapped = np.load(os.path.join(path, "tramos.npy"))
+        symbols = sorted(index["symbols"], key=index["symbols"].get)
+        return PriceMatrix(dates, symbols, arrays, spans=(start, stop, gapped.astype(bool)))
+
+    def session(self, interval: str = "1d") -> str | None:
+        """ Sesión (ISO) de la versión publicada, o None """
+        pointer = _read_json(self._pointer_path(interval))
+        return pointer["session"] if pointer else None
+
+    def current(self, interval: str = "1d", session: date | None = None) -> PriceMatrix | None:
+        """
+        Versión publicada del intervalo, abierta una sola vez por proceso y
+        reabierta solo cuando cambia el puntero. None si no hay, si no se
+        puede abrir o si es de una sesión anterior a session.
+        """
+        try:
+            stat = os.stat(self._pointer_path(interval))
+        except OSError:
+            return None
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            opened = self._opened.get(interval)
+            if opened is None or opened[0] != key:
+                pointer = _read_json(self._pointer_path(interval))
+                try:
+                    opened = (key, pointer, self._open(pointer["version"]))
+                except (OSError, ValueError, KeyError, TypeError):
+                    # Versión reemplazada y borrada mientras se abría: se usa la descarga normal
+                    return None
+                self._opened[interval] = opened
+        _, pointer, matrix = opened
+        if session is not None and pointer["session"] < session.isoformat():
+            return None
+        return matrix
+
+    def stats(self) -> dict:
+        """ Versiones publicadas y tamaño de las matrices abiertas en este proceso """
+        with self._lock:
+            opened = {interval: {"version": pointer["version"], "session": pointer["session"],
+                                 "simbolos": len(matrix), "bytes": matrix.nbytes}
+                      for interval, (_, pointer, matrix) in self._opened.items()}
+        return {"directorio": self.directory, "abiertas": opened}
@@ -2,7 +2,7 @@ class AnalysisResultsManager:
     def __init__(self):
         self.results = {}  # { "AAPL": {"estado": "OK", "señal": "compra"} }
 
-    def build_results(self, symbols_status: dict, classified_signals: dict):
+    def build_results(self, symbols_status: dict, classified_signals: dict) -> dict:
         self.results.clear()
         for symbol, estado in symbols_status.items():
             señal = classified_signals.get(symbol, "NULO").upper()
@@ -10,6 +10,7 @@ class AnalysisResultsManager:
                 "estado": estado,
                 "señal": señal
             }
+        return self.results
 
     def get_all_results(self):
         """Retorna todos los resultados del análisis."""
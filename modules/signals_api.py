@@ -0,0 +1,133 @@
+# -----------------------------
+# API JSON de señales por lotes (/api/v1/signals)
+# -----------------------------
+import hashlib
+import json
+import math
+
+from modules.timeframes import TIMEFRAMES, history_days
+
+API_VERSION = 1
+API_DEFAULTS = {"fast": 12, "slow": 26, "signal": 9, "interval": "1d", "include_values": False}
+# Tope de los períodos del MACD: más allá la ventana de descarga no tiene sentido
+MAX_PERIOD = 500
+
+
+def _as_bool(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "si", "sí", "yes")
+    return bool(value)
+
+
+def parse_request(data: dict) -> tuple[dict | None, str | None]:
+    """
+    Valida el cuerpo JSON (o los parámetros de la URL) de una consulta:
+      symbols: lista de símbolos o texto separado por comas (obligatorio)
+      fast, slow, signal: parámetros del MACD (12, 26, 9 por defecto, hasta MAX_PERIOD)
+      interval: "1d", "1wk" o "1mo"
+      include_values: agrega los últimos MACD, Signal e Histogram
+      force_refresh: ignora las velas en caché
+    Retorna (parámetros normalizados, None) o (None, detalle del error).
+    """
+    if not isinstance(data, dict):
+        return None, "se esperaba un objeto JSON"
+
+    symbols = data.get("symbols")
+    if isinstance(symbols, str):
+        symbols = symbols.split(",")
+    if not isinstance(symbols, list) or not all(isinstance(symbol, str) for symbol in symbols):
+        return None, "symbols debe ser una lista de símbolos"
+    symbols = [symbol.strip().upper() for symbol in symbols if symbol.strip()]
+    if not symbols:
+        return None, "symbols no puede estar vacío"
+
+    params = {"symbols": symbols}
+    for key in ("fast", "slow", "signal"):
+        value = data.get(key, API_DEFAULTS[key])
+        try:
+            params[key] = int(value)
+        except (TypeError, ValueError):
+            return None, f"{key} debe ser un entero"
+        if isinstance(value, float) and value != params[key]:
+            return None, f"{key} debe ser un entero"
+        if params[key] > MAX_PERIOD:
+            return None, f"{key} no puede ser mayor que {MAX_PERIOD}"
+    if not 0 < params["fast"] < params["slow"] or params["signal"] <= 0:
+        return None, "se requiere 0 < fast < slow y signal > 0"
+
+    params["interval"] = data.get("interval", API_DEFAULTS["interval"])
+    if params["interval"] not in TIMEFRAMES:
+        return None, f"interval debe ser uno de {', '.join(TIMEFRAMES)}"
+    params["include_values"] = _as_bool(data.get("include_values", API_DEFAULTS["include_values"]))
+    params["force_refresh"] = _as_bool(data.get("force_refresh", False))
+    return params, None
+
+
+def request_etag(params: dict, session) -> str:
+    """
+    ETag de una consulta: la fecha de la última vela que entra en el análisis
+    más los parámetros. Mientras no cierre otra sesión la respuesta no cambia,
+    así que se puede contestar 304 sin descargar ni calcular nada.
+    """
+    key = {name: value for name, value in params.items() if name != "force_refresh"}
+    key["sesion"] = session.isoformat()
+    key["version"] = API_VERSION
+    return hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+def _number(value) -> float | None:
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+def compute_signals(services, params: dict) -> tuple[dict, str | None]:
+    """
+    Descarga (o toma de la caché) las velas, calcula el MACD con los
+    parámetros pedidos y clasifica la última vela de cada símbolo.
+    Retorna ({ "AAPL": {"estado", "señal", "ultima_vela"[, "macd", "signal", "histograma"]} }, None)
+    o ({}, mensaje de error).
+    """
+    symbols = params["symbols"]
+    fast, slow, signal = params["fast"], params["slow"], params["signal"]
+    metrics = services.metrics
+
+    yahoo_client = services.yahoo_client()
+    success, msg = yahoo_client.fetch_data(symbols, min_days=history_days([params["interval"]], slow, signal),
+                                           interval=params["interval"], force_refresh=params["force_refresh"])
+    if not success:
+        return {}, msg
+
+    # Con los parámetros y el marco diario del análisis se reutiliza el estado incremental de las EMAs
+    with metrics.timer("macd"):
+        if (fast, slow, signal, params["interval"]) == (API_DEFAULTS["fast"], API_DEFAULTS["slow"],
+                                                        API_DEFAULTS["signal"], "1d"):
+            calculator = services.macd_calculator()
+            if params["force_refresh"]:
+                calculator.reset_state(symbols)
+            macd_data, macd_status = calculator.calculate_macd_incremental(
+                yahoo_client.get_data(), yahoo_client.get_status())
+        else:
+            calculator = services.macd_calculator(shared_state=False, fast=fast, slow=slow, signal=signal,
+                                                  interval=params["interval"])
+            macd_data, macd_status = calculator.calculate_macd_batch(yahoo_client.get_data(), yahoo_client.get_status())
+    with metrics.timer("clasificacion"):
+        classified = services.classifier().classify_all(macd_data, macd_status)
+
+    with metrics.timer("resultados"):
+        results = {}
+        for symbol in symbols:
+            if symbol not in macd_status:
+                continue
+            data = {"estado": macd_status[symbol], "señal": classified.get(symbol, "NULO").upper(), "ultima_vela": None}
+            df = macd_data.get(symbol)
+            if df is not None and len(df):
+                data["ultima_vela"] = df.index[-1].date().isoformat()
+                if params["include_values"]:
+                    last = df.iloc[-1]
+                    data.update(macd=_number(last["MACD"]), signal=_number(last["Signal"]),
+                                histograma=_number(last["Histogram"]))
+            elif params["include_values"]:
+                data.update(macd=None, signal=None, histograma=None)
+            results[symbol] = data
+    metrics.symbols_processed.inc(len(results), stage="api")
+    return results, None
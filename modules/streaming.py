@@ -0,0 +1,58 @@
+# -----------------------------
+# Etapas en flujo: un hilo productor y una cola acotada
+# -----------------------------
+import queue
+import threading
+
+_END = object()
+
+
+def prefetch(iterable, maxsize: int = 2, initializer=None):
+    """
+    Recorre iterable en un hilo aparte y entrega sus elementos a medida que
+    llegan, con a lo sumo maxsize elementos esperando en la cola: si quien
+    consume se demora, el productor se detiene (contrapresión).
+    initializer(): opcional, se ejecuta en el hilo productor antes de empezar.
+    Las excepciones del productor se vuelven a lanzar en quien consume. Si el
+    consumo termina antes de tiempo, el productor cierra iterable y termina.
+    """
+    items = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        iterator = iter(iterable)
+        try:
+            if initializer:
+                initializer()
+            for item in iterator:
+                if not put((item, None)):
+                    break
+            put((_END, None))
+        except Exception as e:
+            put((_END, e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close:
+                close()
+
+    producer = threading.Thread(target=produce, name="macd-stream", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is _END:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
@@ -0,0 +1,92 @@
+# -----------------------------
+# Universo de símbolos conocidos (validación sin conexión)
+# -----------------------------
+import csv
+import os
+import threading
+from bisect import bisect_left
+
+# Nombres de columna aceptados para el símbolo y la descripción
+SYMBOL_COLUMNS = ("Symbol", "Símbolo", "Simbolo", "Ticker", "ACT Symbol")
+NAME_COLUMNS = ("Security Name", "Name", "Nombre", "Company Name")
+
+
+class SymbolUniverse:
+    """
+    Índice local de los símbolos existentes, cargado desde un listado
+    (p. ej. nasdaqlisted.txt / otherlisted.txt, un CSV/TSV con columna
+    Symbol, o un símbolo por línea).
+    Guarda un set para la búsqueda exacta y una lista ordenada para buscar
+    por prefijo con bisect. refresh() recarga el archivo si cambió.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        # Se reemplazan juntos, así los lectores nunca ven un índice a medias
+        self._index = (frozenset(), [], {})  # (set, lista ordenada, {símbolo: nombre})
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """ Recarga el listado si el archivo cambió. Retorna True si se recargó """
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        with self._lock:
+            if mtime == self._mtime:
+                return False
+            names = self._read_listing(self.path)
+            self._index = (frozenset(names), sorted(names), names)
+            self._mtime = mtime
+            return True
+
+    @staticmethod
+    def _read_listing(path: str) -> dict:
+        """ {símbolo: nombre} del listado; el separador se deduce del encabezado """
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            header_line = f.readline()
+            delimiter = max("|,;\t", key=header_line.count)
+            header = [col.strip() for col in header_line.rstrip("\r\n").split(delimiter)]
+            symbol_col = next((header.index(col) for col in SYMBOL_COLUMNS if col in header), None)
+            name_col = next((header.index(col) for col in NAME_COLUMNS if col in header), None)
+
+            names = {}
+            if symbol_col is None:
+                # Sin encabezado reconocible: un símbolo por línea (incluida la primera)
+                symbol_col = 0
+                f.seek(0)
+            for row in csv.reader(f, delimiter=delimiter):
+                if len(row) <= symbol_col:
+                    continue
+                symbol = row[symbol_col].strip().upper()
+                # Los listados de NASDAQ terminan con "File Creation Time: ..."
+                if not symbol or symbol.startswith("FILE CREATION TIME"):
+                    continue
+                names[symbol] = row[name_col].strip() if name_col is not None and len(row) > name_col else ""
+            return names
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.upper() in self._index[0]
+
+    def __len__(self) -> int:
+        return len(self._index[1])
+
+    def symbols(self) -> frozenset:
+        """ Set de símbolos para validar listas completas """
+        return self._index[0]
+
+    def prefix(self, prefix: str, limit: int = 10) -> list[tuple[str, str]]:
+        """ Hasta limit (símbolo, nombre) que empiezan con prefix, en orden alfabético """
+        _, ordered, names = self._index
+        prefix = prefix.strip().upper()
+        if not prefix:
+            return []
+        matches = []
+        for i in range(bisect_left(ordered, prefix), len(ordered)):
+            symbol = ordered[i]
+            if not symbol.startswith(prefix) or len(matches) >= limit:
+                break
+            matches.append((symbol, names[symbol]))
+        return matches
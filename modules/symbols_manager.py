@@ -4,9 +4,15 @@
 import re
 from modules.error_manager import ErrorManager
 
+# Solo letras (compilado una vez)
+SYMBOL_PATTERN = re.compile(r'[A-Za-z]+')
+
 class SymbolsManager:
-    def __init__(self, error_manager: ErrorManager):
+    def __init__(self, error_manager: ErrorManager, max_symbols: int = 20, universe=None):
         self.error_manager = error_manager
+        self.max_symbols = max_symbols  # Límite de símbolos por análisis
+        # Universo de símbolos conocidos (SymbolUniverse); None = no se verifica existencia
+        self.universe = universe
         self.valid_symbols = []  # Lista final validada
         self.report = {}         # Reporte de eliminados
         self.messages = []
@@ -19,46 +25,51 @@ class SymbolsManager:
         eliminated = {
             "duplicados": [],
             "invalidos": [],
+            "desconocidos": [],
             "exceso": []
         }
 
-        # eliminar duplicados manteniendo orden
+        # Una sola pasada: duplicados (manteniendo orden), solo letras y existencia
+        fullmatch = SYMBOL_PATTERN.fullmatch
+        known = self.universe.symbols() if self.universe is not None and len(self.universe) else None
         seen = set()
-        unique_symbols = []
+        only_letters = []
         for s in symbols:
-            if s not in seen:
-                seen.add(s)
-                unique_symbols.append(s)
-            else:
+            if s in seen:
                 eliminated["duplicados"].append(s)
-        #if eliminated["duplicados"]:
-         #   self.messages.append(self.error_manager.get_message("VALIDATION_DUPLICATES"))
+                continue
+            seen.add(s)
+            if not fullmatch(s):
+                eliminated["invalidos"].append(s)
+            elif known is not None and s.upper() not in known:
+                eliminated["desconocidos"].append(s)
+            else:
+                only_letters.append(s)
+
         if eliminated["duplicados"]:
             duplicates_str = ", ".join(eliminated["duplicados"])  # Convertir la lista a una cadena
             self.messages.append(self.error_manager.get_message("VALIDATION_DUPLICATES", duplicates=duplicates_str))
 
-        # filtrar solo letras
-        only_letters = [s for s in unique_symbols if re.fullmatch(r'[A-Za-z]+', s)]
-        invalid = set(unique_symbols) - set(only_letters)
-        #if invalid:
-         #   eliminated["invalidos"] = list(invalid)
-          #  self.messages.append(self.error_manager.get_message("VALIDATION_SYMBOLS"))
-        if invalid:
-            eliminated["invalidos"] = list(invalid)
+        if eliminated["invalidos"]:
             invalidos_str = ", ".join(eliminated["invalidos"])  # Convertir la lista a una cadena
             self.messages.append(self.error_manager.get_message("VALIDATION_SYMBOLS", invalidos=invalidos_str))
 
+        # Símbolos que no figuran en el listado: se descartan antes de consultar la API
+        if eliminated["desconocidos"]:
+            desconocidos_str = ", ".join(eliminated["desconocidos"])
+            self.messages.append(self.error_manager.get_message("VALIDATION_UNKNOWN", desconocidos=desconocidos_str))
+
         # Truncado si corresponde
-        if len(only_letters) > 20:
-            eliminated["exceso"] = only_letters[20:]
+        if len(only_letters) > self.max_symbols:
+            eliminated["exceso"] = only_letters[self.max_symbols:]
             if truncate:
-                only_letters = only_letters[:20]
-                self.messages.append(self.error_manager.get_message("VALIDATION_TOO_MANY"))
+                only_letters = only_letters[:self.max_symbols]
+                self.messages.append(self.error_manager.get_message("VALIDATION_TOO_MANY", limite=self.max_symbols))
             else:
                 # Caso manual: exceso de símbolos → mostrar mensaje sin truncar
                 exceso_str = ", ".join(eliminated["exceso"])
                 only_letters = []
-                self.messages.append(self.error_manager.get_message("VALIDATION_EXCESS_MANUAL", exceso=exceso_str))
+                self.messages.append(self.error_manager.get_message("VALIDATION_EXCESS_MANUAL", exceso=exceso_str, limite=self.max_symbols))
 
 
         if not only_letters:
@@ -0,0 +1,140 @@
+# -----------------------------
+# Marcos temporales: remuestreo de velas diarias a semanales y mensuales
+# -----------------------------
+# pandas se importa dentro de resample_ohlcv: las rutas usan las constantes
+# y normalize_timeframes sin cargarlo.
+import math
+import threading
+from collections import OrderedDict
+
+# De menor a mayor granularidad
+TIMEFRAMES = ["1d", "1wk", "1mo"]
+TIMEFRAME_LABELS = {"1d": "Diario", "1wk": "Semanal", "1mo": "Mensual"}
+# Días corridos que abarca cada vela (para dimensionar la descarga)
+TIMEFRAME_DAYS = {"1d": 1, "1wk": 7, "1mo": 31}
+# Período de pandas con el que se agrupan las velas diarias
+RESAMPLE_PERIODS = {"1wk": "W-FRI", "1mo": "M"}
+# Cómo se combina cada columna OHLCV dentro de un período
+OHLCV_AGG = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Adj Close": "last",
+    "Volume": "sum",
+}
+
+
+def normalize_timeframes(timeframes: list[str] | None, default: str = "1d") -> list[str]:
+    """
+    Marcos válidos, sin repetir y ordenados de menor a mayor. Con más de un
+    marco siempre se incluye el diario: es la base que se descarga y se
+    remuestrea (las velas mensuales no se pueden armar desde semanales).
+    """
+    selected = [tf for tf in TIMEFRAMES if tf in set(timeframes or [])]
+    if not selected:
+        return [default]
+    if len(selected) > 1 and "1d" not in selected:
+        selected.insert(0, "1d")
+    return selected
+
+
+def history_days(timeframes: list[str], slow: int = 26, signal: int = 9, base_days: int = 60) -> int:
+    """
+    Días corridos a descargar para que el marco más largo tenga velas
+    suficientes para el MACD (slow + signal, más un margen de dos velas).
+    """
+    needed = max(math.ceil((slow + signal + 2) * TIMEFRAME_DAYS[tf] * 1.1) for tf in timeframes)
+    return max(base_days, needed)
+
+
+def resample_ohlcv(price_data: dict, timeframe: str) -> dict:
+    """
+    Agrupa las velas diarias de todos los símbolos en velas del marco pedido
+    con un único groupby sobre (símbolo, período). Cada vela queda fechada
+    con el último día operado del período (la del período en curso es parcial).
+    price_data: { "AAPL": DataFrame OHLCV diario, ... }
+    Retorna { "AAPL": DataFrame OHLCV remuestreado, ... }
+    """
+    import pandas as pd
+
+    frames = {symbol: df for symbol, df in price_data.items() if not df.empty}
+    if not frames:
+        return {}
+
+    combined = pd.concat(frames.values(), keys=list(frames), names=["Symbol", "Date"])
+    dates = combined.index.get_level_values("Date")
+    combined["_date"] = dates
+    agg = {col: how for col, how in OHLCV_AGG.items() if col in combined.columns}
+    agg["_date"] = "max"
+
+    periods = dates.to_period(RESAMPLE_PERIODS[timeframe])
+    grouped = combined.groupby([combined.index.get_level_values("Symbol"), periods], sort=False).agg(agg)
+    grouped = grouped[grouped["Close"].notna()]
+
+    resampled = {}
+    for symbol, df in grouped.groupby(level=0, sort=False):
+        df = df.droplevel(0).set_index("_date").sort_index()
+        df.index.name = "Date"
+        resampled[symbol] = df
+    return resampled
+
+
+class ResampleCache:
+    """
+    Velas remuestreadas por (símbolo, marco, primera fecha, última fecha,
+    cantidad de velas), con expulsión LRU. Si las velas diarias no cambiaron,
+    el remuestreo se reutiliza entre análisis.
+    """
+
+    def __init__(self, max_entries: int = 20000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(symbol: str, timeframe: str, df) -> tuple:
+        return (symbol, timeframe, df.index[0], df.index[-1], len(df))
+
+    def resample(self, price_data: dict, timeframe: str) -> dict:
+        """ Igual que resample_ohlcv, pero solo remuestrea los símbolos que no están en la caché """
+        found, missing = {}, {}
+        with self._lock:
+            for symbol, df in price_data.items():
+                if df.empty:
+                    continue
+                key = self._key(symbol, timeframe, df)
+                entry = self._entries.get(key)
+                if entry is None:
+                    missing[symbol] = df
+                    self.misses += 1
+                else:
+                    self._entries.move_to_end(key)
+                    found[symbol] = entry
+                    self.hits += 1
+
+        computed = resample_ohlcv(missing, timeframe) if missing else {}
+        with self._lock:
+            for symbol, resampled in computed.items():
+                self._entries[self._key(symbol, timeframe, missing[symbol])] = resampled
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        # Respetar el orden de entrada
+        return {
+            symbol: found[symbol] if symbol in found else computed[symbol]
+            for symbol in price_data
+            if symbol in found or symbol in computed
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
@@ -1,20 +1,44 @@
-import yfinance as yf
 import pandas as pd
 import socket
 from datetime import datetime, timedelta
 from modules.error_manager import ErrorManager
+from modules.market_calendar import latest_daily_bar, previous_weekday
+from modules.providers import MarketDataProvider, YahooProvider
+from modules.download_scheduler import DownloadScheduler
+from modules.timeframes import TIMEFRAME_DAYS
+from modules.metrics import MetricsRegistry
+
+# Velas mínimas para calcular el MACD de un símbolo
+MIN_MACD_DAYS = 30
 
 class YahooFinanceClient:
-    def __init__(self, error_manager: ErrorManager):
+    def __init__(self, error_manager: ErrorManager, cache=None, provider: MarketDataProvider | None = None,
+                 chunk_size: int = 100, max_workers: int = 4, retries: int = 2,
+                 metrics: MetricsRegistry | None = None, compact: bool = False,
+                 price_fields: list[str] | None = None, price_dtype: str = "float32", shared_prices=None):
         self.raw_data = {}        # { "AAPL": DataFrame, ... }
         self.symbols_status = {}  # { "AAPL": "OK", "MSFT": "Error", ... }
         self.error_manager = error_manager
-        # --- Warm-up para inicializar la sesión de yfinance ---
-        try:
-            import yfinance as yf
-            yf.download("AAPL", period="1d", interval="1d", progress=False)
-        except Exception:
-            pass
+        # Caché local opcional de velas (PriceCache)
+        self.cache = cache
+        # Origen de las velas (Yahoo por defecto; ver modules/providers.py)
+        self.provider = provider or YahooProvider()
+        # Descarga por lotes con concurrencia acotada y reintentos por lote
+        self.scheduler = DownloadScheduler(chunk_size=chunk_size, max_workers=max_workers, retries=retries)
+        # Mensaje de error de la última descarga (ver iter_fetch)
+        self.fetch_error = None
+        # Duración de conexión, descarga y limpieza, y aciertos de la caché de velas
+        self.metrics = metrics or MetricsRegistry()
+        # Formato compacto opcional de raw_data (PriceMatrix): campos y tipo de las matrices
+        self.compact = compact
+        self.price_fields = price_fields
+        self.price_dtype = price_dtype
+        # Almacén de velas compartido entre procesos (SharedPriceStore), opcional
+        self.shared_prices = shared_prices
+
+    def warm_up(self):
+        """ Inicializa el proveedor (en Yahoo, la sesión de yfinance; usa la red) """
+        self.provider.warm_up()
 
     def _check_internet(self, host="8.8.8.8", port=53, timeout=3) -> bool:
         #return False
@@ -26,81 +50,253 @@ class YahooFinanceClient:
         except Exception:
             return False
 
-    def fetch_data(self, symbols: list[str], min_days: int = 60, interval: str = "1d") -> tuple[bool, str | None]:
-        
-        if not self._check_internet():
-            message = self.error_manager.get_message("NO_INTERNET")
-            return False, message
+    def _download(self, symbols: list[str], start_str: str, interval: str) -> dict:
+        """
+        Pide las velas al proveedor de datos.
+        Retorna { "AAPL": DataFrame OHLCV } solo con los símbolos que existen.
+        """
+        end_str = datetime.today().strftime("%Y-%m-%d")
+        return self.provider.download(symbols, start_str, end_str, interval)
 
-        self.raw_data = {}
-        self.symbols_status = {}
+    def _plan_downloads(self, symbols: list[str], start_date: datetime, interval: str) -> tuple[list[str], dict]:
+        """
+        Decide qué pedir a Yahoo según lo guardado en la caché.
+        Retorna (símbolos servidos desde la caché, { fecha de inicio: [símbolos a descargar] }).
+        """
+        window_start = pd.Timestamp(start_date.date())
+        if self.cache is None:
+            return [], {window_start.strftime("%Y-%m-%d"): list(symbols)}
+
+        today = datetime.today().date()
+        expected_last = pd.Timestamp(previous_weekday(today))
+        coverage = self.cache.get_coverage(symbols, interval)
+        window_slack = timedelta(days=TIMEFRAME_DAYS.get(interval, 1) + 3)
+
+        cached, downloads = [], {}
+        for symbol in symbols:
+            entry = coverage.get(symbol)
+            if entry is None:
+                downloads.setdefault(window_start.strftime("%Y-%m-%d"), []).append(symbol)
+                continue
+
+            first_date, last_date, fetched_on = entry
+            # La primera vela puede caer unos días después del inicio (fin de semana,
+            # feriado o vela semanal/mensual que arranca más tarde)
+            covers_window = first_date <= window_start + window_slack
+            # Ya consultado hoy: las velas previas a hoy no pueden cambiar, pero
+            # solo sirven si alcanzan para la ventana pedida
+            if covers_window and (fetched_on >= today or last_date >= expected_last):
+                cached.append(symbol)
+            elif covers_window:
+                # Delta: solo las velas posteriores a la última guardada
+                delta_start = (last_date + timedelta(days=1)).strftime("%Y-%m-%d")
+                downloads.setdefault(delta_start, []).append(symbol)
+            else:
+                downloads.setdefault(window_start.strftime("%Y-%m-%d"), []).append(symbol)
+        return cached, downloads
+
+    def iter_fetch(self, symbols: list[str], min_days: int = 60, interval: str = "1d",
+                   force_refresh: bool = False, progress=None):
+        """
+        Igual que fetch_data, pero entrega las velas por lotes a medida que
+        están listas, para que el análisis avance mientras siguen las
+        descargas: primero los símbolos publicados en el almacén compartido
+        (si hay uno), luego los servidos desde la caché y por último cada
+        lote descargado apenas termina.
+        Genera (lote, { "AAPL": DataFrame limpio }, { "AAPL": estado }); con
+        compact, las velas de cada lote van en un PriceMatrix.
+        Si no hay conexión, o si fallan todas las descargas, deja el mensaje
+        en self.fetch_error (los lotes ya entregados deben descartarse).
+        progress(procesados, total): opcional, se llama al terminar cada lote.
+        """
+        self.fetch_error = None
         start_date = datetime.today() - timedelta(days=min_days)
         start_str = start_date.strftime("%Y-%m-%d")
 
-        try:
-            data = yf.download(
-                tickers=symbols,
-                start=start_str,
-                end=datetime.today().strftime("%Y-%m-%d"),
-                interval=interval,
-                progress=False,
-                group_by="ticker",
-                auto_adjust=False,
-                threads=True
-            )
-        except Exception as e:
-            if "Too Many Requests" in str(e):
-                message = self.error_manager.get_message("API_LIMIT")
-            else:
-                message = self.error_manager.get_message("API_ERROR", str(e))
-            return False, message
+        # Forzar actualización: se descarta lo guardado y se descarga la ventana completa
+        if force_refresh and self.cache is not None:
+            self.cache.invalidate(symbols, interval)
+        shared, served = (None, []) if force_refresh else self._plan_shared(symbols, start_date, interval)
+        served_set = set(served)
+        remaining = [symbol for symbol in symbols if symbol not in served_set]
+        cached, downloads = self._plan_downloads(remaining, start_date, interval)
+        if self.cache is not None:
+            self.metrics.cache_lookup("precios", len(cached), len(remaining) - len(cached))
 
-        for symbol in symbols:
-            try:
-                # Detectar si las columnas tienen MultiIndex (varios tickers) o no (único ticker)
-                if isinstance(data.columns, pd.MultiIndex):
-                    if symbol not in data.columns.levels[0]:
-                        self.symbols_status[symbol] = "Simbolo inexistente"
-                        continue
-                    df = data[symbol]
-                else:
-                    df = data  # único ticker → DataFrame plano
-
-                # Al menos un valor válido en Close
-                if "Close" not in df.columns or df["Close"].dropna().empty:
-                    self.symbols_status[symbol] = "Símbolo inexistente"
-                    continue
+        # Solo se requiere conexión si hay algo que descargar de la red
+        if downloads and self.provider.requires_network:
+            with self.metrics.timer("conexion"):
+                connected = self._check_internet()
+            if not connected:
+                self.fetch_error = self.error_manager.get_message("NO_INTERNET")
+                return
+
+        total = len(symbols)
+        done = len(served) + len(cached)
+        if progress:
+            progress(done, total)
+
+        # 0️⃣ Símbolos publicados en el almacén compartido: vistas de solo lectura, sin copiar
+        for chunk in self.scheduler.split(served):
+            yield self._compact_chunk(*self._shared_chunk(chunk, shared))
 
-                # Nos aseguramos de que tenga las columnas necesarias (OHLCV)
-                required_cols = {"Open", "High", "Low", "Close", "Volume"}
-                if not required_cols.issubset(set(df.columns)):
-                    self.symbols_status[symbol] = "Datos insuficientes"
+        # 1️⃣ Símbolos al día en la caché: se leen por lotes del disco
+        for chunk in self.scheduler.split(cached):
+            with self.metrics.timer("lectura_cache"):
+                frames = self.cache.load(chunk, interval, start_str)
+            yield self._compact_chunk(*self._clean_chunk(chunk, frames))
+
+        # 2️⃣ Descargas: cada lote sigue apenas termina
+        pending = sum(len(group) for group in downloads.values())
+        failed, last_error = 0, None
+        for download_start, download_symbols in downloads.items():
+            chunks = self.scheduler.iter_download(
+                download_symbols,
+                lambda chunk, start=download_start: self._download(chunk, start, interval)
+            )
+            for chunk, frames, error in self.metrics.timed_iter("descarga", chunks):
+                done += len(chunk)
+                if progress:
+                    progress(done, total)
+                if error is not None:
+                    # Lote fallido tras los reintentos: error solo para sus símbolos
+                    failed += len(chunk)
+                    last_error = error
+                    yield chunk, {}, {symbol: "Error" for symbol in chunk}
                     continue
+                if self.cache is not None:
+                    # La vela del día actual puede no haber cerrado: no se guarda
+                    today = pd.Timestamp.now().normalize()
+                    with self.metrics.timer("escritura_cache"):
+                        self.cache.store({s: df[df.index < today] for s, df in frames.items()}, interval, evict=False)
+                    # La ventana completa se arma desde el disco (velas guardadas + delta)
+                    with self.metrics.timer("lectura_cache"):
+                        frames = self.cache.load(list(frames), interval, start_str)
+                yield self._compact_chunk(*self._clean_chunk(chunk, frames))
+
+        # Límites de la caché: una sola vez, después de guardar todos los lotes
+        if self.cache is not None and pending > failed:
+            with self.metrics.timer("escritura_cache"):
+                self.cache.evict()
 
-                # FILTRO: eliminar filas con Close vacío (día actual si no cerró)
-                df = df[df["Close"].notna()]
+        # Si fallaron todos los lotes se informa el error como antes
+        if failed and failed == pending:
+            self.fetch_error = self._api_error_message(last_error)
 
-                # Excluir el día actual (si aparece en los datos)
-                today = pd.Timestamp.now().normalize()
-                df = df[df.index < today]
+    def _plan_shared(self, symbols: list[str], start_date: datetime, interval: str) -> tuple:
+        """
+        Símbolos que se sirven desde el almacén compartido: los publicados
+        para la última sesión cerrada con velas desde el inicio de la ventana.
+        Retorna (PriceMatrix recortada a la ventana o None, símbolos servidos).
+        """
+        if self.shared_prices is None:
+            return None, []
+        matrix = self.shared_prices.current(interval, latest_daily_bar())
+        # Una versión en float32 (publicada antes) daría otro MACD que la caché: no se usa
+        if matrix is not None and matrix.field(matrix.primary_field).dtype != "float64":
+            matrix = None
+        if matrix is None:
+            self.metrics.cache_lookup("compartida", 0, len(symbols))
+            return None, []
+        window_start = pd.Timestamp(start_date.date())
+        served = [symbol for symbol in symbols if matrix.covers(symbol, window_start)]
+        self.metrics.cache_lookup("compartida", len(served), len(symbols) - len(served))
+        return matrix.since(window_start), served
+
+    def _shared_chunk(self, chunk: list[str], matrix) -> tuple[list[str], dict, dict]:
+        """ Lote servido desde el almacén compartido (sus velas ya se limpiaron al publicarlas) """
+        data, status = {}, {}
+        with self.metrics.timer("lectura_compartida"):
+            for symbol in chunk:
+                df = matrix[symbol]
+                if len(df) < MIN_MACD_DAYS:
+                    status[symbol] = "Datos insuficientes"
+                    continue
+                data[symbol], status[symbol] = df, "OK"
+        return chunk, data, status
 
-                #Validar cantidad mínima de días para MACD
-                min_macd_days = 30
-                if len(df) < min_macd_days:
-                    self.symbols_status[symbol]= "Datos insuficientes"
+    def _clean_chunk(self, chunk: list[str], frames: dict) -> tuple[list[str], dict, dict]:
+        """ Limpia las velas de un lote. Retorna (lote, { símbolo: velas OK }, { símbolo: estado }) """
+        data, status = {}, {}
+        with self.metrics.timer("limpieza"):
+            for symbol in chunk:
+                if symbol not in frames:
+                    status[symbol] = "Simbolo inexistente"
                     continue
+                df, status[symbol] = self._clean_symbol(symbol, frames[symbol])
+                if df is not None:
+                    data[symbol] = df
+        return chunk, data, status
 
-                # Si todo va bien, guardamos los datos y estado OK
-                self.raw_data[symbol] = df
-                self.symbols_status[symbol] = "OK"
+    def _compact_chunk(self, chunk: list[str], data: dict, status: dict) -> tuple[list[str], dict, dict]:
+        """ Con compact, pasa las velas del lote a un PriceMatrix (campos y tipo configurados) """
+        if not self.compact or not data:
+            return chunk, data, status
+        from modules.price_matrix import PriceMatrix
+        with self.metrics.timer("compactacion"):
+            data = PriceMatrix.from_frames(data, fields=self.price_fields, dtype=self.price_dtype)
+        return chunk, data, status
 
-            except Exception:
-                self.symbols_status[symbol] = "Error"
-                
+    def fetch_data(self, symbols: list[str], min_days: int = 60, interval: str = "1d",
+                   force_refresh: bool = False, progress=None) -> tuple[bool, str | None]:
+        """
+        Descarga (o toma de la caché) las velas de los símbolos y asigna su estado.
+        progress(procesados, total): opcional, se llama al terminar cada lote.
+        """
+        self.raw_data = {}
+        self.symbols_status = {}
+        data, status = {}, {}
+        for _, chunk_data, chunk_status in self.iter_fetch(symbols, min_days, interval, force_refresh, progress):
+            data.update(chunk_data)
+            status.update(chunk_status)
+        if self.fetch_error:
+            return False, self.fetch_error
+
+        # Mismo orden que la lista pedida
+        self.symbols_status = {symbol: status[symbol] for symbol in symbols if symbol in status}
+        self.raw_data = {symbol: data[symbol] for symbol in symbols if symbol in data}
+        if self.compact:
+            from modules.price_matrix import PriceMatrix
+            self.raw_data = PriceMatrix.from_frames(self.raw_data, fields=self.price_fields, dtype=self.price_dtype)
         return True, None
 
+    def _api_error_message(self, error: Exception) -> str:
+        """ Mensaje para un error de la API de datos """
+        if "Too Many Requests" in str(error):
+            return self.error_manager.get_message("API_LIMIT")
+        return self.error_manager.get_message("API_ERROR", error=str(error))
+
+    def _clean_symbol(self, symbol: str, df: pd.DataFrame) -> tuple[pd.DataFrame | None, str]:
+        """ Valida y limpia las velas de un símbolo. Retorna (velas limpias o None, estado) """
+        try:
+            # Al menos un valor válido en Close
+            if "Close" not in df.columns or df["Close"].dropna().empty:
+                return None, "Símbolo inexistente"
+
+            # Nos aseguramos de que tenga las columnas necesarias (OHLCV)
+            required_cols = {"Open", "High", "Low", "Close", "Volume"}
+            if not required_cols.issubset(set(df.columns)):
+                return None, "Datos insuficientes"
+
+            # FILTRO: eliminar filas con Close vacío (día actual si no cerró)
+            df = df[df["Close"].notna()]
+
+            # Excluir el día actual (si aparece en los datos)
+            today = pd.Timestamp.now().normalize()
+            df = df[df.index < today]
+
+            #Validar cantidad mínima de días para MACD
+            if len(df) < MIN_MACD_DAYS:
+                return None, "Datos insuficientes"
+
+            # Si todo va bien, velas limpias y estado OK
+            return df, "OK"
+
+        except Exception:
+            return None, "Error"
+
     def get_data(self)-> dict:
-        """ Devuelve los datos descargados (OHLCV por símbolo). """
+        """ Devuelve los datos descargados (OHLCV por símbolo; un PriceMatrix si compact). """
         return self.raw_data
 
     def get_status(self)-> dict:
@@ -0,0 +1,87 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import time
+from main import create_app
+from modules.result_store import ResultStore, StoredResults
+
+
+RESULTADOS = {
+    "AAPL": {"estado": "OK", "señal": "COMPRA"},
+    "GOOG": {"estado": "OK", "señal": "VENTA"},
+    "MSFT": {"estado": "Datos insuficientes", "señal": "NULO"},
+    "TSLA": {"estado": "OK", "señal": "COMPRA"},
+    "NFLX": {"estado": "OK", "señal": "NULO"},
+}
+
+
+def test_filtro_por_indice():
+    stored = StoredResults(RESULTADOS)
+    assert list(stored.filter("COMPRA")) == ["AAPL", "TSLA"]
+    assert list(stored.filter(status="OK")) == ["AAPL", "GOOG", "TSLA", "NFLX"]
+    assert list(stored.filter("NULO", "OK")) == ["NFLX"]
+    assert stored.filter() == RESULTADOS
+    assert stored.filter("INEXISTENTE") == {}
+
+
+def test_vencimiento_y_otro_worker(tmp_path):
+    store = ResultStore(str(tmp_path), ttl=60)
+    result_id = store.put(RESULTADOS)
+
+    # Otro proceso con el mismo directorio encuentra los resultados
+    otro = ResultStore(str(tmp_path), ttl=60)
+    assert otro.get(result_id).filter("VENTA") == {"GOOG": RESULTADOS["GOOG"]}
+    assert otro.get("inexistente") is None
+    assert otro.get("../../etc/passwd") is None
+
+    vencido = ResultStore(ttl=-1)
+    assert vencido.get(vencido.put(RESULTADOS)) is None
+
+
+def test_purga_periodica(tmp_path, monkeypatch):
+    store = ResultStore(str(tmp_path), ttl=60, purge_interval=3600)
+    viejo = store.put(RESULTADOS)
+    os.utime(store._path(viejo), (time.time() - 120, time.time() - 120))
+
+    # Dentro del intervalo no se recorre el directorio en cada put
+    listados = []
+    listdir = os.listdir
+    monkeypatch.setattr(os, "listdir", lambda path: listados.append(path) or listdir(path))
+    for _ in range(20):
+        store.put(RESULTADOS)
+    assert listados == []
+    monkeypatch.undo()
+    assert os.path.exists(store._path(viejo))
+
+    # Vencido el intervalo, la siguiente escritura borra los archivos vencidos
+    store._next_purge = 0
+    store.put(RESULTADOS)
+    assert not os.path.exists(store._path(viejo))
+    assert len(os.listdir(tmp_path)) == 21
+
+
+def test_rutas_usan_el_id(tmp_path):
+    app = create_app({"MACD_DATA_PROVIDER": "synthetic", "MACD_CACHE_DIR": str(tmp_path)})
+    client = app.test_client()
+    symbols = ["AAPL", "MSFT", "NVDA", "AMZN"]
+
+    html = client.post("/result", data={"final_symbols_json": json.dumps(symbols)}).get_data(as_text=True)
+    result_id = html.split('name="result_id" value="')[1].split('"')[0]
+    assert len(result_id) == 32
+
+    stored = app.extensions["macd"].result_store.get(result_id)
+    assert list(stored.results) == symbols
+
+    inicio = time.time()
+    resp = client.post("/filter_results", data={"result_id": result_id, "signal_filter": "TODO", "estado_filter": "OK"})
+    print(f"Filtrado por id: {time.time() - inicio:.4f} segundos")
+    assert resp.status_code == 200
+    assert all(symbol in resp.get_data(as_text=True) for symbol in symbols)
+
+    resp = client.post("/export_excel", data={"result_id": result_id, "signal_filter": "TODO"})
+    assert resp.status_code == 200
+
+    assert client.post("/filter_results", data={"result_id": "vencido"}).status_code == 404
+    assert client.post("/export_excel", data={}).status_code == 404
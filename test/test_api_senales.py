@@ -0,0 +1,124 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import gzip
+import json
+from main import create_app
+from modules.error_manager import ErrorManager
+from modules.indicators import MACDCalculator
+from modules.providers import SyntheticProvider
+from modules.signals_api import parse_request
+from modules.timeframes import history_days
+from modules.yahoo_client import YahooFinanceClient
+
+
+def _app(tmp_path, **config):
+    return create_app({"MACD_DATA_PROVIDER": "synthetic", "MACD_CACHE_DIR": str(tmp_path), **config})
+
+
+def test_validacion_de_parametros():
+    params, error = parse_request({"symbols": "aapl, msft"})
+    assert error is None
+    assert params["symbols"] == ["AAPL", "MSFT"]
+    assert (params["fast"], params["slow"], params["signal"], params["interval"]) == (12, 26, 9, "1d")
+    assert params["include_values"] is False
+
+    assert parse_request({"symbols": []})[1] == "symbols no puede estar vacío"
+    assert parse_request({"symbols": ["AAPL"], "fast": 26, "slow": 12})[1] is not None
+    assert parse_request({"symbols": ["AAPL"], "fast": "x"})[1] == "fast debe ser un entero"
+    assert parse_request({"symbols": ["AAPL"], "interval": "1h"})[1] is not None
+    assert parse_request(None)[1] == "se esperaba un objeto JSON"
+    assert parse_request({"symbols": ["AAPL"], "slow": 501})[1] == "slow no puede ser mayor que 500"
+    assert parse_request({"symbols": ["AAPL"], "fast": 10, "slow": 500, "signal": 500})[1] is None
+
+
+def test_senales_y_valores(tmp_path):
+    client = _app(tmp_path).test_client()
+    resp = client.post("/api/v1/signals", json={
+        "symbols": ["AAPL", "MSFT", "AAPL", "BAD1"], "fast": 8, "slow": 21, "signal": 5, "include_values": True
+    })
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["parametros"] == {"fast": 8, "slow": 21, "signal": 5, "interval": "1d"}
+    assert list(body["resultados"]) == ["AAPL", "MSFT"]
+    assert len(body["mensajes"]) == 2  # duplicado e inválido
+
+    # Mismos valores que el cálculo directo con esos parámetros (y el mismo historial)
+    yahoo = YahooFinanceClient(ErrorManager(), provider=SyntheticProvider())
+    yahoo.fetch_data(["AAPL"], min_days=history_days(["1d"], 21, 5))
+    macd_data, _ = MACDCalculator(8, 21, 5).calculate_macd_batch(yahoo.get_data(), yahoo.get_status())
+    last = macd_data["AAPL"].iloc[-1]
+    aapl = body["resultados"]["AAPL"]
+    assert aapl["estado"] == "OK" and aapl["señal"] in ("COMPRA", "VENTA", "NULO")
+    assert aapl["ultima_vela"] == macd_data["AAPL"].index[-1].date().isoformat()
+    assert abs(aapl["macd"] - last["MACD"]) < 1e-9
+    assert abs(aapl["histograma"] - last["Histogram"]) < 1e-9
+
+    # GET equivalente, sin valores
+    resp = client.get("/api/v1/signals?symbols=AAPL,MSFT&fast=8&slow=21&signal=5")
+    assert resp.get_json()["resultados"]["AAPL"]["señal"] == aapl["señal"]
+    assert "macd" not in resp.get_json()["resultados"]["AAPL"]
+
+    assert client.post("/api/v1/signals", json={"symbols": ["AAPL"], "slow": 5}).status_code == 400
+    assert client.post("/api/v1/signals", json={"symbols": ["BAD1"]}).status_code == 400
+    # Períodos enormes: 400, no un error al calcular la ventana de descarga
+    resp = client.post("/api/v1/signals", json={"symbols": ["AAPL"], "slow": 10 ** 9})
+    assert resp.status_code == 400
+
+
+def test_marco_semanal_sin_estado_incremental(tmp_path):
+    app = _app(tmp_path)
+    services = app.extensions["macd"]
+    client = app.test_client()
+    client.post("/api/v1/signals", json={"symbols": ["AAPL", "MSFT"]})
+    estados = len(services.ema_state)
+
+    body = client.post("/api/v1/signals", json={"symbols": ["AAPL", "MSFT"], "interval": "1wk",
+                                                "include_values": True}).get_json()
+    assert len(services.ema_state) == estados
+    yahoo = YahooFinanceClient(ErrorManager(), provider=SyntheticProvider())
+    yahoo.fetch_data(["AAPL"], min_days=history_days(["1wk"]), interval="1wk")
+    macd_data, _ = MACDCalculator().calculate_macd_batch(yahoo.get_data(), yahoo.get_status())
+    assert abs(body["resultados"]["AAPL"]["macd"] - macd_data["AAPL"].iloc[-1]["MACD"]) < 1e-9
+
+
+def test_etag_y_304(tmp_path):
+    app = _app(tmp_path)
+    client = app.test_client()
+    consulta = {"symbols": ["AAPL", "MSFT"]}
+    resp = client.post("/api/v1/signals", json=consulta)
+    etag = resp.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    # Misma consulta con If-None-Match: 304 sin descargar ni calcular
+    yahoo_client = app.extensions["macd"].yahoo_client
+    app.extensions["macd"].yahoo_client = lambda: (_ for _ in ()).throw(AssertionError("no debería descargar"))
+    resp = client.post("/api/v1/signals", json=consulta, headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.headers["ETag"] == etag and resp.get_data() == b""
+    app.extensions["macd"].yahoo_client = yahoo_client
+
+    # Otros parámetros: otro ETag
+    resp = client.post("/api/v1/signals", json={**consulta, "include_values": True}, headers={"If-None-Match": etag})
+    assert resp.status_code == 200 and resp.headers["ETag"] != etag
+
+
+def test_compresion_gzip(tmp_path):
+    client = _app(tmp_path, MACD_API_GZIP_MIN_BYTES=1024).test_client()
+    symbols = [f"S{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(100)]
+
+    resp = client.post("/api/v1/signals", json={"symbols": symbols, "include_values": True},
+                       headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    comprimido = resp.get_data()
+    body = json.loads(gzip.decompress(comprimido))
+    assert list(body["resultados"]) == symbols
+    print(f"\nJSON: {len(gzip.decompress(comprimido))} bytes, gzip: {len(comprimido)} bytes")
+
+    # Sin Accept-Encoding, o con una respuesta chica, va sin comprimir
+    resp = client.post("/api/v1/signals", json={"symbols": symbols, "include_values": True})
+    assert "Content-Encoding" not in resp.headers
+    resp = client.post("/api/v1/signals", json={"symbols": ["AAPL"]}, headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in resp.headers and resp.get_json()["resultados"]["AAPL"]
@@ -0,0 +1,50 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import subprocess
+import pytest
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Importa la app sin red y mide el tiempo hasta responder la primera solicitud
+SCRIPT = r"""
+import json, socket, sys, time
+
+def sin_red(*args, **kwargs):
+    raise OSError("Red deshabilitada para la prueba")
+
+socket.socket.connect = sin_red
+socket.create_connection = sin_red
+socket.getaddrinfo = sin_red
+
+inicio = time.perf_counter()
+import main
+respuesta = main.app.test_client().get("/")
+elapsed = time.perf_counter() - inicio
+
+print(json.dumps({
+    "elapsed": elapsed,
+    "status": respuesta.status_code,
+    "pesados": [m for m in ("pandas", "yfinance", "openpyxl") if m in sys.modules]
+}))
+"""
+
+@pytest.mark.performance
+def test_arranque_en_frio_sin_red(tmp_path):
+    cache = tmp_path / "cache"
+    salida = subprocess.run(
+        [sys.executable, "-c", SCRIPT], cwd=RAIZ, capture_output=True, text=True, timeout=60,
+        env={**os.environ, "MACD_WARMUP": "0", "MACD_CACHE_DIR": str(cache)}
+    )
+    assert salida.returncode == 0, salida.stderr
+    datos = json.loads(salida.stdout.strip().splitlines()[-1])
+    print(f"\nTiempo de importación hasta la primera respuesta: {datos['elapsed']:.2f} segundos")
+
+    assert datos["status"] == 200
+    # Las dependencias pesadas se cargan recién cuando una ruta las necesita
+    assert datos["pesados"] == [], f"Importaciones pesadas en el arranque: {datos['pesados']}"
+    # Importar la app no crea directorios: se crean con la primera escritura
+    assert not cache.exists(), f"El arranque creó {sorted(os.listdir(cache))}"
+    assert datos["elapsed"] <= 2, f"Arranque demasiado lento: {datos['elapsed']:.2f}s supera 2s"
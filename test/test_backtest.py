@@ -0,0 +1,87 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from modules.backtest import MACDBacktester
+from modules.indicators import MACDCalculator
+from modules.providers import SyntheticProvider
+
+
+def _backtest_por_velas(close: pd.Series, macd_df: pd.DataFrame) -> list[tuple]:
+    """ Referencia: recorre las velas una por una con las reglas del clasificador """
+    trades, entry = [], None
+    m, s, h = macd_df["MACD"].to_numpy(), macd_df["Signal"].to_numpy(), macd_df["Histogram"].to_numpy()
+    for t in range(1, len(m)):
+        compra = m[t] > s[t] and m[t - 1] <= s[t - 1] and h[t] > 0
+        venta = m[t] < s[t] and m[t - 1] >= s[t - 1] and h[t] < 0
+        if compra and entry is None:
+            entry = t
+        elif venta and entry is not None:
+            trades.append((macd_df.index[entry], macd_df.index[t], close.iloc[t] / close.iloc[entry] - 1, False))
+            entry = None
+    if entry is not None:
+        trades.append((macd_df.index[entry], macd_df.index[-1], close.iloc[-1] / close.iloc[entry] - 1, True))
+    return trades
+
+
+def test_backtest_igual_a_recorrer_velas():
+    symbols = [f"S{i:02d}" for i in range(20)]
+    price_data = SyntheticProvider().download(symbols, "2023-01-01", "2025-06-01", "1d")
+    price_data["S01"] = price_data["S01"].iloc[200:]  # historial más corto
+    macd_data, _ = MACDCalculator().calculate_macd_batch(price_data, {s: "OK" for s in symbols})
+
+    result = MACDBacktester().run(price_data, macd_data)
+    assert list(result.summary.index) == symbols
+
+    for symbol in symbols:
+        esperado = _backtest_por_velas(price_data[symbol]["Close"], macd_data[symbol])
+        obtenido = result.get_trades(symbol)
+        assert len(esperado) > 0
+        assert list(zip(obtenido["entrada"], obtenido["salida"], obtenido["abierta"])) == \
+            [(e, x, abierta) for e, x, _, abierta in esperado]
+        assert np.allclose(obtenido["retorno"], [r for _, _, r, _ in esperado])
+
+        fila = result.summary.loc[symbol]
+        retornos = np.array([r for _, _, r, _ in esperado])
+        assert fila["operaciones"] == len(esperado)
+        assert np.isclose(fila["retorno_total"], np.prod(1 + retornos) - 1)
+        assert np.isclose(fila["tasa_acierto"], (retornos > 0).mean())
+        assert -1 < fila["max_drawdown"] <= 0
+
+
+def test_drawdown_de_curva_conocida():
+    index = pd.date_range("2025-01-01", periods=5, freq="B")
+    close = pd.DataFrame({"Close": [100.0, 110.0, 88.0, 99.0, 120.0]}, index=index)
+    # COMPRA en la vela 1, VENTA en la 4
+    macd = pd.DataFrame({
+        "MACD":      [-1.0, 1.0, 1.0, 1.0, -1.0],
+        "Signal":    [0.0, 0.0, 0.0, 0.0, 0.0],
+        "Histogram": [-1.0, 1.0, 1.0, 1.0, -1.0],
+    }, index=index)
+    result = MACDBacktester().run({"X": close}, {"X": macd})
+
+    trade = result.trades.iloc[0]
+    assert (trade["entrada"], trade["salida"]) == (index[1], index[4])
+    assert np.isclose(trade["retorno"], 120 / 110 - 1)
+    # Máximo 110 → mínimo 88
+    assert np.isclose(result.summary.loc["X", "max_drawdown"], 88 / 110 - 1)
+
+
+@pytest.mark.performance
+def test_rendimiento_backtest_miles_de_simbolos():
+    symbols = [f"S{i:04d}" for i in range(2000)]
+    price_data = SyntheticProvider().download(symbols, "2020-06-01", "2025-06-01", "1d")
+    macd_data, _ = MACDCalculator().calculate_macd_batch(price_data, {s: "OK" for s in symbols})
+
+    inicio = time.perf_counter()
+    result = MACDBacktester().run(price_data, macd_data)
+    elapsed = time.perf_counter() - inicio
+    print(f"Backtest de {len(symbols)} símbolos x {len(price_data['S0000'])} velas: "
+          f"{elapsed:.2f} s, {len(result.trades)} operaciones")
+
+    assert len(result.summary) == 2000
+    assert elapsed <= 10, f"Backtest demasiado lento: {elapsed:.2f}s"
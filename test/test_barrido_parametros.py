@@ -0,0 +1,76 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import time
+import tracemalloc
+import numpy as np
+import pytest
+from modules.classificator import MACDSignalClassifier
+from modules.indicators import MACDCalculator
+from modules.parameter_sweep import MACDParameterSweep, parameter_grid
+from modules.providers import SyntheticProvider
+
+
+def _velas(n_symbols: int, start: str = "2024-06-01", end: str = "2025-06-01") -> tuple[dict, dict]:
+    symbols = [f"S{i:04d}" for i in range(n_symbols)]
+    price_data = SyntheticProvider().download(symbols, start, end, "1d")
+    return price_data, {symbol: "OK" for symbol in symbols}
+
+
+def test_barrido_igual_a_calculadora():
+    price_data, status = _velas(40)
+    price_data["S0001"] = price_data["S0001"].iloc[-20:]  # velas insuficientes para slow + signal
+    price_data["S0002"] = price_data["S0002"].iloc[100:]  # historial más corto
+    status["S0003"] = "Error"
+
+    params = parameter_grid([5, 8, 12], [21, 26], [5, 9])
+    result = MACDParameterSweep(params, max_cells=50_000).sweep(price_data, status)
+    assert result.signals.shape == (40, 12)
+    assert result.values.shape == (40, 12, 3)
+
+    for fast, slow, signal in params:
+        calc = MACDCalculator(fast, slow, signal)
+        macd_data, macd_status = calc.calculate_macd_batch(price_data, status)
+        expected = MACDSignalClassifier().classify_all(macd_data, macd_status)
+        for symbol in status:
+            assert result.get_signal(symbol, (fast, slow, signal)) == expected.get(symbol, "NULO"), (symbol, fast, slow, signal)
+        last = macd_data["S0000"].iloc[-1].to_numpy(dtype=np.float32)
+        assert np.array_equal(result.values[0, result.params.index((fast, slow, signal))], last)
+
+    assert np.isnan(result.values[1]).all()
+    assert set(result.get_signals("S0003").values()) == {"NULO"}
+    assert result.signal_counts().sum(axis=1).tolist() == [40] * 12
+    assert result.to_frame().loc["S0000", "12/26/9"] == result.get_signal("S0000", (12, 26, 9))
+
+    with pytest.raises(ValueError):
+        MACDParameterSweep([(26, 12, 9)])
+
+
+@pytest.mark.performance
+def test_rendimiento_barrido_500_combinaciones():
+    price_data, status = _velas(1000)
+    params = parameter_grid(range(5, 15), range(20, 30), [5, 7, 9, 11, 13])
+    assert len(params) == 500
+    sweep = MACDParameterSweep(params)
+
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    result = sweep.sweep(price_data, status)
+    elapsed = time.perf_counter() - inicio
+    pico = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+
+    # Referencia: una calculadora por combinación (estimada con 10 combinaciones)
+    inicio = time.perf_counter()
+    for fast, slow, signal in params[:10]:
+        MACDCalculator(fast, slow, signal).calculate_macd_batch(price_data, status)
+    por_combinacion = (time.perf_counter() - inicio) / 10 * len(params)
+
+    print(f"Barrido de {len(params)} combinaciones x 1000 símbolos: {elapsed:.2f} s, pico {pico:.0f} MB "
+          f"(bloques de {sweep.block_size(len(next(iter(price_data.values()))))} símbolos)")
+    print(f"Una calculadora por combinación (estimado): {por_combinacion:.1f} s")
+
+    assert result.signals.shape == (1000, 500)
+    assert elapsed < por_combinacion / 5, f"El barrido no ahorra trabajo: {elapsed:.2f}s"
+    assert pico < 400, f"El barrido superó el presupuesto de memoria: {pico:.0f} MB"
@@ -0,0 +1,70 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import pytest
+from modules.benchmark import (
+    BENCHMARK_STAGES, compare_with_baseline, main, run_benchmark, synthetic_prices, synthetic_symbols
+)
+
+
+def test_datos_sinteticos_del_tamano_pedido():
+    symbols = synthetic_symbols(1000)
+    assert len(set(symbols)) == 1000
+    assert all(symbol.isalpha() for symbol in symbols)
+
+    price_data = synthetic_prices(symbols[:5], 250)
+    assert all(len(df) == 250 for df in price_data.values())
+
+
+def test_reporte_por_etapa_y_omitidos():
+    report = run_benchmark([10, 50], [60, 120], max_cells=50 * 60)
+    casos = {(row["symbols"], row["bars"]) for row in report["results"]}
+    assert casos == {(10, 60), (10, 120), (50, 60)}
+    assert report["skipped"] == [[50, 120]]
+
+    for symbols, bars in casos:
+        stages = [row["stage"] for row in report["results"] if (row["symbols"], row["bars"]) == (symbols, bars)]
+        assert stages == BENCHMARK_STAGES
+    for row in report["results"]:
+        assert row["seconds"] >= 0
+        assert row["peak_mb"] is not None and row["peak_mb"] >= 0, f"Sin memoria pico en {row}"
+
+
+def test_comparacion_con_linea_base():
+    report = {"results": [
+        {"symbols": 10, "bars": 60, "stage": "macd", "seconds": 1.0},
+        {"symbols": 10, "bars": 60, "stage": "exportacion", "seconds": 0.02},
+        {"symbols": 100, "bars": 60, "stage": "macd", "seconds": 1.0},
+    ]}
+    baseline = {"results": [
+        {"symbols": 10, "bars": 60, "stage": "macd", "seconds": 0.5},
+        # Más del doble pero por debajo del ruido mínimo
+        {"symbols": 10, "bars": 60, "stage": "exportacion", "seconds": 0.005},
+    ]}
+    regressions = compare_with_baseline(report, baseline, tolerance=0.25)
+    assert [(row["symbols"], row["stage"]) for row in regressions] == [(10, "macd")]
+    assert regressions[0]["ratio"] == 2.0
+    assert compare_with_baseline(report, report) == []
+
+
+def test_linea_de_comandos_json_y_linea_base(tmp_path):
+    output = tmp_path / "bench.json"
+    assert main(["--symbols", "10", "--bars", "60", "--no-memory", "--output", str(output)]) == 0
+    report = json.loads(output.read_text(encoding="utf-8"))
+    assert {"meta", "results", "skipped"} <= set(report)
+    assert len(report["results"]) == len(BENCHMARK_STAGES)
+
+    # Contra su propio reporte no hay regresiones; los casos sin línea base se ignoran
+    assert main(["--symbols", "10", "--bars", "60", "120", "--no-memory", "--baseline", str(output)]) == 0
+
+
+@pytest.mark.performance
+def test_benchmark_grilla_reducida():
+    report = run_benchmark([10, 1000], [60, 1000])
+    print()
+    for row in report["results"]:
+        print(f"{row['symbols']:>5} x {row['bars']:>5} {row['stage']:<14} {row['seconds']:.4f}s {row['peak_mb']:.2f} MB")
+    total = sum(row["seconds"] for row in report["results"])
+    assert total <= 10, f"La grilla reducida tardó {total:.2f}s, supera 10s"
@@ -0,0 +1,93 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import sqlite3
+import pandas as pd
+import numpy as np
+from modules.error_manager import ErrorManager
+from modules.price_cache import PriceCache
+from modules.timeframes import TIMEFRAMES, history_days
+from modules.yahoo_client import YahooFinanceClient
+
+
+def _velas(start, end):
+    fechas = pd.bdate_range(start, end, inclusive="left")
+    close = np.linspace(100, 120, len(fechas))
+    return pd.DataFrame({
+        "Open": close, "High": close + 1, "Low": close - 1,
+        "Close": close, "Adj Close": close, "Volume": np.full(len(fechas), 1000.0)
+    }, index=fechas)
+
+
+def test_cache_descarga_solo_el_delta(tmp_path):
+    cache = PriceCache(str(tmp_path))
+    client = YahooFinanceClient(ErrorManager(), cache=cache)
+    llamadas = []
+
+    def descarga_falsa(symbols, start_str, interval):
+        llamadas.append((list(symbols), start_str))
+        hoy = pd.Timestamp.now().normalize()
+        return {s: _velas(start_str, hoy) for s in symbols}
+
+    client._download = descarga_falsa
+    client._check_internet = lambda: True
+
+    # 1️⃣ Primera consulta: ventana completa
+    success, _ = client.fetch_data(["AAPL", "MSFT"])
+    assert success
+    assert len(llamadas) == 1
+    assert client.get_status() == {"AAPL": "OK", "MSFT": "OK"}
+    primera = client.get_data()["AAPL"]
+
+    # 2️⃣ Misma consulta el mismo día: todo sale del disco
+    client.fetch_data(["AAPL", "MSFT"])
+    assert len(llamadas) == 1
+    pd.testing.assert_frame_equal(client.get_data()["AAPL"], primera, check_freq=False, check_names=False)
+
+    # 3️⃣ Simular que la última consulta fue hace días: solo se pide el delta
+    ultima = primera.index[-6]
+    with sqlite3.connect(cache.db_path) as conn:
+        conn.execute("DELETE FROM bars WHERE date > ?", (str(ultima),))
+        conn.execute("UPDATE series SET last_date = ?, fetched_on = '2000-01-01'", (str(ultima),))
+    client.fetch_data(["AAPL", "MSFT"])
+    assert len(llamadas) == 2
+    assert llamadas[-1][1] == (ultima + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+    assert len(client.get_data()["AAPL"]) == len(primera)
+
+    # 4️⃣ Forzar actualización: vuelve a pedir la ventana completa
+    client.fetch_data(["AAPL"], force_refresh=True)
+    assert llamadas[-1][1] == llamadas[0][1]
+
+
+def test_consulta_del_dia_con_ventana_mas_larga(tmp_path):
+    cache = PriceCache(str(tmp_path))
+    client = YahooFinanceClient(ErrorManager(), cache=cache)
+    llamadas = []
+
+    def descarga_falsa(symbols, start_str, interval):
+        llamadas.append(start_str)
+        return {s: _velas(start_str, pd.Timestamp.now().normalize()) for s in symbols}
+
+    client._download = descarga_falsa
+    client._check_internet = lambda: True
+
+    client.fetch_data(["AAPL"], min_days=60)
+    # Ya se consultó hoy, pero con una ventana más corta: hay que pedir la larga
+    dias = history_days(TIMEFRAMES)
+    client.fetch_data(["AAPL"], min_days=dias)
+    assert len(llamadas) == 2, f"La ventana de {dias} días no debería salir de la caché de 60 días"
+    assert client.get_data()["AAPL"].index[0] <= pd.Timestamp.now() - pd.Timedelta(days=dias - 5)
+    # Y la retención de la caché alcanza para guardarla entera
+    assert cache.max_age_days >= dias
+    client.fetch_data(["AAPL"], min_days=dias)
+    client.fetch_data(["AAPL"], min_days=60)
+    assert len(llamadas) == 2
+
+
+def test_cache_respeta_limite_de_series(tmp_path):
+    cache = PriceCache(str(tmp_path), max_symbols=3)
+    for symbol in ["A", "B", "C", "D", "E"]:
+        cache.store({symbol: _velas(pd.Timestamp.now() - pd.Timedelta(days=60), pd.Timestamp.now())}, "1d")
+    assert cache.stats()["series"] == 3
+    assert set(cache.get_coverage(["A", "B", "C", "D", "E"], "1d")) == {"C", "D", "E"}
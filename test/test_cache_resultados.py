@@ -0,0 +1,43 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+from modules.result_cache import ResultCache
+from modules.market_calendar import last_completed_session
+
+
+def test_cache_resultados_aciertos_y_expiracion_por_sesion():
+    cache = ResultCache(max_entries=3)
+    lunes, martes = date(2026, 10, 12), date(2026, 10, 13)
+
+    cache.put_many({
+        "AAPL": {"estado": "OK", "señal": "COMPRA"},
+        "MSFT": {"estado": "OK", "señal": "NULO"},
+        "FAIL": {"estado": "Error: timeout", "señal": "NULO"}
+    }, "1d", lunes)
+
+    found, missing = cache.get_many(["AAPL", "MSFT", "FAIL", "TSLA"], "1d", lunes)
+    assert found == {"AAPL": {"estado": "OK", "señal": "COMPRA"}, "MSFT": {"estado": "OK", "señal": "NULO"}}
+    assert missing == ["FAIL", "TSLA"]
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 2
+
+    # Límite LRU: AAPL fue usado recientemente, MSFT es el primero en salir
+    cache.get_many(["AAPL"], "1d", lunes)
+    cache.put_many({"TSLA": {"estado": "OK", "señal": "VENTA"}, "GOOG": {"estado": "OK", "señal": "NULO"}}, "1d", lunes)
+    assert cache.stats()["entries"] == 3
+    assert cache.get_many(["MSFT"], "1d", lunes)[1] == ["MSFT"]
+
+    # Nueva sesión cerrada: todo lo anterior expira
+    found, missing = cache.get_many(["AAPL"], "1d", martes)
+    assert found == {} and missing == ["AAPL"]
+    assert cache.stats()["entries"] == 0
+
+
+def test_ultima_sesion_cerrada():
+    ny = ZoneInfo("America/New_York")
+    assert last_completed_session(datetime(2026, 10, 14, 10, 0, tzinfo=ny)) == date(2026, 10, 13)
+    assert last_completed_session(datetime(2026, 10, 14, 16, 5, tzinfo=ny)) == date(2026, 10, 14)
+    # Fin de semana → viernes
+    assert last_completed_session(datetime(2026, 10, 18, 12, 0, tzinfo=ny)) == date(2026, 10, 16)
@@ -0,0 +1,32 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+import numpy as np
+from modules.classificator import MACDSignalClassifier
+
+
+def test_classify_all_igual_a_reglas_por_simbolo():
+    rng = np.random.default_rng(3)
+    macd_data = {}
+    symbols_status = {}
+    for i in range(500):
+        # Valores discretos para forzar empates (<=, >=) y cruces
+        valores = rng.integers(-2, 3, size=(2, 3)).astype(float)
+        macd_data[f"SYM{i}"] = pd.DataFrame(valores, columns=["MACD", "Signal", "Histogram"])
+        symbols_status[f"SYM{i}"] = "OK" if i % 10 else "DATOS_INSUFICIENTES"
+
+    macd_data["CORTO"] = pd.DataFrame({"MACD": [1.0], "Signal": [0.0], "Histogram": [1.0]})
+    macd_data["CON_NAN"] = pd.DataFrame({"MACD": [np.nan, 2.0], "Signal": [1.0, 1.0], "Histogram": [0.0, 1.0]})
+    symbols_status["CORTO"] = symbols_status["CON_NAN"] = "OK"
+
+    referencia = MACDSignalClassifier()
+    for symbol, df in macd_data.items():
+        referencia.classify_signal_for_symbol(symbol, df, symbols_status[symbol])
+
+    vectorizado = MACDSignalClassifier()
+    vectorizado.classify_all(macd_data, symbols_status)
+
+    assert list(vectorizado.get_signals().items()) == list(referencia.get_signals().items())
+    assert {"COMPRA", "VENTA", "NULO"} <= set(vectorizado.get_signals().values())
@@ -0,0 +1,40 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from main import create_app
+
+
+def _simbolos_en_tabla(html: str) -> list[str]:
+    return re.findall(r'<td data-label="Simbolo">(\w+)</td>', html)
+
+
+def _sin_id(html: str) -> str:
+    # Cada análisis se guarda con un id nuevo
+    return re.sub(r'name="result_id" value="\w*"', "", html)
+
+
+def test_resultados_paralelos_no_se_mezclan(tmp_path):
+    app = create_app({"MACD_DATA_PROVIDER": "synthetic", "MACD_CACHE_DIR": str(tmp_path)})
+
+    # 16 listas distintas, sin símbolos en común
+    listas = [[f"L{chr(65 + n)}{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(40)] for n in range(16)]
+
+    def analizar(symbols):
+        client = app.test_client()
+        resp = client.post("/result", data={"final_symbols_json": json.dumps(symbols), "force_refresh": "1"})
+        return resp.status_code, resp.get_data(as_text=True)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        respuestas = list(pool.map(analizar, listas))
+
+    for symbols, (status, html) in zip(listas, respuestas):
+        assert status == 200
+        assert _simbolos_en_tabla(html) == symbols, "Un análisis devolvió símbolos de otra solicitud"
+
+    # Misma lista en serie: mismos resultados que en paralelo
+    status, html = analizar(listas[0])
+    assert _sin_id(html) == _sin_id(respuestas[0][1])
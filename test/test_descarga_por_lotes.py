@@ -0,0 +1,62 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import threading
+from modules.error_manager import ErrorManager
+from modules.providers import SyntheticProvider
+from modules.symbols_manager import SymbolsManager
+from modules.yahoo_client import YahooFinanceClient
+
+
+class ProveedorConFallas(SyntheticProvider):
+    """ Falla siempre en los lotes que contienen BAD y una vez en los que contienen FLAKY """
+
+    def __init__(self):
+        super().__init__()
+        self.lotes = []
+        self.flaky_fallo = False
+        self.lock = threading.Lock()
+
+    def download(self, symbols, start_str, end_str, interval):
+        with self.lock:
+            self.lotes.append(list(symbols))
+            if "FLAKY" in symbols and not self.flaky_fallo:
+                self.flaky_fallo = True
+                raise RuntimeError("timeout")
+        if "BAD" in symbols:
+            raise RuntimeError("Too Many Requests")
+        return super().download(symbols, start_str, end_str, interval)
+
+
+def test_descarga_por_lotes_con_fallas_parciales():
+    symbols = ["FLAKY"] + [f"S{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(95)] + ["BAD"]
+    provider = ProveedorConFallas()
+    client = YahooFinanceClient(ErrorManager(), provider=provider, chunk_size=10, max_workers=4, retries=1)
+    client.scheduler.backoff = 0
+
+    success, msg = client.fetch_data(symbols)
+    assert success, msg
+
+    status = client.get_status()
+    assert list(status) == symbols
+    assert max(len(lote) for lote in provider.lotes) <= 10
+    # Solo el lote con BAD falla; el de FLAKY se recupera con el reintento
+    lote_malo = set(symbols[90:])
+    assert all(status[s] == "Error" for s in lote_malo)
+    assert all(status[s] == "OK" for s in symbols if s not in lote_malo)
+
+
+def test_descarga_falla_completa_informa_error():
+    client = YahooFinanceClient(ErrorManager(), provider=ProveedorConFallas(), retries=0)
+    success, msg = client.fetch_data(["BAD"])
+    assert not success
+    assert msg == ErrorManager().get_message("API_LIMIT")
+
+
+def test_limite_de_simbolos_configurable():
+    manager = SymbolsManager(ErrorManager(), max_symbols=1000)
+    symbols = [f"S{chr(65 + i // 26 % 26)}{chr(65 + i % 26)}{chr(65 + i // 676)}" for i in range(1500)]
+    manager.validate_symbols_from_list(symbols, truncate=True)
+    assert len(manager.get_valid_symbols()) == 1000
+    assert "1000" in manager.get_messages()[0]
@@ -0,0 +1,126 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import csv
+import io
+import time
+import tracemalloc
+import pytest
+import pandas as pd
+from openpyxl import load_workbook
+from modules.excel_handler import ExcelHandler
+from modules.error_manager import ErrorManager
+
+
+def _resultados(n: int) -> dict:
+    senales = ["COMPRA", "VENTA", "NULO"]
+    return {
+        f"S{i:05d}": {"estado": "OK" if i % 7 else "Datos insuficientes", "señal": senales[i % 3]}
+        for i in range(n)
+    }
+
+
+def _parquet_disponible() -> bool:
+    try:
+        pd.io.parquet.get_engine("auto")
+        return True
+    except ImportError:
+        return False
+
+
+def test_exportacion_en_memoria(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    handler = ExcelHandler(ErrorManager())
+    results = _resultados(50)
+
+    ok, buffer = handler.export_results(results, file_format="xlsx")
+    assert ok
+    sheet = load_workbook(buffer, read_only=True).active
+    rows = list(sheet.iter_rows(values_only=True))
+    assert rows[0] == ("Símbolo", "estado", "señal")
+    assert rows[1] == ("S00000", "Datos insuficientes", "COMPRA")
+    assert len(rows) == 51
+
+    ok, buffer = handler.export_results(results, file_format="csv")
+    assert ok
+    rows = list(csv.reader(io.StringIO(buffer.read().decode("utf-8-sig"))))
+    assert rows[0] == ["Símbolo", "estado", "señal"]
+    assert rows[2] == ["S00001", "OK", "VENTA"]
+
+    # Nada se escribe en el directorio de trabajo
+    assert os.listdir(tmp_path) == []
+
+    ok, msg = handler.export_results(results, file_format="pdf")
+    assert not ok and "pdf" in msg
+    assert handler.export_results({}) == (False, "No hay resultados para exportar.")
+    assert handler.export_filename("csv").endswith(".csv")
+
+
+@pytest.mark.skipif(not _parquet_disponible(), reason="requiere pyarrow o fastparquet")
+def test_exportacion_parquet():
+    handler = ExcelHandler(ErrorManager())
+    results = _resultados(50)
+    ok, buffer = handler.export_results(results, file_format="parquet")
+    assert ok
+    df = pd.read_parquet(buffer)
+    assert list(df.columns) == ["estado", "señal"]
+    assert df.index.name == "Símbolo" and len(df) == 50
+    assert df.loc["S00001"].tolist() == ["OK", "VENTA"]
+
+
+def test_parquet_solo_con_biblioteca_instalada(tmp_path, monkeypatch):
+    import importlib.util
+    import json
+    from main import create_app
+
+    client = create_app({"MACD_DATA_PROVIDER": "synthetic", "MACD_CACHE_DIR": str(tmp_path)}).test_client()
+    find_spec = importlib.util.find_spec
+
+    # Sin pyarrow ni fastparquet: la página no ofrece Parquet y la ruta responde 400, no 500
+    monkeypatch.setattr(importlib.util, "find_spec",
+                        lambda name, *args: None if name in ("pyarrow", "fastparquet") else find_spec(name, *args))
+    consulta = {"final_symbols_json": json.dumps(["AAPL", "MSFT"])}
+    html = client.post("/result", data=consulta).get_data(as_text=True)
+    assert 'value="csv"' in html
+    assert 'value="parquet"' not in html
+    result_id = html.split('name="result_id" value="')[1].split('"')[0]
+    resp = client.post("/export_excel", data={"result_id": result_id, "formato": "parquet"})
+    assert resp.status_code == 400
+
+    # Con la biblioteca instalada se ofrece
+    monkeypatch.setattr(importlib.util, "find_spec",
+                        lambda name, *args: object() if name == "pyarrow" else find_spec(name, *args))
+    assert 'value="parquet"' in client.post("/result", data=consulta).get_data(as_text=True)
+
+
+@pytest.mark.performance
+def test_rendimiento_exportacion_10k():
+    handler = ExcelHandler(ErrorManager())
+    results = _resultados(10_000)
+    formatos = ["xlsx", "csv"] + (["parquet"] if _parquet_disponible() else [])
+
+    # Referencia: la exportación anterior con DataFrame.to_excel
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    df = pd.DataFrame.from_dict(results, orient="index")
+    df.index.name = "Símbolo"
+    df.to_excel(io.BytesIO())
+    ref_tiempo = time.perf_counter() - inicio
+    ref_pico = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    print(f"pandas.to_excel: {ref_tiempo:.3f} s, pico {ref_pico:.1f} MB")
+
+    for formato in formatos:
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        ok, buffer = handler.export_results(results, file_format=formato)
+        tiempo = time.perf_counter() - inicio
+        pico = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+        print(f"{formato}: {tiempo:.3f} s, pico {pico:.1f} MB, {buffer.getbuffer().nbytes / 1e3:.0f} KB")
+
+        assert ok, buffer
+        assert tiempo <= 10, f"Exportación {formato} demasiado lenta: {tiempo:.2f}s"
+        if formato == "xlsx":
+            assert pico < ref_pico, f"El modo write-only usó más memoria que pandas: {pico:.1f} MB"
@@ -0,0 +1,159 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import threading
+import time
+import pytest
+from main import create_app
+from modules.classificator import MACDSignalClassifier
+from modules.download_scheduler import DownloadScheduler
+from modules.error_manager import ErrorManager
+from modules.indicators import MACDCalculator
+from modules.pipeline import run_analysis
+from modules.providers import SyntheticProvider
+from modules.show_results import AnalysisResultsManager
+from modules.streaming import prefetch
+from modules.timeframes import history_days
+from modules.yahoo_client import YahooFinanceClient
+
+
+class ProveedorLento(SyntheticProvider):
+    """ Cada descarga tarda demora segundos; registra cuántas hay en curso a la vez """
+
+    def __init__(self, demora: float):
+        super().__init__()
+        self.demora = demora
+        self.iniciadas = 0
+        self.lock = threading.Lock()
+
+    def download(self, symbols, start_str, end_str, interval):
+        with self.lock:
+            self.iniciadas += 1
+        time.sleep(self.demora)
+        return super().download(symbols, start_str, end_str, interval)
+
+
+def test_prefetch_superpone_productor_y_consumidor():
+    def productor():
+        for i in range(10):
+            time.sleep(0.05)
+            yield i
+
+    inicio = time.perf_counter()
+    recibidos = []
+    for item in prefetch(productor(), maxsize=2):
+        time.sleep(0.05)
+        recibidos.append(item)
+    elapsed = time.perf_counter() - inicio
+
+    assert recibidos == list(range(10))
+    # En serie serían 1.0s; en flujo, cerca de la etapa más lenta (0.5s)
+    assert elapsed < 0.8, f"Sin superposición: {elapsed:.2f}s"
+
+
+def test_prefetch_contrapresion_y_errores():
+    producidos = []
+
+    def productor():
+        for i in range(100):
+            producidos.append(i)
+            yield i
+
+    stream = prefetch(productor(), maxsize=2)
+    assert next(stream) == 0
+    time.sleep(0.2)
+    # El productor se detiene con la cola llena: entregado + cola + el que intenta poner
+    assert len(producidos) <= 4
+    stream.close()
+
+    def con_error():
+        yield 1
+        raise RuntimeError("falló la descarga")
+
+    with pytest.raises(RuntimeError, match="falló la descarga"):
+        list(prefetch(con_error()))
+
+
+def test_descargas_acotadas_por_ventana():
+    provider = ProveedorLento(0.0)
+    scheduler = DownloadScheduler(chunk_size=1, max_workers=2)
+    lotes = scheduler.iter_download([f"S{i}" for i in range(20)],
+                                    lambda chunk: provider.download(chunk, "2025-01-01", "2025-03-01", "1d"))
+    next(lotes)
+    time.sleep(0.2)
+    # Con quien consume detenido, no se lanzan más de 2 * max_workers descargas (+1 ya reemplazada)
+    assert provider.iniciadas <= 2 * 2 + 1
+    assert len(list(lotes)) == 19
+
+
+def test_iter_fetch_entrega_lotes_y_fetch_data_igual_que_antes():
+    symbols = [f"S{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(25)]
+    client = YahooFinanceClient(ErrorManager(), provider=SyntheticProvider(unknown_symbols={"SAC"}),
+                                chunk_size=10, max_workers=2)
+    lotes = list(client.iter_fetch(symbols, min_days=120))
+    assert sorted(len(lote) for lote, _, _ in lotes) == [5, 10, 10]
+    assert client.fetch_error is None
+    estados = {symbol: status for _, _, chunk_status in lotes for symbol, status in chunk_status.items()}
+    assert estados["SAC"] == "Simbolo inexistente"
+
+    success, msg = client.fetch_data(symbols, min_days=120)
+    assert success, msg
+    assert list(client.get_status()) == symbols
+    assert set(client.get_data()) == set(symbols) - {"SAC"}
+
+
+def test_pipeline_en_flujo_igual_a_etapas_en_serie(tmp_path):
+    app = create_app({"MACD_DATA_PROVIDER": "synthetic", "MACD_CACHE_DIR": str(tmp_path), "MACD_CHUNK_SIZE": 7})
+    services = app.extensions["macd"]
+    symbols = [f"S{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(40)]
+
+    parciales = []
+    results, msg = run_analysis(services, symbols, partial=parciales.append, timeframes=["1d", "1wk"])
+    assert msg is None
+    assert list(results) == symbols
+    # Un aviso parcial por lote, antes de terminar
+    assert len(parciales) == 6
+    assert sum(len(parcial) for parcial in parciales) == len(symbols)
+
+    # Referencia: todas las etapas en serie sobre la descarga completa
+    client = YahooFinanceClient(ErrorManager(), provider=SyntheticProvider())
+    client.fetch_data(symbols, min_days=history_days(["1d", "1wk"], 26, 9))
+    macd_data, macd_status = MACDCalculator().calculate_macd_batch(client.get_data(), client.get_status())
+    signals = MACDSignalClassifier().classify_all(macd_data, macd_status)
+    esperado = AnalysisResultsManager().build_results(macd_status, signals)
+    for symbol in symbols:
+        assert results[symbol]["señal"] == esperado[symbol]["señal"], symbol
+        assert results[symbol]["estado"] == esperado[symbol]["estado"], symbol
+
+
+@pytest.mark.performance
+def test_latencia_cercana_a_la_etapa_mas_lenta(tmp_path):
+    app = create_app({"MACD_DATA_PROVIDER": "synthetic", "MACD_CACHE_DIR": str(tmp_path),
+                      "MACD_CHUNK_SIZE": 100, "MACD_MAX_WORKERS": 1})
+    services = app.extensions["macd"]
+    symbols = [f"S{i:04d}" for i in range(2000)]
+    provider = services.provider()
+    original = provider.download
+    tiempo_descarga = []
+
+    def descarga_con_red(chunk, start_str, end_str, interval):
+        # Simula la latencia de la red: 0.15s por lote
+        time.sleep(0.15)
+        inicio = time.perf_counter()
+        frames = original(chunk, start_str, end_str, interval)
+        tiempo_descarga.append(time.perf_counter() - inicio + 0.15)
+        return frames
+
+    provider.download = descarga_con_red
+    inicio = time.perf_counter()
+    results, msg = run_analysis(services, symbols)
+    elapsed = time.perf_counter() - inicio
+    assert msg is None and len(results) == len(symbols)
+
+    # En serie, el tiempo sería la suma de todas las etapas (la descarga de red más el resto)
+    etapas = ["escritura_cache", "lectura_cache", "limpieza", "macd", "clasificacion", "resultados"]
+    otras = sum(services.metrics.stage_seconds.total(stage=stage) for stage in etapas)
+    en_serie = sum(tiempo_descarga) + otras
+    print(f"\nEtapas en serie: {en_serie:.2f}s, análisis completo en flujo: {elapsed:.2f}s")
+    assert elapsed <= en_serie * 0.75, f"{elapsed:.2f}s no mejora la suma de las etapas ({en_serie:.2f}s)"
@@ -0,0 +1,108 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import io
+import time
+import tracemalloc
+import pytest
+import pandas as pd
+from openpyxl import Workbook
+from modules.excel_handler import ExcelHandler
+from modules.error_manager import ErrorManager
+
+
+def _libro(filas: int) -> io.BytesIO:
+    """
+    Libro con varias columnas; los símbolos están en la segunda. Se guarda
+    en modo normal para que incluya <dimension>, como los libros de Excel.
+    """
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["Empresa", "Símbolo", "Sector", "Precio"])
+    for i in range(filas):
+        simbolo = None if i % 10 == 3 else f" s{chr(65 + i % 26)}{chr(65 + i // 26 % 26)} "
+        sheet.append([f"Empresa {i}", simbolo, "Tecnología", 100 + i])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def _lectura_anterior(excel_file, column_name: str) -> list[str]:
+    # Implementación previa: DataFrame completo y luego la columna
+    df = pd.read_excel(excel_file, engine="openpyxl")
+    return [str(s).strip().upper() for s in df[column_name].dropna()]
+
+
+def test_misma_lectura_que_pandas():
+    handler = ExcelHandler(ErrorManager(), max_symbols=1000)
+    libro = _libro(200)
+    esperado = _lectura_anterior(libro, "Símbolo")
+    libro.seek(0)
+
+    symbols, msg = handler.load_symbols(libro, "Símbolo", truncate=False)
+    assert msg is None
+    assert symbols == esperado
+
+    # Truncado al límite configurado
+    handler.max_symbols = 20
+    libro.seek(0)
+    symbols, msg = handler.load_symbols(libro, "Símbolo")
+    assert symbols == esperado[:20]
+    assert "trunc" in msg.lower()
+
+    libro.seek(0)
+    assert handler.load_symbols(libro, "Ticker") == ([], "La columna 'Ticker' no existe en el archivo Excel.")
+    assert handler.load_symbols(io.BytesIO(b"no es un excel"), "Símbolo")[1] == ErrorManager().get_message("EXCEL_LOAD")
+
+
+def test_csv_y_tsv():
+    handler = ExcelHandler(ErrorManager())
+    csv_bytes = "Empresa;Símbolo\nApple;aapl\nVacía;\nMicrosoft; msft\n".encode("utf-8-sig")
+    assert handler.load_symbols(io.BytesIO(csv_bytes), "Símbolo", file_format="csv") == (["AAPL", "MSFT"], None)
+
+    tsv_bytes = b"Symbol\tName\nNVDA\tNvidia\nAMZN\tAmazon\n"
+    assert handler.load_symbols(io.BytesIO(tsv_bytes), "Symbol", file_format="tsv") == (["NVDA", "AMZN"], None)
+
+    # El formato se deduce de la extensión del archivo subido
+    archivo = io.BytesIO(b"Ticker,Otro\ntsla,1\n")
+    archivo.filename = "lista.csv"
+    assert handler.load_symbols(archivo, "Ticker") == (["TSLA"], None)
+
+
+@pytest.mark.performance
+def test_rendimiento_lectura_100k():
+    handler = ExcelHandler(ErrorManager())
+    libro = _libro(100_000)
+    csv_bytes = pd.read_excel(libro, engine="openpyxl").to_csv(index=False).encode()
+
+    def medir(funcion, memoria=False):
+        libro.seek(0)
+        if memoria:
+            tracemalloc.start()
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempo = time.perf_counter() - inicio
+        pico = 0.0
+        if memoria:
+            pico = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+        return resultado, tiempo, pico
+
+    _, t_pandas, _ = medir(lambda: _lectura_anterior(libro, "Símbolo"))
+    (symbols, _), t_stream, m_stream = medir(lambda: handler.load_symbols(libro, "Símbolo"), memoria=True)
+    (todos, _), t_completo, _ = medir(lambda: handler.load_symbols(libro, "Símbolo", truncate=False))
+    (csv_symbols, _), t_csv, m_csv = medir(
+        lambda: handler.load_symbols(io.BytesIO(csv_bytes), "Símbolo", file_format="csv"), memoria=True
+    )
+
+    print(f"pd.read_excel (100k filas): {t_pandas:.2f} s")
+    print(f"streaming con límite:       {t_stream:.4f} s, pico {m_stream:.2f} MB")
+    print(f"streaming sin límite:       {t_completo:.2f} s")
+    print(f"CSV con límite:             {t_csv:.4f} s, pico {m_csv:.2f} MB")
+
+    assert len(symbols) == 20 and len(csv_symbols) == 20
+    assert len(todos) == 90_000
+    assert t_stream < t_pandas / 10, f"La lectura con límite no se detuvo en el límite: {t_stream:.2f}s"
+    assert t_csv < t_pandas / 10, f"La lectura del CSV no se detuvo en el límite: {t_csv:.2f}s"
@@ -0,0 +1,140 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+import numpy as np
+from modules.indicators import MACDCalculator
+
+
+def test_macd_incremental_igual_a_recalculo_completo():
+    rng = np.random.default_rng(7)
+    fechas = pd.bdate_range("2024-01-01", periods=80)
+    price_data = {
+        f"SYM{i}": pd.DataFrame({"Close": 50 + rng.standard_normal(80).cumsum()}, index=fechas)
+        for i in range(10)
+    }
+    symbols_status = {s: "OK" for s in price_data}
+
+    # Estado inicial con las primeras 77 velas
+    calc = MACDCalculator()
+    primeras = {s: df.iloc[:-3] for s, df in price_data.items()}
+    calc.calculate_macd_incremental(primeras, symbols_status)
+    assert calc.get_state("SYM0")["last_timestamp"] == fechas[-4]
+
+    # Llegan 3 velas nuevas: solo se avanzan esas
+    calc.calculate_macd_incremental(price_data, symbols_status)
+    macd_data = calc.get_macd_data()
+    assert len(macd_data["SYM0"]) == 2 + 3
+    assert calc.get_state("SYM0")["last_timestamp"] == fechas[-1]
+
+    ok, diferencias = calc.verify_incremental(price_data, symbols_status)
+    print("Diferencias máximas:", max(diferencias.values()))
+    assert ok, f"El incremental difiere del recálculo completo: {diferencias}"
+
+    # Sin velas nuevas se reutiliza el último resultado
+    calc.calculate_macd_incremental(price_data, symbols_status)
+    assert calc.get_macd_data()["SYM0"].index[-1] == fechas[-1]
+    assert calc.get_symbols_status() == symbols_status
+
+
+def test_estado_separado_por_intervalo_y_parametros():
+    rng = np.random.default_rng(11)
+    diarias = pd.bdate_range("2024-01-01", periods=300)
+    cierres = pd.Series(50 + rng.standard_normal(300).cumsum(), index=diarias)
+    diario = {"SYM": pd.DataFrame({"Close": cierres})}
+    # Semanal fechado con el último día de cada semana: comparte fechas con el diario
+    semanal = {"SYM": pd.DataFrame({"Close": cierres.groupby(diarias.to_period("W-FRI")).last().values},
+                                   index=cierres.groupby(diarias.to_period("W-FRI")).apply(lambda s: s.index[-1]))}
+    estado = {"SYM": "OK"}
+
+    compartido = {}
+    MACDCalculator(ema_state=compartido).calculate_macd_incremental(diario, estado)
+    MACDCalculator(8, 21, 5, ema_state=compartido).calculate_macd_incremental(diario, estado)
+    assert len(compartido) == 2
+
+    # El semanal no continúa el estado diario aunque su última fecha esté en el índice diario
+    obtenido, _ = MACDCalculator(ema_state=compartido, interval="1wk").calculate_macd_incremental(semanal, estado)
+    esperado, _ = MACDCalculator(interval="1wk").calculate_macd_batch(semanal, estado)
+    pd.testing.assert_frame_equal(obtenido["SYM"], esperado["SYM"])
+    # Y no guarda estado: su última vela puede estar en curso
+    assert len(compartido) == 2
+
+
+def test_vela_del_dia_no_avanza_el_estado():
+    fechas = pd.date_range(end=pd.Timestamp.now().normalize(), periods=80)
+    price_data = {"SYM": pd.DataFrame({"Close": np.linspace(50, 60, 80)}, index=fechas)}
+    calc = MACDCalculator()
+    calc.calculate_macd_incremental(price_data, {"SYM": "OK"})
+    # La vela de hoy puede no haber cerrado: no queda estado guardado en ella
+    assert calc.get_state("SYM") is None
+    cerradas = {"SYM": price_data["SYM"][price_data["SYM"].index < pd.Timestamp.now().normalize()]}
+    calc.calculate_macd_incremental(cerradas, {"SYM": "OK"})
+    assert calc.get_state("SYM")["last_timestamp"] == cerradas["SYM"].index[-1]
+
+
+def test_historial_reajustado_descarta_el_estado():
+    rng = np.random.default_rng(3)
+    fechas = pd.bdate_range("2024-01-01", periods=120)
+    cierres = 100 + rng.standard_normal(120).cumsum()
+    estado = {"SYM": "OK"}
+
+    calc = MACDCalculator()
+    calc.calculate_macd_incremental({"SYM": pd.DataFrame({"Close": cierres[:-2]}, index=fechas[:-2])}, estado)
+
+    # Split 2:1: todo el historial se reescala y llegan dos velas nuevas
+    ajustado = {"SYM": pd.DataFrame({"Close": cierres / 2}, index=fechas)}
+    obtenido, _ = calc.calculate_macd_incremental(ajustado, estado)
+    esperado, _ = MACDCalculator().calculate_macd_batch(ajustado, estado)
+    pd.testing.assert_frame_equal(obtenido["SYM"], esperado["SYM"])
+    assert calc.get_state("SYM")["last_close"] == cierres[-1] / 2
+
+
+def test_forzar_actualizacion_reinicia_el_estado(tmp_path):
+    from main import create_app
+    from modules.pipeline import run_analysis
+
+    app = create_app({"MACD_DATA_PROVIDER": "synthetic", "MACD_CACHE_DIR": str(tmp_path)})
+    services = app.extensions["macd"]
+    run_analysis(services, ["AAPL", "MSFT"])
+    # Estado corrupto (p. ej. calculado con velas que el proveedor corrigió después)
+    for key, entry in list(services.ema_state.items()):
+        services.ema_state[key] = {**entry, "ema_fast": entry["ema_fast"] * 2}
+    calc = services.macd_calculator()
+    corrupto = dict(calc.get_state("AAPL"))
+
+    run_analysis(services, ["AAPL", "MSFT"], force_refresh=True)
+    nuevo = calc.get_state("AAPL")
+    assert nuevo["ema_fast"] != corrupto["ema_fast"]
+    referencia = MACDCalculator()
+    yahoo = services.yahoo_client()
+    yahoo.fetch_data(["AAPL"])
+    referencia.calculate_macd_incremental(yahoo.get_data(), yahoo.get_status())
+    assert abs(nuevo["ema_fast"] - referencia.get_state("AAPL")["ema_fast"]) < 1e-9
+
+
+def test_estado_con_limite_lru():
+    from modules.ema_state import EMAStateCache
+
+    rng = np.random.default_rng(5)
+    fechas = pd.bdate_range("2024-01-01", periods=80)
+    price_data = {f"SYM{i}": pd.DataFrame({"Close": 50 + rng.standard_normal(80).cumsum()}, index=fechas)
+                  for i in range(4)}
+    estado = {s: "OK" for s in price_data}
+    compartido = EMAStateCache(max_entries=5)
+
+    calc = MACDCalculator(ema_state=compartido)
+    calc.calculate_macd_incremental(price_data, estado)
+    assert len(compartido) == 4
+    calc.get_state("SYM0")  # Usado recientemente: no se expulsa
+
+    # Parámetros elegidos por el usuario: entradas nuevas, pero el total no pasa del límite
+    MACDCalculator(8, 21, 5, ema_state=compartido).calculate_macd_incremental(
+        {"SYM1": price_data["SYM1"], "SYM2": price_data["SYM2"]}, {"SYM1": "OK", "SYM2": "OK"})
+    assert len(compartido) == 5
+    assert calc.get_state("SYM0") is not None and calc.get_state("SYM1") is None
+
+    # Un símbolo expulsado se recalcula completo, con el mismo resultado
+    obtenido, _ = calc.calculate_macd_incremental(price_data, estado)
+    esperado, _ = MACDCalculator().calculate_macd_batch(price_data, estado)
+    pd.testing.assert_frame_equal(obtenido["SYM1"], esperado["SYM1"])
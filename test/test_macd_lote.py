@@ -0,0 +1,38 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+import numpy as np
+from modules.indicators import MACDCalculator
+
+
+def test_macd_lote_igual_a_calculo_por_simbolo():
+    rng = np.random.default_rng(42)
+    fechas = pd.bdate_range("2024-01-01", periods=60)
+
+    price_data = {}
+    for i in range(30):
+        close = 100 + rng.standard_normal(60).cumsum()
+        price_data[f"SYM{i}"] = pd.DataFrame({"Close": close}, index=fechas)
+
+    # Series de distinta longitud, con pocos datos y con estado no OK
+    price_data["CORTO"] = pd.DataFrame({"Close": np.linspace(10, 20, 40)}, index=fechas[-40:])
+    price_data["POCOS"] = pd.DataFrame({"Close": np.ones(20)}, index=fechas[-20:])
+    symbols_status = {s: "OK" for s in price_data}
+    symbols_status["MALO"] = "Símbolo inexistente"
+
+    calc_simbolo = MACDCalculator()
+    calc_simbolo.calculate_macd(price_data, symbols_status)
+
+    calc_lote = MACDCalculator()
+    calc_lote.calculate_macd_batch(price_data, symbols_status)
+
+    # Mismo contrato: estados en el mismo orden y mismos DataFrames
+    assert list(calc_lote.get_symbols_status().items()) == list(calc_simbolo.get_symbols_status().items())
+    assert calc_lote.get_symbols_status()["POCOS"] == "DATOS_INSUFICIENTES"
+    assert calc_lote.get_symbols_status()["MALO"] == "Símbolo inexistente"
+    assert calc_lote.get_macd_data().keys() == calc_simbolo.get_macd_data().keys()
+
+    for symbol, df in calc_simbolo.get_macd_data().items():
+        pd.testing.assert_frame_equal(calc_lote.get_macd_data()[symbol], df)
@@ -0,0 +1,112 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import time
+import pytest
+from main import create_app
+from modules.indicators import MACDCalculator
+from modules.pipeline import run_analysis
+from modules.providers import SyntheticProvider
+from modules.timeframes import ResampleCache, history_days, normalize_timeframes, resample_ohlcv
+
+
+def test_remuestreo_igual_a_pandas_por_simbolo():
+    velas = SyntheticProvider().download(["AAPL", "MSFT", "TSLA"], "2024-01-01", "2025-06-01", "1d")
+    velas["TSLA"] = velas["TSLA"].iloc[40:]  # historiales de distinto largo
+
+    for timeframe, rule in [("1wk", "W-FRI"), ("1mo", "ME")]:
+        resampled = resample_ohlcv(velas, timeframe)
+        assert list(resampled) == ["AAPL", "MSFT", "TSLA"]
+        for symbol, df in velas.items():
+            esperado = df.resample(rule).agg({
+                "Open": "first", "High": "max", "Low": "min",
+                "Close": "last", "Adj Close": "last", "Volume": "sum"
+            }).dropna(subset=["Close"])
+            obtenido = resampled[symbol]
+            assert len(obtenido) == len(esperado)
+            assert (obtenido.to_numpy() == esperado.to_numpy()).all(), f"{symbol} {timeframe}"
+            # Fechada con el último día operado del período
+            assert obtenido.index[-1] == df.index[-1]
+
+
+def test_cache_de_remuestreo():
+    velas = SyntheticProvider().download(["AAPL", "MSFT"], "2024-01-01", "2025-01-01", "1d")
+    cache = ResampleCache()
+    primero = cache.resample(velas, "1wk")
+    segundo = cache.resample(velas, "1wk")
+    assert segundo["AAPL"] is primero["AAPL"]
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 2
+
+
+def test_normalizar_marcos():
+    assert normalize_timeframes(None) == ["1d"]
+    assert normalize_timeframes(["1mo", "1d", "1wk", "1mo"]) == ["1d", "1wk", "1mo"]
+    assert normalize_timeframes(["1mo", "1wk"]) == ["1d", "1wk", "1mo"]
+    assert normalize_timeframes(["1wk"]) == ["1wk"]
+    assert normalize_timeframes(["5m"]) == ["1d"]
+
+
+def test_una_sola_descarga_para_varios_marcos(tmp_path):
+    app = create_app({"MACD_DATA_PROVIDER": "synthetic", "MACD_CACHE_DIR": str(tmp_path)})
+    services = app.extensions["macd"]
+    provider = services.provider()
+    llamadas = []
+    original = provider.download
+
+    def download(symbols, start_str, end_str, interval):
+        llamadas.append(interval)
+        return original(symbols, start_str, end_str, interval)
+
+    provider.download = download
+    symbols = ["AAPL", "MSFT", "NVDA"]
+    results, msg = run_analysis(services, symbols, timeframes=["1d", "1wk", "1mo"])
+    assert msg is None
+    assert llamadas == ["1d"]
+    for symbol in symbols:
+        assert results[symbol]["estado"] == "OK"
+        assert set(results[symbol]) == {"estado", "señal", "señal_1wk", "señal_1mo"}
+
+    html = app.test_client().post("/result", data={
+        "final_symbols_json": json.dumps(symbols), "timeframes": ["1d", "1wk", "1mo"]
+    }).get_data(as_text=True)
+    assert "Señal Semanal" in html and "Señal Mensual" in html
+
+
+def test_marco_semanal_sin_estado_incremental(tmp_path):
+    app = create_app({"MACD_DATA_PROVIDER": "synthetic", "MACD_CACHE_DIR": str(tmp_path)})
+    services = app.extensions["macd"]
+    symbols = ["AAPL", "MSFT", "NVDA"]
+    run_analysis(services, symbols)
+    estados = len(services.ema_state)
+
+    # Solo semanal: se calcula completo, sin leer ni tocar el estado de las velas diarias
+    results, msg = run_analysis(services, symbols, interval="1wk", timeframes=["1wk"])
+    assert msg is None
+    assert len(services.ema_state) == estados
+    yahoo = services.yahoo_client()
+    yahoo.fetch_data(symbols, min_days=history_days(["1wk"]), interval="1wk")
+    batch, status = MACDCalculator().calculate_macd_batch(yahoo.get_data(), yahoo.get_status())
+    esperado = services.classifier().classify_all(batch, status)
+    for symbol in symbols:
+        assert results[symbol]["señal"] == esperado[symbol], f"{symbol}: {results[symbol]} != {esperado[symbol]}"
+
+
+@pytest.mark.performance
+def test_rendimiento_remuestreo():
+    symbols = [f"S{i:04d}" for i in range(1000)]
+    velas = SyntheticProvider().download(symbols, "2022-01-01", "2025-06-01", "1d")
+
+    inicio = time.perf_counter()
+    vectorizado = resample_ohlcv(velas, "1wk")
+    t_vectorizado = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for df in velas.values():
+        df.resample("W-FRI").agg({"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"})
+    t_por_simbolo = time.perf_counter() - inicio
+
+    print(f"Remuestreo vectorizado: {t_vectorizado:.2f} s, por símbolo: {t_por_simbolo:.2f} s")
+    assert len(vectorizado) == 1000
+    assert t_vectorizado < t_por_simbolo, "El remuestreo vectorizado fue más lento que símbolo por símbolo"
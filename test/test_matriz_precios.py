@@ -0,0 +1,135 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import gc
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import pytest
+from modules.error_manager import ErrorManager
+from modules.indicators import MACDCalculator
+from modules.price_matrix import PriceMatrix
+from modules.providers import SyntheticProvider
+from modules.yahoo_client import YahooFinanceClient
+
+
+def _velas_con_huecos(n: int = 40) -> dict:
+    symbols = [f"S{i:02d}" for i in range(n)]
+    frames = SyntheticProvider().download(symbols, "2024-01-01", "2025-06-01", "1d")
+    frames["S01"] = frames["S01"].iloc[120:]                              # historial más corto
+    frames["S02"] = frames["S02"].drop(frames["S02"].index[[5, 60, 61]])  # huecos intermedios
+    frames["S03"] = frames["S03"].iloc[:-4]                               # termina antes
+    frames["S04"] = frames["S04"].iloc[:20]                               # datos insuficientes
+    return frames
+
+
+def test_vistas_por_simbolo():
+    frames = _velas_con_huecos()
+    matrix = PriceMatrix.from_frames(frames, dtype="float64")
+
+    assert list(matrix) == list(frames) and len(matrix) == len(frames)
+    assert "S00" in matrix and "XXXX" not in matrix and matrix.get("XXXX") is None
+    for symbol, df in frames.items():
+        pd.testing.assert_frame_equal(matrix[symbol], df[matrix.fields], check_freq=False, check_names=False)
+
+    # Sin huecos intermedios las columnas son vistas de la matriz (no copias)
+    assert np.shares_memory(matrix["S01"]["Close"].to_numpy(), matrix.field("Close"))
+    assert not np.shares_memory(matrix["S02"]["Close"].to_numpy(), matrix.field("Close"))
+
+
+def test_campos_y_tipo_configurables():
+    frames = _velas_con_huecos(5)
+    completo = PriceMatrix.from_frames(frames, dtype="float64")
+    compacto = PriceMatrix.from_frames(frames, fields=["Close"], dtype="float32")
+
+    assert completo.fields == ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+    assert compacto.fields == ["Close"]
+    assert compacto.field("Close").dtype == np.float32
+    assert compacto.field("Close").flags["C_CONTIGUOUS"]
+    assert compacto.nbytes * 5 < completo.nbytes
+    assert list(compacto["S00"].columns) == ["Close"]
+
+
+def test_macd_por_lotes_desde_la_matriz():
+    frames = _velas_con_huecos()
+    status = {symbol: "OK" for symbol in frames}
+    status["S05"] = "Error"
+    esperado, estado_esperado = MACDCalculator().calculate_macd_batch(frames, status)
+
+    # float64: mismos valores exactos, mismos índices y estados
+    obtenido, estado = MACDCalculator().calculate_macd_batch(PriceMatrix.from_frames(frames, dtype="float64"), status)
+    assert estado == estado_esperado
+    assert estado["S04"] == "DATOS_INSUFICIENTES"
+    assert list(obtenido) == list(esperado)
+    for symbol, df in esperado.items():
+        pd.testing.assert_frame_equal(obtenido[symbol], df, check_exact=True, check_freq=False, check_names=False)
+
+    # float32: solo cambia la precisión de los cierres
+    obtenido, _ = MACDCalculator().calculate_macd_batch(PriceMatrix.from_frames(frames, ["Close"], "float32"), status)
+    for symbol, df in esperado.items():
+        error = (obtenido[symbol] - df).abs().to_numpy().max() / df["MACD"].abs().max()
+        assert error < 1e-5, f"{symbol}: error relativo {error:.2e}"
+
+
+def test_cliente_compacto():
+    client = YahooFinanceClient(ErrorManager(), provider=SyntheticProvider(), compact=True, price_fields=["Close"])
+    success, msg = client.fetch_data(["AAPL", "MSFT"], min_days=120)
+    assert success, msg
+    data = client.get_data()
+    assert isinstance(data, PriceMatrix)
+    assert list(data) == ["AAPL", "MSFT"]
+    assert data["AAPL"]["Close"].notna().all()
+
+
+def test_analisis_web_con_velas_compactas(tmp_path):
+    from main import create_app
+    from modules.pipeline import run_analysis
+
+    symbols = [f"S{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(30)]
+    normal = create_app({"MACD_DATA_PROVIDER": "synthetic", "MACD_CACHE_DIR": str(tmp_path / "a")}).extensions["macd"]
+    esperado, _ = run_analysis(normal, symbols, timeframes=["1d", "1wk"])
+
+    compacto = create_app({"MACD_DATA_PROVIDER": "synthetic", "MACD_CACHE_DIR": str(tmp_path / "b"),
+                           "MACD_COMPACT_PRICES": True, "MACD_PRICE_DTYPE": "float64",
+                           "MACD_CHUNK_SIZE": 10}).extensions["macd"]
+    # Cada lote del flujo llega ya compactado (descarga y caché)
+    for _ in range(2):
+        lotes = list(compacto.yahoo_client().iter_fetch(symbols, min_days=120))
+        assert len(lotes) == 3 and all(isinstance(data, PriceMatrix) for _, data, _ in lotes)
+        assert lotes[0][1].field("Close").dtype == np.float64 and lotes[0][1].fields == ["Close"]
+    resultados, msg = run_analysis(compacto, symbols, timeframes=["1d", "1wk"])
+    assert msg is None
+    assert resultados == esperado
+
+
+@pytest.mark.performance
+def test_memoria_5000_simbolos():
+    symbols = [f"S{i:04d}" for i in range(5000)]
+    status = {symbol: "OK" for symbol in symbols}
+
+    # Memoria retenida: los DataFrames de la descarga y, una vez convertidos, solo la matriz
+    tracemalloc.start()
+    frames = SyntheticProvider().download(symbols, "2024-06-03", "2025-06-02", "1d")
+    memoria_frames = tracemalloc.get_traced_memory()[0]
+    matrix = PriceMatrix.from_frames(frames, fields=["Close"], dtype="float32")
+    del frames
+    gc.collect()
+    memoria_matriz = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"\n{len(symbols)} símbolos x {len(matrix.dates)} velas")
+    print(f"DataFrames OHLCV float64: {memoria_frames / 1e6:.1f} MB")
+    print(f"PriceMatrix Close float32: {memoria_matriz / 1e6:.1f} MB (matrices {matrix.nbytes / 1e6:.1f} MB)")
+
+    frames = matrix.to_frames()
+    inicio = time.perf_counter()
+    MACDCalculator().calculate_macd_batch(frames, status)
+    tiempo_frames = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    MACDCalculator().calculate_macd_batch(matrix, status)
+    tiempo_matriz = time.perf_counter() - inicio
+    print(f"MACD por lotes: DataFrames {tiempo_frames:.2f}s, PriceMatrix {tiempo_matriz:.2f}s")
+
+    assert memoria_matriz * 10 < memoria_frames, "La matriz compacta debería ocupar menos del 10% de los DataFrames"
+    assert tiempo_matriz <= tiempo_frames * 1.5, "La matriz no debería hacer más lento el MACD por lotes"
@@ -0,0 +1,106 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import re
+import threading
+from main import create_app
+from modules.metrics import MetricsRegistry
+
+
+def _muestras(texto: str) -> dict:
+    """ { "nombre{etiquetas}": valor } de la salida en formato Prometheus """
+    muestras = {}
+    for linea in texto.splitlines():
+        if linea and not linea.startswith("#"):
+            nombre, valor = linea.rsplit(" ", 1)
+            muestras[nombre] = float(valor)
+    return muestras
+
+
+def test_formato_prometheus():
+    metrics = MetricsRegistry()
+    metrics.record_stage("macd", 0.02)
+    metrics.record_stage("macd", 3.0)
+    metrics.symbol_status.inc(3, estado='Datos "insuficientes"')
+
+    texto = metrics.render()
+    assert "# TYPE macd_stage_seconds histogram" in texto
+    assert "# TYPE macd_symbol_status_total counter" in texto
+    muestras = _muestras(texto)
+    assert muestras['macd_stage_seconds_bucket{stage="macd",le="0.025"}'] == 1
+    assert muestras['macd_stage_seconds_bucket{stage="macd",le="5.0"}'] == 2
+    assert muestras['macd_stage_seconds_bucket{stage="macd",le="+Inf"}'] == 2
+    assert muestras['macd_stage_seconds_count{stage="macd"}'] == 2
+    assert abs(muestras['macd_stage_seconds_sum{stage="macd"}'] - 3.02) < 1e-9
+    assert muestras['macd_symbol_status_total{estado="Datos \\"insuficientes\\""}'] == 3
+
+
+def test_tiempos_por_hilo():
+    metrics = MetricsRegistry()
+    metrics.begin_request()
+    metrics.record_stage("descarga", 0.5)
+
+    # Otro hilo (p. ej. un trabajo en segundo plano) no se mezcla con la solicitud
+    otro = threading.Thread(target=lambda: metrics.record_stage("macd", 1.0))
+    otro.start()
+    otro.join()
+
+    timings = metrics.end_request("macd.result", 200)
+    assert set(timings) == {"descarga", "total"}
+    assert metrics.stage_seconds.count(stage="macd") == 1
+    assert metrics.end_request("macd.result", 200) == {}, "Sin solicitud en curso no hay tiempos"
+    assert metrics.server_timing({"descarga": 0.5, "total": 0.75}) == "descarga;dur=500.0, total;dur=750.0"
+
+
+def test_hilos_unidos_a_la_solicitud():
+    metrics = MetricsRegistry()
+    metrics.begin_request()
+    timings = metrics.current_request()
+
+    # Varios hilos suman a la misma solicitud a la vez: no se pierde ninguna suma
+    intervalo = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        def medir():
+            metrics.join_request(timings)
+            for _ in range(5000):
+                metrics.record_stage("descarga", 0.5)
+
+        hilos = [threading.Thread(target=medir) for _ in range(8)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+    finally:
+        sys.setswitchinterval(intervalo)
+
+    resultado = metrics.end_request("macd.result", 200)
+    assert resultado["descarga"] == 8 * 5000 * 0.5, f"Se perdieron sumas: {resultado['descarga']}"
+
+
+def test_server_timing_y_ruta_metrics(tmp_path):
+    app = create_app({"MACD_DATA_PROVIDER": "synthetic", "MACD_CACHE_DIR": str(tmp_path)})
+    client = app.test_client()
+    data = {"final_symbols_json": json.dumps(["AAPL", "MSFT", "NVDA"])}
+
+    respuesta = client.post("/result", data=data)
+    etapas = dict(re.findall(r"(\w+);dur=([\d.]+)", respuesta.headers["Server-Timing"]))
+    for etapa in ("descarga", "limpieza", "macd", "clasificacion", "renderizado", "total"):
+        assert etapa in etapas, f"Falta la etapa {etapa} en Server-Timing"
+
+    # Segunda vez: sale de la caché de resultados, sin descarga
+    respuesta = client.post("/result", data=data)
+    assert "descarga" not in respuesta.headers["Server-Timing"]
+
+    respuesta = client.get("/metrics")
+    assert respuesta.status_code == 200
+    assert respuesta.mimetype == "text/plain"
+    muestras = _muestras(respuesta.get_data(as_text=True))
+    assert muestras['macd_symbols_processed_total{stage="macd"}'] == 3
+    assert muestras['macd_symbol_status_total{estado="OK"}'] == 3
+    assert sum(v for k, v in muestras.items() if k.startswith("macd_signals_total")) == 3
+    assert muestras['macd_cache_requests_total{cache="resultados",result="miss"}'] == 3
+    assert muestras['macd_cache_requests_total{cache="resultados",result="hit"}'] == 3
+    assert muestras['macd_http_requests_total{endpoint="macd.result",status="200"}'] == 2
@@ -0,0 +1,132 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+from main import create_app
+
+
+def _app(tmp_path):
+    return create_app({"MACD_DATA_PROVIDER": "synthetic", "MACD_CACHE_DIR": str(tmp_path)})
+
+
+def test_precalculo_desde_la_linea_de_comandos(tmp_path):
+    app = _app(tmp_path)
+    runner = app.test_cli_runner()
+
+    salida = runner.invoke(args=["precompute", "add", "tecnologia", "aapl", "MSFT", "NVDA"])
+    assert "3 símbolos" in salida.output
+    assert "pendiente" in runner.invoke(args=["precompute", "list"]).output
+
+    salida = runner.invoke(args=["precompute", "run"])
+    assert "tecnologia: ok" in salida.output, salida.output
+    assert "al día" in runner.invoke(args=["precompute", "list"]).output
+    # Ya al día: no se vuelve a calcular salvo con --force
+    assert "No hay listas pendientes" in runner.invoke(args=["precompute", "run"]).output
+    assert "tecnologia: ok" in runner.invoke(args=["precompute", "run", "--force"]).output
+
+    historial = app.extensions["macd"].snapshot_store.history()
+    assert len(historial) == 2
+    assert set(historial[0]["stages"]) == {"descarga", "macd", "clasificacion", "resultados"}
+    assert historial[0]["seconds"] >= 0
+
+    estado = app.test_client().get("/precompute/status").get_json()
+    assert estado["listas"]["tecnologia"]["al_dia"] is True
+    assert len(estado["ejecuciones"]) == 2
+
+
+def test_result_usa_el_precalculo_y_recalcula_si_vencio(tmp_path):
+    app = _app(tmp_path)
+    services = app.extensions["macd"]
+    services.snapshot_store.register("lista", ["AAPL", "MSFT"])
+    services.scheduler.run_once()
+
+    # Sin descargas: cualquier llamada al proveedor falla
+    descargas = []
+    services.provider().download = lambda *args: descargas.append(args) or {}
+    client = app.test_client()
+
+    html = client.post("/result", data={"final_symbols_json": json.dumps(["MSFT", "AAPL"])}).get_data(as_text=True)
+    assert descargas == []
+    assert html.index(">MSFT<") < html.index(">AAPL<")
+
+    # Resultado de una sesión anterior: se calcula en el momento
+    path = services.snapshot_store._snapshot_path(services.snapshot_store.snapshot_key(["AAPL", "MSFT"], ["1d"]))
+    with open(path, encoding="utf-8") as f:
+        snapshot = json.load(f)
+    snapshot["session"] = "2000-01-03"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+    services.result_cache.clear()
+    services.price_cache().invalidate(["AAPL", "MSFT"], "1d")
+
+    client.post("/result", data={"final_symbols_json": json.dumps(["MSFT", "AAPL"])})
+    assert len(descargas) == 1
+
+
+def test_bloqueo_entre_procesos(tmp_path):
+    app = _app(tmp_path)
+    services = app.extensions["macd"]
+    services.snapshot_store.register("lista", ["AAPL"])
+
+    # Otro proceso tiene el bloqueo: no se recalcula
+    open(services.scheduler.lock_path, "w").close()
+    assert services.scheduler.run_once() == []
+    os.remove(services.scheduler.lock_path)
+    assert [run["status"] for run in services.scheduler.run_once()] == ["ok"]
+
+
+def test_lista_con_errores_no_queda_al_dia(tmp_path):
+    app = create_app({"MACD_DATA_PROVIDER": "synthetic", "MACD_CACHE_DIR": str(tmp_path), "MACD_CHUNK_SIZE": 1})
+    services = app.extensions["macd"]
+    services.snapshot_store.register("lista", ["AAPL", "MSFT"])
+
+    # Sin esperas entre reintentos
+    yahoo_client = services.yahoo_client
+
+    def cliente_sin_esperas():
+        client = yahoo_client()
+        client.scheduler.backoff = 0
+        return client
+
+    services.yahoo_client = cliente_sin_esperas
+    provider = services.provider()
+    original = provider.download
+
+    def descarga_con_fallas(symbols, *args):
+        if "MSFT" in symbols:
+            raise ConnectionError("timeout")
+        return original(symbols, *args)
+
+    # 1️⃣ Falla la descarga de un símbolo: no se guarda y la lista sigue pendiente
+    provider.download = descarga_con_fallas
+    entrada = services.scheduler.run_once()[0]
+    assert entrada["status"] == "error", entrada
+    assert services.snapshot_store.load_snapshot(["AAPL", "MSFT"], ["1d"]) is None
+    assert services.scheduler.pending() == ["lista"]
+
+    # 2️⃣ Siguiente ronda, ya sin fallas: se reintenta y queda al día
+    provider.download = original
+    assert services.scheduler.run_once()[0]["status"] == "ok"
+    assert services.scheduler.pending() == []
+
+
+def test_alta_de_lista_valida_los_simbolos(tmp_path):
+    listado = tmp_path / "listado.txt"
+    listado.write_text("AAPL\nMSFT\nNVDA\n")
+    app = create_app({"MACD_DATA_PROVIDER": "synthetic", "MACD_CACHE_DIR": str(tmp_path),
+                      "MACD_SYMBOLS_FILE": str(listado)})
+    runner = app.test_cli_runner()
+    store = app.extensions["macd"].snapshot_store
+
+    # Caracteres inválidos o símbolos fuera del listado: se rechaza la lista entera
+    salida = runner.invoke(args=["precompute", "add", "mala", "AAPL", "BRK.B"])
+    assert salida.exit_code != 0 and "BRK.B" in salida.output
+    salida = runner.invoke(args=["precompute", "add", "mala", "AAPL", "ZZZZ"])
+    assert salida.exit_code != 0 and "ZZZZ" in salida.output
+    assert store.watchlists() == {}
+
+    # Válidos: se normalizan (mayúsculas, sin duplicados)
+    salida = runner.invoke(args=["precompute", "add", "buena", "aapl", "msft", "AAPL"])
+    assert salida.exit_code == 0, salida.output
+    assert store.watchlists()["buena"]["symbols"] == ["AAPL", "MSFT"]
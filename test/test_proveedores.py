@@ -0,0 +1,63 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+import pytest
+from modules.error_manager import ErrorManager
+from modules.providers import SyntheticProvider, CsvProvider, create_provider
+from modules.timeframes import resample_ohlcv
+from modules.yahoo_client import YahooFinanceClient
+
+
+def test_proveedor_sintetico_es_determinista():
+    provider = SyntheticProvider(seed=1)
+    largo = provider.download(["AAPL", "MSFT"], "2025-01-01", "2025-06-01", "1d")
+    corto = provider.download(["AAPL"], "2025-03-03", "2025-06-01", "1d")
+
+    assert list(largo["AAPL"].columns) == ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+    # Las mismas fechas valen lo mismo sin importar la ventana pedida
+    pd.testing.assert_frame_equal(largo["AAPL"].loc[corto["AAPL"].index], corto["AAPL"], check_freq=False)
+    assert not largo["AAPL"]["Close"].equals(largo["MSFT"]["Close"])
+
+
+def test_cliente_con_proveedor_local_asigna_estados():
+    provider = SyntheticProvider(unknown_symbols={"ZZZZ"})
+    client = YahooFinanceClient(ErrorManager(), provider=provider)
+    # Sin red: el proveedor local no requiere comprobar la conexión
+    client._check_internet = lambda: False
+
+    success, msg = client.fetch_data(["AAPL", "ZZZZ"])
+    assert success, msg
+    assert client.get_status() == {"AAPL": "OK", "ZZZZ": "Simbolo inexistente"}
+    assert len(client.get_data()["AAPL"]) >= 30
+
+
+def test_proveedor_csv(tmp_path):
+    velas = SyntheticProvider().download(["AAPL"], "2025-01-01", "2025-04-01", "1d")["AAPL"]
+    velas.to_csv(tmp_path / "AAPL.csv")
+
+    provider = create_provider(f"csv:{tmp_path}")
+    assert isinstance(provider, CsvProvider)
+    frames = provider.download(["AAPL", "MSFT"], "2025-02-01", "2025-03-01", "1d")
+    assert list(frames) == ["AAPL"]
+    assert frames["AAPL"].index.min() >= pd.Timestamp("2025-02-01")
+    assert frames["AAPL"].index.max() < pd.Timestamp("2025-03-01")
+
+
+def test_proveedor_csv_remuestrea_intervalos(tmp_path):
+    velas = SyntheticProvider().download(["AAPL"], "2024-01-01", "2025-04-01", "1d")["AAPL"]
+    velas.to_csv(tmp_path / "AAPL.csv")
+    provider = CsvProvider(str(tmp_path))
+
+    semanal = provider.download(["AAPL"], "2025-01-01", "2025-04-01", "1wk")["AAPL"]
+    esperado = resample_ohlcv({"AAPL": velas}, "1wk")["AAPL"].loc["2025-01-01":]
+    pd.testing.assert_frame_equal(semanal, esperado, check_freq=False, check_names=False)
+    assert semanal.index.to_series().diff().dropna().min() >= pd.Timedelta(days=3)
+
+    mensual = provider.download(["AAPL"], "2024-06-01", "2025-04-01", "1mo")["AAPL"]
+    assert len(mensual) == 10
+    assert mensual["Volume"].iloc[0] == velas.loc["2024-06", "Volume"].sum()
+
+    with pytest.raises(ValueError):
+        provider.download(["AAPL"], "2025-01-01", "2025-04-01", "1h")
@@ -0,0 +1,133 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import threading
+import time
+from main import create_app
+from modules.jobs import AnalysisJob
+from modules.live_events import format_event, job_event_stream
+
+
+def _leer_eventos(chunks):
+    """ Separa el texto SSE en (evento, datos, id); los comentarios quedan como ("ping", None, None) """
+    eventos = []
+    texto = "".join(chunk.decode() if isinstance(chunk, bytes) else chunk for chunk in chunks)
+    for bloque in texto.split("\n\n"):
+        if not bloque:
+            continue
+        if bloque.startswith(":"):
+            eventos.append(("ping", None, None))
+            continue
+        campos = dict(linea.split(": ", 1) for linea in bloque.split("\n"))
+        if "event" in campos:
+            eventos.append((campos["event"], json.loads(campos["data"]), campos.get("id")))
+    return eventos
+
+
+def test_formato_de_evento():
+    texto = format_event("fila", {"simbolo": "AAPL", "señal": "COMPRA"}, 3)
+    assert texto == 'id: 3\nevent: fila\ndata: {"simbolo": "AAPL", "señal": "COMPRA"}\n\n'
+
+
+def test_flujo_de_un_trabajo_y_reanudacion():
+    job = AnalysisJob(["AAPL", "MSFT", "TSLA"])
+    job.add_partial({"AAPL": {"estado": "OK", "señal": "COMPRA"}})
+    stream = job_event_stream(job, heartbeat=0.05)
+    assert next(stream).startswith("retry:")
+    evento, datos, event_id = _leer_eventos([next(stream)])[0]
+    assert (evento, datos["simbolo"], event_id) == ("fila", "AAPL", "1")
+    assert _leer_eventos([next(stream)])[0][0] == "progreso"
+
+    # Sin novedades: latido para mantener viva la conexión
+    assert _leer_eventos([next(stream)]) == [("ping", None, None)]
+
+    job.add_partial({"MSFT": {"estado": "OK", "señal": "VENTA"}})
+    job.finish({
+        "AAPL": {"estado": "OK", "señal": "COMPRA"},
+        "MSFT": {"estado": "OK", "señal": "VENTA"},
+        "TSLA": {"estado": "Error", "señal": "NULO"},
+    })
+    eventos = _leer_eventos(stream)
+    # MSFT llegó como parcial; TSLA solo estaba en los resultados finales
+    assert [(e, d["simbolo"]) for e, d, _ in eventos if e == "fila"] == [("fila", "MSFT"), ("fila", "TSLA")]
+    assert eventos[-1][0] == "fin" and eventos[-1][1]["estado"] == "terminado"
+
+    # Reconexión con Last-Event-ID = 1: no se repite AAPL
+    eventos = _leer_eventos(job_event_stream(job, cursor=1))
+    assert [d["simbolo"] for e, d, _ in eventos if e == "fila"] == ["MSFT", "TSLA"]
+
+
+def test_primer_resultado_antes_de_terminar(tmp_path):
+    app = create_app({"MACD_DATA_PROVIDER": "synthetic", "MACD_CACHE_DIR": str(tmp_path), "MACD_MAX_SYMBOLS": 200,
+                      "MACD_CHUNK_SIZE": 20, "MACD_MAX_WORKERS": 1})
+    services = app.extensions["macd"]
+    provider = services.provider()
+    original = provider.download
+
+    def descarga_con_red(chunk, start_str, end_str, interval):
+        # Simula la latencia de la red: 0.2s por lote
+        time.sleep(0.2)
+        return original(chunk, start_str, end_str, interval)
+
+    provider.download = descarga_con_red
+    client = app.test_client()
+    symbols = [f"S{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(150)]
+
+    job = client.post("/jobs", data={"final_symbols_json": json.dumps(symbols), "timeframes": ["1d", "1wk"]}).get_json()
+    html = client.get(job["live_url"]).get_data(as_text=True)
+    assert job["events_url"] in html and "Señal Semanal" in html
+
+    inicio = time.perf_counter()
+    resp = client.get(job["events_url"], buffered=False)
+    assert resp.mimetype == "text/event-stream"
+    primera_fila, eventos = None, []
+    for chunk in resp.response:
+        eventos.extend(_leer_eventos([chunk]))
+        if primera_fila is None and any(evento == "fila" for evento, _, _ in eventos):
+            primera_fila = time.perf_counter() - inicio
+    total = time.perf_counter() - inicio
+    print(f"\nPrimer resultado: {primera_fila:.2f}s, análisis completo: {total:.2f}s")
+
+    filas = [datos for evento, datos, _ in eventos if evento == "fila"]
+    assert sorted(fila["simbolo"] for fila in filas) == sorted(symbols)
+    assert all("señal_1wk" in fila for fila in filas)
+    assert primera_fila < total / 3, f"El primer resultado llegó a los {primera_fila:.2f}s de {total:.2f}s"
+
+    # Al terminar, los resultados completos quedan guardados para filtrar y exportar
+    final = eventos[-1][1]
+    assert eventos[-1][0] == "fin" and final["estado"] == "terminado"
+    resp = client.post("/filter_results", data={"result_id": final["result_id"], "signal_filter": "TODO"})
+    assert resp.status_code == 200
+
+    # Reconectar a un trabajo terminado no vuelve a guardar los resultados
+    directorio = services.result_store.directory
+    guardados = len(os.listdir(directorio))
+    for _ in range(3):
+        eventos = _leer_eventos([client.get(job["events_url"], headers={"Last-Event-ID": "150"}).get_data()])
+        assert eventos[-1][0] == "fin" and eventos[-1][1]["result_id"] == final["result_id"]
+    assert len(os.listdir(directorio)) == guardados == 1
+
+    assert client.get("/jobs/inexistente/events").status_code == 404
+    assert client.get("/jobs/inexistente/live").status_code == 404
+
+
+def test_dos_clientes_reciben_todas_las_filas(tmp_path):
+    app = create_app({"MACD_DATA_PROVIDER": "synthetic", "MACD_CACHE_DIR": str(tmp_path), "MACD_MAX_SYMBOLS": 200, "MACD_CHUNK_SIZE": 10})
+    client = app.test_client()
+    symbols = [f"S{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(60)]
+    job = client.post("/jobs", data={"final_symbols_json": json.dumps(symbols)}).get_json()
+
+    recibidos = {}
+
+    def escuchar(nombre):
+        resp = app.test_client().get(job["events_url"])
+        recibidos[nombre] = [d["simbolo"] for e, d, _ in _leer_eventos([resp.get_data()]) if e == "fila"]
+
+    hilos = [threading.Thread(target=escuchar, args=(nombre,)) for nombre in ("a", "b")]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join(timeout=30)
+    assert sorted(recibidos["a"]) == sorted(recibidos["b"]) == sorted(symbols)
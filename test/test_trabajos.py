@@ -0,0 +1,60 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import threading
+import time
+from main import create_app
+from modules.jobs import JobManager
+
+
+def test_trabajo_en_segundo_plano(tmp_path):
+    app = create_app({"MACD_DATA_PROVIDER": "synthetic", "MACD_CACHE_DIR": str(tmp_path), "MACD_MAX_SYMBOLS": 200})
+    client = app.test_client()
+    symbols = [f"S{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(150)]
+
+    resp = client.post("/jobs", data={"final_symbols_json": json.dumps(symbols)})
+    assert resp.status_code == 202
+    job = resp.get_json()
+
+    # Consultar el estado hasta que termine
+    limite = time.time() + 30
+    while True:
+        estado = client.get(job["status_url"]).get_json()
+        if estado["estado"] in ("terminado", "error") or time.time() > limite:
+            break
+        time.sleep(0.05)
+
+    assert estado["estado"] == "terminado", estado["mensajes"]
+    assert estado["etapas"]["descarga"] == {"procesados": 150, "total": 150}
+    assert list(estado["resultados_parciales"]) == symbols
+
+    html = client.get(job["result_url"]).get_data(as_text=True)
+    assert "Resultados del Análisis" in html
+    assert all(symbol in html for symbol in symbols)
+
+    assert client.get("/jobs/inexistente").status_code == 404
+
+
+def test_limite_de_simbolos_en_trabajos(tmp_path):
+    app = create_app({"MACD_DATA_PROVIDER": "synthetic", "MACD_CACHE_DIR": str(tmp_path), "MACD_MAX_SYMBOLS": 5})
+    symbols = [f"S{chr(65 + i)}" for i in range(7)]
+    resp = app.test_client().post("/jobs", data={"final_symbols_json": json.dumps(symbols)})
+    assert resp.status_code == 400
+    assert "5 símbolos" in resp.get_json()["error"] and "SF, SG" in resp.get_json()["error"]
+    assert app.extensions["macd"].job_manager._jobs == {}
+
+
+def test_inicio_del_trabajo_avisa_a_quien_espera():
+    manager = JobManager(max_workers=1)
+    liberar = threading.Event()
+    job = manager.submit(["AAPL"], lambda job: liberar.wait(5) and ({}, None))
+
+    # Quien espera con la versión inicial se entera del cambio a "en_proceso" sin agotar el latido
+    inicio = time.perf_counter()
+    version = job.wait(0, timeout=5)
+    espera = time.perf_counter() - inicio
+    assert version > 0 and job.to_dict()["estado"] == "en_proceso"
+    assert espera < 1, f"El cambio de estado no avisó: se esperaron {espera:.2f}s"
+    liberar.set()
@@ -0,0 +1,92 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import time
+import random
+import string
+import pytest
+from main import create_app
+from modules.symbol_universe import SymbolUniverse
+from modules.symbols_manager import SymbolsManager
+from modules.error_manager import ErrorManager
+
+
+LISTADO = (
+    "Symbol|Security Name|Market Category\n"
+    "AAPL|Apple Inc. - Common Stock|Q\n"
+    "AAL|American Airlines Group Inc.|Q\n"
+    "AMZN|Amazon.com, Inc. - Common Stock|Q\n"
+    "MSFT|Microsoft Corporation - Common Stock|Q\n"
+    "File Creation Time: 1018202612:00|||\n"
+)
+
+
+def test_indice_y_prefijos(tmp_path):
+    path = tmp_path / "nasdaqlisted.txt"
+    path.write_text(LISTADO)
+    universe = SymbolUniverse(str(path))
+
+    assert len(universe) == 4
+    assert "aapl" in universe and "GOOG" not in universe
+    assert universe.prefix("aa") == [("AAL", "American Airlines Group Inc."), ("AAPL", "Apple Inc. - Common Stock")]
+    assert universe.prefix("A", limit=1) == [("AAL", "American Airlines Group Inc.")]
+    assert universe.prefix("") == []
+
+    # Un símbolo por línea, sin encabezado; refresh detecta el cambio
+    path.write_text("GOOG\nNVDA\n")
+    os.utime(path, (time.time() + 5, time.time() + 5))
+    assert universe.refresh()
+    assert "GOOG" in universe and "AAPL" not in universe
+    assert not universe.refresh()
+
+
+def test_validacion_rechaza_desconocidos(tmp_path):
+    path = tmp_path / "listado.csv"
+    path.write_text("Symbol,Name\nAAPL,Apple\nMSFT,Microsoft\n")
+    manager = SymbolsManager(ErrorManager(), universe=SymbolUniverse(str(path)))
+
+    manager.validate_symbols_from_list(["AAPL", "XYZQ", "MSFT", "AAPL", "BRK.B"])
+    assert manager.get_valid_symbols() == ["AAPL", "MSFT"]
+    report = manager.get_validation_report()
+    assert report["desconocidos"] == ["XYZQ"]
+    assert report["invalidos"] == ["BRK.B"]
+    assert report["duplicados"] == ["AAPL"]
+    assert any("XYZQ" in msg for msg in manager.get_messages())
+
+
+def test_ruta_de_autocompletado(tmp_path):
+    path = tmp_path / "nasdaqlisted.txt"
+    path.write_text(LISTADO)
+    app = create_app({"MACD_DATA_PROVIDER": "synthetic", "MACD_CACHE_DIR": str(tmp_path), "MACD_SYMBOLS_FILE": str(path)})
+    client = app.test_client()
+
+    data = client.get("/symbols/suggest?q=am").get_json()
+    assert data["sugerencias"] == [{"simbolo": "AMZN", "nombre": "Amazon.com, Inc. - Common Stock"}]
+
+    data = client.post("/validate_symbols", data={"manual_symbols": "aapl, zzzz"}).get_json()
+    assert data["symbols"] == ["AAPL"]
+
+    # Sin listado configurado no hay sugerencias ni verificación de existencia
+    app = create_app({"MACD_DATA_PROVIDER": "synthetic", "MACD_CACHE_DIR": str(tmp_path)})
+    assert app.test_client().get("/symbols/suggest?q=am").get_json() == {"sugerencias": []}
+
+
+@pytest.mark.performance
+def test_validacion_lineal_100k(tmp_path):
+    simbolos = list({"".join(random.choices(string.ascii_uppercase, k=5)) for _ in range(120_000)})
+    path = tmp_path / "listado.txt"
+    path.write_text("\n".join(simbolos[::2]))
+    universe = SymbolUniverse(str(path))
+
+    entrada = simbolos[:100_000] + ["AB1", "C-D"] * 100
+    manager = SymbolsManager(ErrorManager(), max_symbols=200_000, universe=universe)
+
+    inicio = time.perf_counter()
+    manager.validate_symbols_from_list(entrada)
+    elapsed = time.perf_counter() - inicio
+    print(f"Validación de {len(entrada)} símbolos: {elapsed:.3f} segundos")
+
+    assert len(manager.get_valid_symbols()) == 50_000
+    assert len(manager.get_validation_report()["desconocidos"]) == 50_000
+    assert elapsed <= 2, f"Validación demasiado lenta: {elapsed:.2f}s"
@@ -0,0 +1,194 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import subprocess
+import threading
+from datetime import date
+import numpy as np
+import pandas as pd
+import pytest
+from main import create_app
+from modules.market_calendar import latest_daily_bar
+from modules.pipeline import run_analysis
+from modules.price_matrix import PriceMatrix
+from modules.providers import SyntheticProvider
+from modules.shared_prices import SharedPriceStore
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _matriz(n: int = 30, dtype="float64") -> tuple[dict, PriceMatrix]:
+    symbols = [f"S{i:02d}" for i in range(n)]
+    frames = SyntheticProvider().download(symbols, "2024-01-01", "2025-06-01", "1d")
+    frames["S01"] = frames["S01"].iloc[100:]                              # historial más corto
+    frames["S02"] = frames["S02"].drop(frames["S02"].index[[5, 60, 61]])  # huecos intermedios
+    return frames, PriceMatrix.from_frames(frames, dtype=dtype)
+
+
+def test_publicar_y_leer_sin_copiar(tmp_path):
+    frames, matrix = _matriz()
+    store = SharedPriceStore(str(tmp_path))
+    assert store.current() is None
+
+    store.publish(matrix, date(2025, 5, 30))
+    shared = store.current()
+    assert store.current() is shared  # Se abre una sola vez por proceso
+    assert isinstance(shared.field("Close"), np.memmap)
+    assert list(shared) == list(frames)
+    for symbol, df in frames.items():
+        pd.testing.assert_frame_equal(shared[symbol], df[shared.fields], check_freq=False, check_names=False)
+
+    # Las columnas son vistas del archivo mapeado, de solo lectura
+    close = shared["S01"]["Close"].to_numpy()
+    assert np.shares_memory(close, shared.field("Close"))
+    assert not close.flags.writeable
+
+    # Ventana desde una fecha: también vistas, y cobertura por símbolo
+    ventana = shared.since("2025-01-02")
+    assert ventana.dates[0] >= pd.Timestamp("2025-01-02")
+    assert np.shares_memory(ventana["S03"]["Close"].to_numpy(), shared.field("Close"))
+    pd.testing.assert_frame_equal(ventana["S03"], frames["S03"].loc["2025-01-02":, shared.fields],
+                                  check_freq=False, check_names=False)
+    assert shared.covers("S00", "2024-03-01") and not shared.covers("S01", "2024-03-01")
+    assert not shared.covers("XXXX", "2024-03-01")
+
+
+def test_reemplazo_atomico_de_versiones(tmp_path):
+    _, matrix = _matriz(10)
+    store = SharedPriceStore(str(tmp_path), keep=2)
+    store.publish(matrix, date(2025, 5, 29))
+    anterior = store.current()
+
+    # Sesión vieja: no sirve para la sesión pedida
+    assert store.current(session=date(2025, 5, 30)) is None
+
+    # Un lector en otro hilo nunca ve una versión a medio escribir
+    errores, stop = [], threading.Event()
+
+    def leer():
+        while not stop.is_set():
+            actual = store.current()
+            try:
+                assert actual is not None and len(actual) == 10
+                assert float(actual["S05"]["Close"].iloc[-1]) == float(matrix["S05"]["Close"].iloc[-1])
+            except AssertionError as e:
+                errores.append(e)
+
+    lector = threading.Thread(target=leer)
+    lector.start()
+    for _ in range(5):
+        store.publish(matrix, date(2025, 5, 30))
+    stop.set()
+    lector.join()
+    assert not errores
+
+    assert store.session() == "2025-05-30"
+    assert store.current(session=date(2025, 5, 30)) is not anterior
+    # La versión anterior sigue legible mientras esté mapeada, aunque se haya borrado
+    assert anterior["S00"]["Close"].notna().all()
+    versiones = [name for name in os.listdir(tmp_path) if name.startswith("1d-")]
+    assert len(versiones) == 2
+
+
+def test_otro_proceso_lee_el_mismo_archivo(tmp_path):
+    _, matrix = _matriz(20)
+    store = SharedPriceStore(str(tmp_path))
+    store.publish(matrix, date(2025, 5, 30))
+    esperado = float(np.nansum(matrix.field("Close")))
+
+    codigo = (
+        "import sys; sys.path.insert(0, sys.argv[1]);"
+        "import numpy as np; from modules.shared_prices import SharedPriceStore;"
+        "m = SharedPriceStore(sys.argv[2]).current();"
+        "print(isinstance(m.field('Close'), np.memmap), float(np.nansum(m.field('Close'))))"
+    )
+    salida = subprocess.run([sys.executable, "-c", codigo, ROOT, str(tmp_path)],
+                            capture_output=True, text=True, check=True).stdout.split()
+    assert salida[0] == "True"
+    assert float(salida[1]) == pytest.approx(esperado)
+
+
+def test_analisis_desde_el_almacen_compartido(tmp_path):
+    # Con la configuración por defecto (MACD_PRICE_DTYPE float32) se publica igual en float64
+    app = create_app({"MACD_DATA_PROVIDER": "synthetic", "MACD_CACHE_DIR": str(tmp_path),
+                      "MACD_SHARED_PRICES": True})
+    services = app.extensions["macd"]
+    symbols = [f"S{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(40)]
+    esperado, msg = run_analysis(services, symbols, timeframes=["1d", "1wk"])
+    assert msg is None
+
+    # El precálculo publica las velas de las listas registradas
+    services.snapshot_store.register("lista", symbols[:30], ["1d", "1wk"])
+    runs = services.scheduler.run_once()
+    assert [run["watchlist"] for run in runs] == ["lista", "velas compartidas"]
+    assert runs[-1]["status"] == "ok"
+    assert services.shared_prices().session() == latest_daily_bar().isoformat()
+    assert services.shared_prices().current().field("Close").dtype == np.float64
+    # Sin nada nuevo que recalcular, no se vuelve a publicar
+    assert services.scheduler.run_once() == []
+
+    # Otro worker (otros servicios, mismo directorio): los 30 publicados no tocan la caché ni la red
+    otro = create_app({"MACD_DATA_PROVIDER": "synthetic", "MACD_CACHE_DIR": str(tmp_path),
+                       "MACD_SHARED_PRICES": True}).extensions["macd"]
+    descargados = []
+    original = otro.provider().download
+    otro.provider().download = lambda chunk, *args: descargados.extend(chunk) or original(chunk, *args)
+    results, msg = run_analysis(otro, symbols, timeframes=["1d", "1wk"])
+    assert msg is None
+    assert descargados == []
+    assert otro.metrics.cache_requests.get(cache="compartida", result="hit") == 30
+    assert otro.metrics.cache_requests.get(cache="precios", result="hit") == 10
+    for symbol in symbols:
+        assert results[symbol] == esperado[symbol], symbol
+    # Mismos valores del MACD por cualquiera de los dos caminos
+    compartido = otro.macd_calculator().get_state(symbols[0])
+    desde_cache = services.macd_calculator().get_state(symbols[0])
+    assert compartido["ema_fast"] == desde_cache["ema_fast"] and compartido["signal"] == desde_cache["signal"]
+
+    # Una versión publicada en float32 no se sirve: daría otro MACD que la caché
+    viejo = SharedPriceStore(str(tmp_path / "viejo"))
+    viejo.publish(PriceMatrix.from_frames(otro.yahoo_client().cache.load(symbols[:5], "1d", "2000-01-01"),
+                                          fields=["Close"], dtype="float32"), latest_daily_bar())
+    cliente = otro.yahoo_client()
+    cliente.shared_prices = viejo
+    assert cliente._plan_shared(symbols[:5], pd.Timestamp("2025-01-01").to_pydatetime(), "1d") == (None, [])
+
+    # Forzar actualización ignora el almacén compartido
+    cliente = otro.yahoo_client()
+    list(cliente.iter_fetch(symbols[:5], min_days=60, force_refresh=True))
+    assert descargados == symbols[:5]
+
+
+@pytest.mark.performance
+@pytest.mark.skipif(not os.path.exists("/proc/self/smaps"), reason="requiere /proc (Linux)")
+def test_memoria_compartida_entre_procesos(tmp_path):
+    symbols = [f"S{i:04d}" for i in range(2000)]
+    frames = SyntheticProvider().download(symbols, "2024-06-03", "2025-06-02", "1d")
+    store = SharedPriceStore(str(tmp_path))
+    store.publish(PriceMatrix.from_frames(frames, fields=["Close"], dtype="float32"), date(2025, 6, 2))
+    del frames
+
+    # Cada proceso recorre todas las velas: las páginas leídas son las del archivo
+    # (caché del sistema, compartida), sin copias anónimas propias del proceso
+    codigo = (
+        "import sys; sys.path.insert(0, sys.argv[1]);"
+        "from modules.shared_prices import SharedPriceStore;"
+        "m = SharedPriceStore(sys.argv[2]).current();"
+        "total = sum(float(m[s]['Close'].sum()) for s in m);"
+        "rss = anonima = 0; mapeo = False\n"
+        "for linea in open('/proc/self/smaps'):\n"
+        "    partes = linea.split()\n"
+        "    if not partes[0].endswith(':'): mapeo = len(partes) >= 6 and partes[-1].endswith('campo_0.npy')\n"
+        "    elif mapeo and partes[0] == 'Rss:': rss += int(partes[1])\n"
+        "    elif mapeo and partes[0] == 'Anonymous:': anonima += int(partes[1])\n"
+        "print(rss, anonima)"
+    )
+    procesos = [subprocess.Popen([sys.executable, "-c", codigo, ROOT, str(tmp_path)], stdout=subprocess.PIPE, text=True)
+                for _ in range(3)]
+    salidas = [proceso.communicate()[0].split() for proceso in procesos]
+    print(f"\nMatriz compartida: {store.current().nbytes / 1e6:.1f} MB")
+    for rss, anonima in salidas:
+        print(f"Proceso: {int(rss)} kB leídos del archivo mapeado, {int(anonima)} kB copiados")
+        assert int(rss) > 0
+        assert int(anonima) == 0, "Las velas deberían leerse del archivo compartido, sin copias por proceso"